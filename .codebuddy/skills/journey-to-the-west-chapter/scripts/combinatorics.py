@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》章节组合空间
+把章回标题与结构规划的全部可能结果映射到 [0, N) 的整数编号，可按编号直接构造结果、
+由结果反查编号，并支持伪随机排列、分片枚举与可续跑的游标，内存占用与 N 无关
+"""
+
+import argparse
+import bisect
+from abc import ABC, abstractmethod
+import hashlib
+import json
+import math
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from generate_chapter import (
+    DEFAULT_STAGE_CONTENT, KEY_ELEMENTS, STAGE_CONTENT, TEMPLATE_NAMES, TEMPLATES_BY_NAME,
+    TITLE_FIRST_LINES, TITLE_SECOND_LINES, duration_splits,
+)
+
+# 关键元素的抽取数量范围，与 ChapterGenerator._generate_key_elements 一致
+KEY_ELEMENT_COUNTS = range(3, 7)
+
+
+def unrank_sample(pool: Sequence, sizes: range, index: int) -> List:
+    """将编号映射为从 pool 中有序抽取的不重复子序列（抽取数量取自 sizes）"""
+    n = len(pool)
+    for k in sizes:
+        block = math.perm(n, k)
+        if index < block:
+            break
+        index -= block
+    else:
+        raise IndexError("编号超出范围")
+    remaining = list(pool)
+    picked = []
+    # 第 j 位之后还有 P(n-j-1, k-j-1) 种排法，按此逐位取出剩余元素
+    for j in range(k):
+        block = math.perm(n - j - 1, k - j - 1)
+        digit, index = divmod(index, block)
+        picked.append(remaining.pop(digit))
+    return picked
+
+
+def rank_sample(pool: Sequence, sizes: range, picked: Sequence) -> int:
+    """unrank_sample 的逆运算"""
+    n, k = len(pool), len(picked)
+    if k not in sizes:
+        raise ValueError(f"抽取数量 {k} 不在 {sizes.start}-{sizes.stop - 1} 范围内")
+    index = sum(math.perm(n, size) for size in sizes if size < k)
+    remaining = list(pool)
+    for j, item in enumerate(picked):
+        digit = remaining.index(item)
+        remaining.pop(digit)
+        index += digit * math.perm(n - j - 1, k - j - 1)
+    return index
+
+
+class CombinatorialSpace(ABC):
+    """组合空间基类：子类设置 size 并实现 unrank 与 rank
+
+    结构规划空间远超 sys.maxsize，len() 无法表示，因此不提供 __len__，大小统一通过 size 属性获取。
+    """
+
+    size: int
+
+    @abstractmethod
+    def unrank(self, index: int):
+        """编号 → 结果"""
+
+    @abstractmethod
+    def rank(self, item) -> int:
+        """结果 → 编号"""
+
+    def __getitem__(self, index: int):
+        size = self.size
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("编号超出范围")
+        return self.unrank(index)
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self.unrank(index)
+
+    def permutation(self, seed: Optional[int] = None) -> "Permutation":
+        """返回本空间编号上的伪随机排列；seed 为空时为恒等排列"""
+        return Permutation(self.size, seed)
+
+    def iter_shard(self, shard: int = 0, shards: int = 1, seed: Optional[int] = None,
+                   start: int = 0) -> Iterator[Tuple[int, object]]:
+        """按位置 shard, shard+shards, … 遍历（可选打乱后的）空间，产出（位置, 结果）
+
+        各分片互不重叠且合起来覆盖整个空间；产出的位置即游标，
+        从 start=上次位置+shards 继续即可续跑。
+        """
+        if not 0 <= shard < shards:
+            raise ValueError("分片编号必须在 [0, 分片数) 内")
+        permutation = self.permutation(seed)
+        first = start if start > shard else shard
+        first += (shard - first) % shards
+        for position in range(first, self.size, shards):
+            yield position, self.unrank(permutation[position])
+
+
+class Permutation:
+    """[0, size) 上的伪随机排列
+
+    使用以种子为密钥的四轮 Feistel 网络置换覆盖 size 的最小偶数位宽区间，
+    落在 size 之外时继续迭代（cycle walking），因此任意位置都能 O(1) 求值，无需存储排列。
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        self.size = size
+        self.seed = seed
+        half_bits = max(1, (max(size - 1, 1).bit_length() + 1) // 2)
+        self._half_bits = half_bits
+        self._mask = (1 << half_bits) - 1
+        self._width = (half_bits + 7) // 8 + 1
+        self._key = hashlib.blake2b(str(seed).encode("utf-8"), digest_size=16).digest()
+
+    def _round(self, round_index: int, value: int) -> int:
+        data = bytes((round_index,)) + value.to_bytes(self._width, "little")
+        digest = hashlib.blake2b(data, key=self._key, digest_size=16).digest()
+        return int.from_bytes(digest, "little") & self._mask
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half_bits, value & self._mask
+        for round_index in range(self.ROUNDS):
+            left, right = right, left ^ self._round(round_index, right)
+        return (left << self._half_bits) | right
+
+    def __getitem__(self, position: int) -> int:
+        if not 0 <= position < self.size:
+            raise IndexError("位置超出范围")
+        if self.seed is None:
+            return position
+        value = self._encrypt(position)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+class TitleSpace(CombinatorialSpace):
+    """章回标题空间：上联×下联，排除上下联相同的组合"""
+
+    def __init__(self, first_lines: Sequence[str] = TITLE_FIRST_LINES,
+                 second_lines: Sequence[str] = TITLE_SECOND_LINES):
+        self.first_lines = tuple(first_lines)
+        self.second_lines = tuple(second_lines)
+        self._second_index = {line: i for i, line in enumerate(self.second_lines)}
+        # 每个上联对应的编号起点；与某个下联相同的上联少一种组合
+        self._offsets = [0]
+        for first in self.first_lines:
+            self._offsets.append(self._offsets[-1] + len(self.second_lines) - (first in self._second_index))
+        self.size = self._offsets[-1]
+
+    def unrank(self, index: int) -> str:
+        first_index = bisect.bisect_right(self._offsets, index) - 1
+        first = self.first_lines[first_index]
+        second_index = index - self._offsets[first_index]
+        skipped = self._second_index.get(first)
+        if skipped is not None and second_index >= skipped:
+            second_index += 1
+        return f"{first} {self.second_lines[second_index]}"
+
+    def rank(self, title: str) -> int:
+        first, second = title.split(" ", 1)
+        first_index = self.first_lines.index(first)
+        second_index = self._second_index[second]
+        skipped = self._second_index.get(first)
+        if skipped is not None:
+            if second_index == skipped:
+                raise ValueError("上下联不能相同")
+            if second_index > skipped:
+                second_index -= 1
+        return self._offsets[first_index] + second_index
+
+
+class StructurePlanSpace(CombinatorialSpace):
+    """指定模板的结构规划空间：篇幅分配 ×（每个阶段的内容 × 关键元素）"""
+
+    def __init__(self, template_name: str):
+        if template_name not in TEMPLATES_BY_NAME:
+            raise ValueError(f"未知模板：{template_name}")
+        self.template_name = template_name
+        self.stages = tuple(TEMPLATES_BY_NAME[template_name]["structure"])
+        self.contents = tuple(STAGE_CONTENT.get(stage, DEFAULT_STAGE_CONTENT) for stage in self.stages)
+        self.splits = duration_splits(len(self.stages))
+        self._split_index: Optional[Dict[Tuple[int, ...], int]] = None
+        self._element_choices = sum(math.perm(len(KEY_ELEMENTS), k) for k in KEY_ELEMENT_COUNTS)
+        self._stage_radices = tuple(len(contents) * self._element_choices for contents in self.contents)
+        self.size = len(self.splits) * math.prod(self._stage_radices)
+
+    def unrank(self, index: int) -> List[Dict]:
+        index, split_index = divmod(index, len(self.splits))
+        durations = self.splits[split_index]
+        plan = []
+        for stage, contents, radix, duration in zip(self.stages, self.contents,
+                                                    self._stage_radices, durations):
+            index, digit = divmod(index, radix)
+            content_index, element_index = divmod(digit, self._element_choices)
+            plan.append({
+                "stage": stage,
+                "content": contents[content_index],
+                "duration_percentage": duration,
+                "key_elements": unrank_sample(KEY_ELEMENTS, KEY_ELEMENT_COUNTS, element_index),
+            })
+        return plan
+
+    def rank(self, plan: Sequence[Dict]) -> int:
+        if tuple(item["stage"] for item in plan) != self.stages:
+            raise ValueError("结构规划的阶段与模板不符")
+        if self._split_index is None:
+            self._split_index = {split: i for i, split in enumerate(self.splits)}
+        index = 0
+        for item, contents, radix in reversed(list(zip(plan, self.contents, self._stage_radices))):
+            digit = (contents.index(item["content"]) * self._element_choices
+                     + rank_sample(KEY_ELEMENTS, KEY_ELEMENT_COUNTS, item["key_elements"]))
+            index = index * radix + digit
+        split = tuple(item["duration_percentage"] for item in plan)
+        return index * len(self.splits) + self._split_index[split]
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """解析 i/n 形式的分片参数"""
+    shard, _, shards = value.partition("/")
+    return int(shard), int(shards or 1)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="按编号枚举《西游记》章回标题与结构规划")
+    parser.add_argument("space", choices=("title", "structure"), help="组合空间")
+    parser.add_argument("-t", "--template", choices=TEMPLATE_NAMES, default=TEMPLATE_NAMES[0],
+                        help=f"结构规划使用的模板（默认{TEMPLATE_NAMES[0]}）")
+    parser.add_argument("-s", "--seed", type=int, help="打乱顺序的种子（默认按编号顺序）")
+    parser.add_argument("--shard", default="0/1", help="分片，形如 0/4（默认 0/1）")
+    parser.add_argument("--start", type=int, default=0, help="从该位置继续（上次输出的 position + 分片数）")
+    parser.add_argument("-n", "--count", type=int, help="最多输出数量（默认直到分片结束）")
+    parser.add_argument("--size", action="store_true", help="只输出空间大小")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    space = TitleSpace() if args.space == "title" else StructurePlanSpace(args.template)
+    if args.size:
+        print(space.size)
+        return
+    shard, shards = parse_shard(args.shard)
+    try:
+        for emitted, (position, item) in enumerate(space.iter_shard(shard, shards, args.seed, args.start)):
+            if args.count is not None and emitted >= args.count:
+                break
+            print(json.dumps({"position": position, "item": item}, ensure_ascii=False))
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》章节设计紧凑表示
+以 __slots__ 记录类保存章节设计，字段只存放共享目录中的整数编号，
+取值有限的子记录（场景、冲突、艺术特色、主题与改编组合）全局驻留、多份设计共享，
+需要输出时再按需还原为与 generate_complete_chapter_design 结构相同的字典
+"""
+
+import argparse
+import json
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple
+
+from generate_chapter import (
+    ADAPTATIONS, ARTISTIC_FEATURES, CONFLICT_INTENSITIES, CONFLICT_THEMES, CONFLICTS,
+    CREATIVE_NOTES, DEFAULT_STAGE_CONTENT, EMOTIONS, GROWTH_STATES, KEY_ACTIONS, KEY_ELEMENTS,
+    MAIN_CHARACTERS, RELATIONSHIP_CHANGES, SCENES, STAGE_CONTENT, TEMPLATE_NAMES, TEMPLATES_BY_NAME,
+    THEMES, THEMES_OVERALL_CONNECTION, TITLE_FIRST_LINES, TITLE_SECOND_LINES,
+    TITLE_SECOND_LINES_EXCLUDING, ChapterGenerator,
+)
+
+
+def _index(values: Sequence) -> Dict:
+    """值 → 编号 的反查表"""
+    return {value: position for position, value in enumerate(values)}
+
+
+def _stage_contents(stage: str) -> Tuple[str, ...]:
+    return STAGE_CONTENT.get(stage, DEFAULT_STAGE_CONTENT)
+
+
+# 各模板的阶段名，与 generate_structure_plan 的遍历顺序一致
+TEMPLATE_STAGES: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(TEMPLATES_BY_NAME[name]["structure"]) for name in TEMPLATE_NAMES
+)
+
+# 编码用反查表
+_TEMPLATE_IDS = _index(TEMPLATE_NAMES)
+_CHARACTER_IDS = _index(character["name"] for character in MAIN_CHARACTERS)
+_FIRST_LINE_IDS = _index(TITLE_FIRST_LINES)
+_SECOND_LINE_IDS = _index(TITLE_SECOND_LINES)
+_EMOTION_IDS = _index(EMOTIONS)
+_ACTION_IDS = _index(KEY_ACTIONS)
+_GROWTH_IDS = _index(GROWTH_STATES)
+_RELATIONSHIP_IDS = _index(RELATIONSHIP_CHANGES)
+_KEY_ELEMENT_IDS = _index(KEY_ELEMENTS)
+_SCENE_IDS = _index(scene["type"] for scene in SCENES)
+_CONFLICT_IDS = _index(conflict["type"] for conflict in CONFLICTS)
+_INTENSITY_IDS = _index(CONFLICT_INTENSITIES)
+_CONFLICT_THEME_IDS = _index(CONFLICT_THEMES)
+_FEATURE_IDS = _index(feature["type"] for feature in ARTISTIC_FEATURES)
+_THEME_IDS = _index(theme["name"] for theme in THEMES)
+_ADAPTATION_IDS = _index(adaptation["medium"] for adaptation in ADAPTATIONS)
+# 下联与上联相同时，从排除列表中选出的位置 → 在 TITLE_SECOND_LINES 中的编号
+_EXCLUDING_SECOND_IDS = {
+    first: tuple(_SECOND_LINE_IDS[line] for line in lines)
+    for first, lines in TITLE_SECOND_LINES_EXCLUDING.items()
+}
+
+
+class CompactStage:
+    """结构阶段：阶段内容编号、篇幅百分比、关键元素编号"""
+
+    __slots__ = ("content", "duration", "key_elements")
+
+    def __init__(self, content: int, duration: int, key_elements: Tuple[int, ...]):
+        self.content = content
+        self.duration = duration
+        self.key_elements = key_elements
+
+
+class CompactScene:
+    """场景：场景类型编号、地点编号、氛围编号（后两者为该类型内的编号）"""
+
+    __slots__ = ("scene", "location", "mood")
+
+    def __init__(self, scene: int, location: int, mood: int):
+        self.scene = scene
+        self.location = location
+        self.mood = mood
+
+
+class CompactConflict:
+    """冲突：冲突类型、示例、化解方式（类型内编号）、强度与主题"""
+
+    __slots__ = ("conflict", "example", "resolution", "intensity", "theme")
+
+    def __init__(self, conflict: int, example: int, resolution: int, intensity: int, theme: int):
+        self.conflict = conflict
+        self.example = example
+        self.resolution = resolution
+        self.intensity = intensity
+        self.theme = theme
+
+
+class CompactFeature:
+    """艺术特色：特色编号与选中技法编号（特色内编号）"""
+
+    __slots__ = ("feature", "techniques")
+
+    def __init__(self, feature: int, techniques: Tuple[int, ...]):
+        self.feature = feature
+        self.techniques = techniques
+
+
+# 场景、冲突、艺术特色与主题/改编组合的取值空间都很小，相同取值只保留一个实例；
+# 驻留的记录由所有设计共享，视为只读
+@lru_cache(maxsize=None)
+def scene_record(scene: int, location: int, mood: int) -> CompactScene:
+    return CompactScene(scene, location, mood)
+
+
+@lru_cache(maxsize=None)
+def conflict_record(conflict: int, example: int, resolution: int, intensity: int, theme: int) -> CompactConflict:
+    return CompactConflict(conflict, example, resolution, intensity, theme)
+
+
+@lru_cache(maxsize=None)
+def feature_record(feature: int, techniques: Tuple[int, ...]) -> CompactFeature:
+    return CompactFeature(feature, techniques)
+
+
+_INTERNED_IDS: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+
+
+def intern_ids(ids: Tuple[int, ...]) -> Tuple[int, ...]:
+    """驻留编号元组（用于主题与改编组合）"""
+    return _INTERNED_IDS.setdefault(ids, ids)
+
+
+class CompactDesign:
+    """紧凑章节设计
+
+    除生成时间外全部为整数或整数元组；to_dict() 还原出的字典与原设计相等，
+    其中目录里的只读元组（技法列表、改编建议、创作提示）与原设计一样直接共享。
+    """
+
+    __slots__ = (
+        "generated_at", "template", "chapter_number", "design_number", "title_first", "title_second",
+        "character", "emotion", "action", "growth", "relationship",
+        "stages", "scenes", "conflicts", "features", "themes", "adaptations",
+    )
+
+    def __init__(self, generated_at: str, template: int, chapter_number: int, design_number: int,
+                 title_first: int, title_second: int, character: int,
+                 emotion: int, action: int, growth: int, relationship: int,
+                 stages: Tuple[CompactStage, ...], scenes: Tuple[CompactScene, ...],
+                 conflicts: Tuple[CompactConflict, ...], features: Tuple[CompactFeature, ...],
+                 themes: Tuple[int, ...], adaptations: Tuple[int, ...]):
+        # 生成时间常为同一时钟值，驻留后多份设计共享同一字符串对象
+        self.generated_at = sys.intern(generated_at)
+        self.template = template
+        self.chapter_number = chapter_number
+        self.design_number = design_number
+        self.title_first = title_first
+        self.title_second = title_second
+        self.character = character
+        self.emotion = emotion
+        self.action = action
+        self.growth = growth
+        self.relationship = relationship
+        self.stages = stages
+        self.scenes = scenes
+        self.conflicts = conflicts
+        self.features = features
+        self.themes = themes
+        self.adaptations = adaptations
+
+    @property
+    def template_name(self) -> str:
+        return TEMPLATE_NAMES[self.template]
+
+    @property
+    def chapter_title(self) -> str:
+        return f"{TITLE_FIRST_LINES[self.title_first]} {TITLE_SECOND_LINES[self.title_second]}"
+
+    @property
+    def main_character(self) -> str:
+        return MAIN_CHARACTERS[self.character]["name"]
+
+    def to_dict(self) -> Dict:
+        """还原为 generate_complete_chapter_design 的字典结构"""
+        stage_names = TEMPLATE_STAGES[self.template]
+        main_character = self.main_character
+        scenes = []
+        for scene in self.scenes:
+            scene_type = SCENES[scene.scene]
+            location = scene_type["examples"][scene.location]
+            mood = scene_type["mood"][scene.mood]
+            scenes.append({
+                "type": scene_type["type"],
+                "location": location,
+                "mood": mood,
+                "description": f"{mood}的{location}场景",
+                "function": scene_type["function"],
+            })
+        conflicts = []
+        for conflict in self.conflicts:
+            conflict_type = CONFLICTS[conflict.conflict]
+            conflicts.append({
+                "type": conflict_type["type"],
+                "description": conflict_type["examples"][conflict.example],
+                "intensity": CONFLICT_INTENSITIES[conflict.intensity],
+                "resolution_method": conflict_type["resolution"][conflict.resolution],
+                "theme_connection": CONFLICT_THEMES[conflict.theme],
+            })
+        features = []
+        for feature in self.features:
+            catalog = ARTISTIC_FEATURES[feature.feature]
+            techniques = catalog["techniques"]
+            features.append({
+                "type": catalog["type"],
+                "techniques": techniques,
+                "effect": catalog["effect"],
+                "selected_techniques": [techniques[technique] for technique in feature.techniques],
+            })
+        return {
+            "metadata": {
+                "generated_at": self.generated_at,
+                "template_used": TEMPLATE_NAMES[self.template],
+                "chapter_number": self.chapter_number,
+                "design_id": f"design_{self.design_number}",
+            },
+            "chapter_title": self.chapter_title,
+            "main_character": main_character,
+            "structure_plan": [
+                {
+                    "stage": stage_name,
+                    "content": _stage_contents(stage_name)[stage.content],
+                    "duration_percentage": stage.duration,
+                    "key_elements": [KEY_ELEMENTS[element] for element in stage.key_elements],
+                }
+                for stage_name, stage in zip(stage_names, self.stages)
+            ],
+            "character_performance": {
+                "character": main_character,
+                "emotion": EMOTIONS[self.emotion],
+                "key_action": KEY_ACTIONS[self.action],
+                "growth": GROWTH_STATES[self.growth],
+                "relationship_change": RELATIONSHIP_CHANGES[self.relationship],
+            },
+            "scenes": scenes,
+            "conflicts": conflicts,
+            "artistic_features": features,
+            "thematic_connections": {
+                "themes": [dict(THEMES[theme]) for theme in self.themes],
+                "overall_connection": THEMES_OVERALL_CONNECTION,
+            },
+            "adaptation_suggestions": [
+                {"medium": ADAPTATIONS[adaptation]["medium"], "suggestions": ADAPTATIONS[adaptation]["suggestions"]}
+                for adaptation in self.adaptations
+            ],
+            "creative_notes": CREATIVE_NOTES,
+        }
+
+    @classmethod
+    def from_dict(cls, design: Mapping) -> "CompactDesign":
+        """将字典形式的章节设计编码为紧凑表示；含目录以外的取值时抛出 ValueError"""
+        try:
+            metadata = design["metadata"]
+            template = _TEMPLATE_IDS[metadata["template_used"]]
+            first, second = design["chapter_title"].split(" ")
+            stages = []
+            for stage in design["structure_plan"]:
+                stages.append(CompactStage(
+                    _stage_contents(stage["stage"]).index(stage["content"]),
+                    stage["duration_percentage"],
+                    tuple(_KEY_ELEMENT_IDS[element] for element in stage["key_elements"]),
+                ))
+            scenes = []
+            for scene in design["scenes"]:
+                scene_id = _SCENE_IDS[scene["type"]]
+                catalog = SCENES[scene_id]
+                scenes.append(scene_record(scene_id, catalog["examples"].index(scene["location"]),
+                                           catalog["mood"].index(scene["mood"])))
+            conflicts = []
+            for conflict in design["conflicts"]:
+                conflict_id = _CONFLICT_IDS[conflict["type"]]
+                catalog = CONFLICTS[conflict_id]
+                conflicts.append(conflict_record(
+                    conflict_id, catalog["examples"].index(conflict["description"]),
+                    catalog["resolution"].index(conflict["resolution_method"]),
+                    _INTENSITY_IDS[conflict["intensity"]], _CONFLICT_THEME_IDS[conflict["theme_connection"]],
+                ))
+            features = []
+            for feature in design["artistic_features"]:
+                feature_id = _FEATURE_IDS[feature["type"]]
+                techniques = ARTISTIC_FEATURES[feature_id]["techniques"]
+                features.append(feature_record(
+                    feature_id, tuple(techniques.index(technique) for technique in feature["selected_techniques"])))
+            performance = design["character_performance"]
+            return cls(
+                metadata["generated_at"], template, metadata["chapter_number"],
+                int(metadata["design_id"].rpartition("_")[2]),
+                _FIRST_LINE_IDS[first], _SECOND_LINE_IDS[second], _CHARACTER_IDS[design["main_character"]],
+                _EMOTION_IDS[performance["emotion"]], _ACTION_IDS[performance["key_action"]],
+                _GROWTH_IDS[performance["growth"]], _RELATIONSHIP_IDS[performance["relationship_change"]],
+                tuple(stages), tuple(scenes), tuple(conflicts), tuple(features),
+                intern_ids(tuple(_THEME_IDS[theme["name"]] for theme in design["thematic_connections"]["themes"])),
+                intern_ids(tuple(_ADAPTATION_IDS[item["medium"]] for item in design["adaptation_suggestions"])),
+            )
+        except (KeyError, ValueError) as exc:
+            raise ValueError(f"无法编码为紧凑设计：{exc!r}") from exc
+
+
+# 抽样用的编号序列：random 的 choice/sample 只依赖序列长度，
+# 对编号序列抽样与对目录本身抽样消耗完全相同的随机数，结果一一对应
+_TEMPLATE_RANGE = range(len(TEMPLATE_NAMES))
+_CHARACTER_RANGE = range(len(MAIN_CHARACTERS))
+_FIRST_LINE_RANGE = range(len(TITLE_FIRST_LINES))
+_SECOND_LINE_RANGE = range(len(TITLE_SECOND_LINES))
+_KEY_ELEMENT_RANGE = range(len(KEY_ELEMENTS))
+_SCENE_RANGE = range(len(SCENES))
+_CONFLICT_RANGE = range(len(CONFLICTS))
+_FEATURE_RANGE = range(len(ARTISTIC_FEATURES))
+_THEME_RANGE = range(len(THEMES))
+_ADAPTATION_RANGE = range(len(ADAPTATIONS))
+
+
+class CompactChapterGenerator(ChapterGenerator):
+    """直接生成紧凑设计的章节生成器
+
+    与 ChapterGenerator 按相同顺序消耗随机数，同一随机状态下
+    generate_compact_design().to_dict() 与 generate_complete_chapter_design() 相等，
+    但生成过程中不构造任何中间字典。
+    """
+
+    def generate_compact_design(self, template_name: Optional[str] = None,
+                                seed: Optional[int] = None) -> CompactDesign:
+        """生成一份紧凑章节设计"""
+        if self.roster is not None:
+            raise ValueError("紧凑设计记录只支持内置的取经五人，不支持人物名册")
+        if seed is not None:
+            return type(self)(rng=self._fork_rng(seed), clock=self.clock).generate_compact_design(template_name)
+        rng = self.rng
+        choice = rng.choice
+        randint = rng.randint
+        sample = rng.sample
+        if template_name is None:
+            template = choice(_TEMPLATE_RANGE)
+        elif template_name in _TEMPLATE_IDS:
+            template = _TEMPLATE_IDS[template_name]
+        else:
+            raise ValueError(f"未知模板：{template_name}")
+        character = choice(_CHARACTER_RANGE)
+        generated_at = self.clock()
+        chapter_number = randint(1, 100)
+        design_number = randint(1000, 9999)
+
+        first = choice(_FIRST_LINE_RANGE)
+        second = choice(_SECOND_LINE_RANGE)
+        first_line = TITLE_FIRST_LINES[first]
+        if first_line == TITLE_SECOND_LINES[second]:
+            second = choice(_EXCLUDING_SECOND_IDS[first_line])
+
+        stage_draws = []
+        for stage in TEMPLATE_STAGES[template]:
+            content = choice(range(len(_stage_contents(stage))))
+            duration = randint(20, 35)
+            stage_draws.append((content, duration, tuple(sample(_KEY_ELEMENT_RANGE, k=randint(3, 6)))))
+        total = sum(duration for _, duration, _ in stage_draws)
+        stages = tuple(CompactStage(content, round(duration / total * 100), elements)
+                       for content, duration, elements in stage_draws)
+
+        emotion = choice(range(len(EMOTIONS)))
+        action = choice(range(len(KEY_ACTIONS)))
+        growth = choice(range(len(GROWTH_STATES)))
+        relationship = choice(range(len(RELATIONSHIP_CHANGES)))
+
+        scenes = []
+        for _ in range(randint(2, 4)):
+            scene = choice(_SCENE_RANGE)
+            catalog = SCENES[scene]
+            location = choice(range(len(catalog["examples"])))
+            scenes.append(scene_record(scene, location, choice(range(len(catalog["mood"])))))
+
+        conflicts = []
+        for _ in range(randint(1, 3)):
+            conflict = choice(_CONFLICT_RANGE)
+            catalog = CONFLICTS[conflict]
+            example = choice(range(len(catalog["examples"])))
+            resolution = choice(range(len(catalog["resolution"])))
+            conflicts.append(conflict_record(conflict, example, resolution,
+                                             choice(range(len(CONFLICT_INTENSITIES))),
+                                             choice(range(len(CONFLICT_THEMES)))))
+
+        features = tuple(
+            feature_record(feature, tuple(sample(range(len(ARTISTIC_FEATURES[feature]["techniques"])),
+                                                 k=randint(1, 3))))
+            for feature in sample(_FEATURE_RANGE, k=randint(2, 4))
+        )
+        themes = intern_ids(tuple(sample(_THEME_RANGE, k=randint(2, 4))))
+        adaptations = intern_ids(tuple(sample(_ADAPTATION_RANGE, k=randint(2, 4))))
+
+        return CompactDesign(generated_at, template, chapter_number, design_number, first, second, character,
+                             emotion, action, growth, relationship, stages, tuple(scenes), tuple(conflicts),
+                             features, themes, adaptations)
+
+    def iter_compact_designs(self, count: int, template_name: Optional[str] = None) -> Iterator[CompactDesign]:
+        """逐个生成 count 份紧凑设计"""
+        for _ in range(count):
+            yield self.generate_compact_design(template_name)
+
+
+def iter_dicts(designs: Iterable[CompactDesign]) -> Iterator[Dict]:
+    """按需逐个还原为字典，供渲染或 JSON 输出"""
+    for design in designs:
+        yield design.to_dict()
+
+
+def write_compact_jsonl(designs: Iterable[CompactDesign], stream: TextIO) -> int:
+    """逐行写出 JSONL，返回写出数量"""
+    dumps = json.dumps
+    count = 0
+    for design in designs:
+        stream.write(dumps(design.to_dict(), ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="以紧凑表示生成章节设计并输出 JSONL")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="生成数量（默认1000）")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    parser.add_argument("-t", "--template", choices=TEMPLATE_NAMES, help="指定模板")
+    parser.add_argument("--generated-at", help="固定生成时间（用于可复现输出）")
+    parser.add_argument("-o", "--output", default="-", help="输出文件路径（默认 - 表示标准输出）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数：先生成全部紧凑设计，写出时再逐个还原"""
+    args = parse_args(argv)
+    clock = (lambda: args.generated_at) if args.generated_at else None
+    generator = CompactChapterGenerator(seed=args.seed, clock=clock)
+    designs = list(generator.iter_compact_designs(args.count, args.template))
+    try:
+        if args.output == "-":
+            write_compact_jsonl(designs, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                write_compact_jsonl(designs, f)
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
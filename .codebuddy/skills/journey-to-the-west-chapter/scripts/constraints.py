@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》章节设计的条件约束
+把场景、冲突的全部可能取值枚举为带概率的条目表，并按属性取值建立位图索引；
+给定条件后一次求出满足条件的条目池，抽样时直接从收窄后的池中抽取，无需反复生成再过滤。
+抽样结果与“反复调用 generate_complete_chapter_design 直到满足条件”的条件分布一致，
+条件无法满足时在构造约束对象时立即报错
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from generate_chapter import (
+    CONFLICT_INTENSITIES, CONFLICT_THEMES, CONFLICTS, EMOTIONS, GROWTH_STATES, KEY_ACTIONS,
+    MAIN_CHARACTERS, RELATIONSHIP_CHANGES, SCENES, TEMPLATE_NAMES,
+)
+
+Condition = Union[str, Iterable[str]]
+
+# 条件名 → 中文说明（用于错误信息）
+CONSTRAINT_FIELDS: Mapping[str, str] = {
+    "template": "结构模板",
+    "main_character": "主要人物",
+    "emotion": "主要情感",
+    "key_action": "关键行为",
+    "growth": "成长状态",
+    "relationship_change": "关系变化",
+    "scene_type": "场景类型",
+    "scene_location": "场景地点",
+    "scene_mood": "场景氛围",
+    "conflict_type": "冲突类型",
+    "conflict_description": "冲突描述",
+    "conflict_resolution": "冲突解决方法",
+    "conflict_intensity": "冲突强度",
+    "conflict_theme": "冲突主题关联",
+}
+
+# 场景、冲突条件对应的条目属性
+SCENE_CONDITIONS = {"scene_type": "type", "scene_location": "location", "scene_mood": "mood"}
+CONFLICT_CONDITIONS = {
+    "conflict_type": "type",
+    "conflict_description": "description",
+    "conflict_resolution": "resolution_method",
+    "conflict_intensity": "intensity",
+    "conflict_theme": "theme_connection",
+}
+
+# 场景与冲突的数量范围，与 generate_complete_chapter_design 一致
+SCENE_COUNTS = range(2, 5)
+CONFLICT_COUNTS = range(1, 4)
+
+
+class _Pool:
+    """带权条目池：按累计权重二分抽取，每次抽样只消耗一个随机数"""
+
+    __slots__ = ("items", "cumulative", "total")
+
+    def __init__(self, items: Sequence[Tuple[str, ...]], weights: Sequence[float]):
+        self.items = tuple(items)
+        self.cumulative = list(accumulate(weights))
+        self.total = self.cumulative[-1] if self.cumulative else 0.0
+
+    def draw(self, rng) -> Tuple[str, ...]:
+        index = bisect_right(self.cumulative, rng.random() * self.total)
+        return self.items[min(index, len(self.items) - 1)]
+
+
+class _ItemTable:
+    """某类条目（场景或冲突）全部可能结果的枚举表
+
+    每个条目是输出字典各字段的取值元组，权重为原生成过程抽到它的概率；
+    index 为 属性 → 取值 → 位图（第 i 位表示第 i 个条目具有该取值）。
+    """
+
+    def __init__(self, keys: Tuple[str, ...], rows: Iterable[Tuple[Tuple[str, ...], float]],
+                 attributes: Iterable[str]):
+        self.keys = keys
+        items, weights = [], []
+        for item, weight in rows:
+            items.append(item)
+            weights.append(weight)
+        self.items = tuple(items)
+        self.weights = tuple(weights)
+        self.all_mask = (1 << len(items)) - 1
+        self.index: Dict[str, Dict[str, int]] = {}
+        for attribute in attributes:
+            position = keys.index(attribute)
+            values: Dict[str, int] = {}
+            for i, item in enumerate(items):
+                values[item[position]] = values.get(item[position], 0) | (1 << i)
+            self.index[attribute] = values
+
+    def pool(self, mask: int) -> _Pool:
+        selected = [i for i in range(len(self.items)) if mask >> i & 1]
+        return _Pool([self.items[i] for i in selected], [self.weights[i] for i in selected])
+
+    def as_dict(self, item: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.keys, item))
+
+
+def _scene_rows():
+    for scene in SCENES:
+        weight = 1 / len(SCENES) / len(scene["examples"]) / len(scene["mood"])
+        for example in scene["examples"]:
+            for mood in scene["mood"]:
+                yield (scene["type"], example, mood, f"{mood}的{example}场景", scene["function"]), weight
+
+
+def _conflict_rows():
+    for conflict in CONFLICTS:
+        weight = (1 / len(CONFLICTS) / len(conflict["examples"]) / len(conflict["resolution"])
+                  / len(CONFLICT_INTENSITIES) / len(CONFLICT_THEMES))
+        for example in conflict["examples"]:
+            for intensity in CONFLICT_INTENSITIES:
+                for resolution in conflict["resolution"]:
+                    for theme in CONFLICT_THEMES:
+                        yield (conflict["type"], example, intensity, resolution, theme), weight
+
+
+# 键顺序与 generate_scene_description / generate_conflict_scene 的输出一致
+SCENE_TABLE = _ItemTable(("type", "location", "mood", "description", "function"),
+                         _scene_rows(), SCENE_CONDITIONS.values())
+CONFLICT_TABLE = _ItemTable(("type", "description", "intensity", "resolution_method", "theme_connection"),
+                            _conflict_rows(), CONFLICT_CONDITIONS.values())
+
+
+class _AtLeastOne:
+    """抽取数量在 counts 范围内均匀分布的条目列表，条件为“至少一个条目满足”
+
+    精确条件抽样：先按 P(k)·(1-(1-p)^k) 抽取数量 k，再按 (1-p)^j·p 抽取第一个满足条件的位置 j；
+    j 之前的条目从不满足条件的池中抽取，j 之后的条目不受限制。
+    """
+
+    def __init__(self, table: _ItemTable, counts: range, mask: int):
+        self.table = table
+        self.full = table.pool(table.all_mask)
+        self.hit = table.pool(mask)
+        self.miss = table.pool(table.all_mask & ~mask)
+        p = self.hit.total / self.full.total
+        self.counts = tuple(counts)
+        self.count_cumulative = list(accumulate(1 - (1 - p) ** k for k in self.counts))
+        self.first_cumulative = {
+            k: list(accumulate((1 - p) ** j * p for j in range(k))) for k in self.counts
+        }
+
+    @staticmethod
+    def _pick(cumulative: List[float], rng) -> int:
+        return min(bisect_right(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
+
+    def draw(self, rng) -> List[Dict[str, str]]:
+        k = self.counts[self._pick(self.count_cumulative, rng)]
+        first = self._pick(self.first_cumulative[k], rng)
+        as_dict = self.table.as_dict
+        items = [as_dict(self.miss.draw(rng)) for _ in range(first)]
+        items.append(as_dict(self.hit.draw(rng)))
+        items.extend(as_dict(self.full.draw(rng)) for _ in range(k - first - 1))
+        return items
+
+
+def _as_values(condition: Condition) -> Tuple[str, ...]:
+    values = (condition,) if isinstance(condition, str) else tuple(condition)
+    if not values:
+        raise ValueError("条件取值不能为空")
+    return values
+
+
+def _narrow(field: str, pool: Sequence[str], condition: Optional[Condition]) -> Tuple[str, ...]:
+    """把候选池收窄到条件允许的取值，出现候选池之外的取值时报错"""
+    if condition is None:
+        return tuple(pool)
+    values = _as_values(condition)
+    allowed = set(pool)
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        raise ValueError(f"{CONSTRAINT_FIELDS[field]}不在候选范围内：{'、'.join(unknown)}")
+    wanted = set(values)
+    return tuple(value for value in pool if value in wanted)
+
+
+def _mask(table: _ItemTable, mapping: Mapping[str, str], conditions: Mapping[str, Condition]) -> int:
+    """各属性条件对应位图的交集（同一属性的多个取值取并集）"""
+    mask = table.all_mask
+    for field, attribute in mapping.items():
+        if conditions.get(field) is None:
+            continue
+        index = table.index[attribute]
+        field_mask = 0
+        for value in _as_values(conditions[field]):
+            if value not in index:
+                raise ValueError(f"{CONSTRAINT_FIELDS[field]}不在候选范围内：{value}")
+            field_mask |= index[value]
+        mask &= field_mask
+    return mask
+
+
+class ChapterConstraints:
+    """预先收窄的抽样池，可反复用于 ChapterGenerator.generate_constrained_design
+
+    每个条件取单个字符串或字符串集合（满足其一即可）。人物表现与模板的条件限制唯一的取值；
+    场景与冲突的各条件作用于同一个条目，设计中至少有一个场景（冲突）同时满足全部对应条件。
+    """
+
+    def __init__(self, roster=None, **conditions: Condition):
+        unknown = [field for field in conditions if field not in CONSTRAINT_FIELDS]
+        if unknown:
+            raise ValueError(f"未知条件：{'、'.join(unknown)}（可用：{'、'.join(CONSTRAINT_FIELDS)}）")
+        self.roster = roster
+        self.conditions = {field: _as_values(value) for field, value in conditions.items() if value is not None}
+        main_pool = roster.main if roster is not None else tuple(c["name"] for c in MAIN_CHARACTERS)
+
+        self.templates = _narrow("template", TEMPLATE_NAMES, conditions.get("template"))
+        self.main_characters = _narrow("main_character", main_pool, conditions.get("main_character"))
+        self.emotions = _narrow("emotion", EMOTIONS, conditions.get("emotion"))
+        self.key_actions = _narrow("key_action", KEY_ACTIONS, conditions.get("key_action"))
+        self.growth_states = _narrow("growth", GROWTH_STATES, conditions.get("growth"))
+        self.relationship_changes = _narrow("relationship_change", RELATIONSHIP_CHANGES,
+                                            conditions.get("relationship_change"))
+
+        scene_mask = _mask(SCENE_TABLE, SCENE_CONDITIONS, conditions)
+        if not scene_mask:
+            raise ValueError(f"场景条件无法同时满足：{self._describe(SCENE_CONDITIONS)}")
+        conflict_mask = _mask(CONFLICT_TABLE, CONFLICT_CONDITIONS, conditions)
+        if not conflict_mask:
+            raise ValueError(f"冲突条件无法同时满足：{self._describe(CONFLICT_CONDITIONS)}")
+        self.scenes = _AtLeastOne(SCENE_TABLE, SCENE_COUNTS, scene_mask)
+        self.conflicts = _AtLeastOne(CONFLICT_TABLE, CONFLICT_COUNTS, conflict_mask)
+
+    def _describe(self, mapping: Mapping[str, str]) -> str:
+        return "，".join(f"{CONSTRAINT_FIELDS[field]}={'/'.join(self.conditions[field])}"
+                        for field in mapping if field in self.conditions)
+
+    def draw_scenes(self, rng) -> List[Dict[str, str]]:
+        """抽取场景列表（至少一个满足场景条件）"""
+        return self.scenes.draw(rng)
+
+    def draw_conflicts(self, rng) -> List[Dict[str, str]]:
+        """抽取冲突列表（至少一个满足冲突条件）"""
+        return self.conflicts.draw(rng)
+
+    def matches(self, design: Mapping) -> bool:
+        """判断一份设计是否满足全部条件（用于校验与过滤已有结果）"""
+        conditions = self.conditions
+        performance = design["character_performance"]
+        checks = (
+            ("template", design["metadata"]["template_used"]),
+            ("main_character", design["main_character"]),
+            ("emotion", performance["emotion"]),
+            ("key_action", performance["key_action"]),
+            ("growth", performance["growth"]),
+            ("relationship_change", performance["relationship_change"]),
+        )
+        if any(field in conditions and value not in conditions[field] for field, value in checks):
+            return False
+        for items, mapping in ((design["scenes"], SCENE_CONDITIONS), (design["conflicts"], CONFLICT_CONDITIONS)):
+            wanted = [(attribute, conditions[field]) for field, attribute in mapping.items() if field in conditions]
+            if wanted and not any(all(item[attribute] in values for attribute, values in wanted) for item in items):
+                return False
+        return True
@@ -5,191 +5,397 @@
 用于随机生成章节设计片段，供创作参考使用
 """
 
+import argparse
+import itertools
+import math
 import random
 import json
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, TextIO, Tuple
 
-class ChapterGenerator:
-    """章节生成器"""
-    
-    def __init__(self):
-        self.templates = self._load_templates()
-        self.characters = self._load_characters()
-        self.scenes = self._load_scenes()
-        self.conflicts = self._load_conflicts()
-        
-    def _load_templates(self) -> List[Dict]:
-        """加载章节模板"""
-        return [
-            {
-                "name": "经典四段式",
-                "structure": ["起（开端）", "承（发展）", "转（高潮）", "合（结局）"],
-                "description": "中国传统叙事的经典结构"
-            },
-            {
-                "name": "多重障碍式",
-                "structure": ["障碍一", "障碍二", "障碍三", "最终解决"],
-                "description": "通过连续障碍推动情节发展"
-            },
-            {
-                "name": "悬念推理式",
-                "structure": ["谜题呈现", "调查推理", "真相大白"],
-                "description": "以悬念和推理为主线"
-            },
-            {
-                "name": "人性考验式",
-                "structure": ["考验设置", "欲望挣扎", "考验总结"],
-                "description": "聚焦人性弱点的考验"
-            }
+from render_chapter import RENDERERS, render_design, write_designs
+
+# 人物技能的脚本目录，--roster 时从中导入人物资料库
+CHARACTER_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "journey-to-the-west-character" / "scripts"
+
+def _freeze(value: Any) -> Any:
+    """递归冻结目录数据：dict 转为只读映射，list 转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+# ---------------------------------------------------------------------------
+# 共享目录数据：模块级只读结构，所有生成器实例共用，生成过程中从不修改
+# ---------------------------------------------------------------------------
+
+TEMPLATES: Tuple[Mapping, ...] = _freeze([
+    {
+        "name": "经典四段式",
+        "structure": ["起（开端）", "承（发展）", "转（高潮）", "合（结局）"],
+        "description": "中国传统叙事的经典结构"
+    },
+    {
+        "name": "多重障碍式",
+        "structure": ["障碍一", "障碍二", "障碍三", "最终解决"],
+        "description": "通过连续障碍推动情节发展"
+    },
+    {
+        "name": "悬念推理式",
+        "structure": ["谜题呈现", "调查推理", "真相大白"],
+        "description": "以悬念和推理为主线"
+    },
+    {
+        "name": "人性考验式",
+        "structure": ["考验设置", "欲望挣扎", "考验总结"],
+        "description": "聚焦人性弱点的考验"
+    }
+])
+
+CHARACTERS: Tuple[Mapping, ...] = _freeze([
+    {
+        "name": "孙悟空",
+        "type": "主角",
+        "traits": ["机智", "勇敢", "叛逆", "忠诚"],
+        "abilities": ["七十二变", "筋斗云", "火眼金睛"],
+        "symbolism": "自由精神，反抗权威"
+    },
+    {
+        "name": "唐僧",
+        "type": "主角",
+        "traits": ["仁慈", "坚定", "迂腐", "慈悲"],
+        "abilities": ["念紧箍咒", "讲经说法"],
+        "symbolism": "向善求真，修行意志"
+    },
+    {
+        "name": "猪八戒",
+        "type": "主角",
+        "traits": ["贪吃", "好色", "懒惰", "幽默"],
+        "abilities": ["三十六变", "九齿钉耙"],
+        "symbolism": "人性欲望，世俗追求"
+    },
+    {
+        "name": "沙僧",
+        "type": "主角",
+        "traits": ["忠诚", "稳重", "沉默", "可靠"],
+        "abilities": ["降妖宝杖", "负重前行"],
+        "symbolism": "坚忍耐劳，平凡坚持"
+    },
+    {
+        "name": "白龙马",
+        "type": "主角",
+        "traits": ["忠诚", "隐忍", "勇敢", "赎罪"],
+        "abilities": ["变化人形", "日行千里"],
+        "symbolism": "赎罪重生，默默奉献"
+    }
+])
+
+SCENES: Tuple[Mapping, ...] = _freeze([
+    {
+        "type": "自然景观",
+        "examples": ["高山", "大河", "森林", "沙漠", "火焰山", "流沙河"],
+        "mood": ["险峻", "壮丽", "神秘", "恐怖"],
+        "function": "制造自然障碍，烘托氛围"
+    },
+    {
+        "type": "人间社会",
+        "examples": ["村庄", "城镇", "王国", "寺庙", "道观"],
+        "mood": ["繁华", "衰败", "祥和", "混乱"],
+        "function": "反映社会现实，制造人际冲突"
+    },
+    {
+        "type": "神魔世界",
+        "examples": ["天宫", "地府", "龙宫", "妖洞", "仙境"],
+        "mood": ["神圣", "阴森", "奇幻", "诡异"],
+        "function": "展现神话体系，制造超自然冲突"
+    },
+    {
+        "type": "心理空间",
+        "examples": ["梦境", "幻觉", "回忆", "内心独白"],
+        "mood": ["朦胧", "扭曲", "深刻", "真实"],
+        "function": "揭示人物内心，深化主题"
+    }
+])
+
+CONFLICTS: Tuple[Mapping, ...] = _freeze([
+    {
+        "type": "人与自然",
+        "examples": ["战胜自然灾害", "克服地理障碍", "适应恶劣环境"],
+        "resolution": ["智慧应对", "技术进步", "神仙帮助"]
+    },
+    {
+        "type": "人与社会",
+        "examples": ["反抗不公制度", "解决社会矛盾", "建立和谐关系"],
+        "resolution": ["改革制度", "调解矛盾", "教化民众"]
+    },
+    {
+        "type": "人与神魔",
+        "examples": ["降妖除魔", "神仙考验", "佛法点化"],
+        "resolution": ["武力战胜", "智慧破解", "觉悟超越"]
+    },
+    {
+        "type": "人与自我",
+        "examples": ["克服欲望", "战胜恐惧", "认识真我", "实现成长"],
+        "resolution": ["自我反思", "修行实践", "他人帮助", "最终觉悟"]
+    }
+])
+
+TITLE_FIRST_LINES: Tuple[str, ...] = (
+    "灵根育孕源流出", "心性修持大道生", "悟彻菩提真妙理",
+    "四海千山皆拱伏", "官封弼马心何足", "乱蟠桃大圣偷丹",
+    "八卦炉中逃大圣", "我佛造经传极乐", "观音奉旨上长安",
+    "玄奘秉诚建大会", "陷虎穴金星解厄", "心猿归正六贼无踪",
+    "蛇盘山诸神暗佑", "观音院僧谋宝贝", "孙行者大闹黑风山",
+    "高老庄大圣除魔", "云栈洞悟空收八戒", "黄风岭唐僧有难",
+    "护法设庄留大圣", "八戒大战流沙河", "尸魔三戏唐三藏"
+)
+
+TITLE_SECOND_LINES: Tuple[str, ...] = (
+    "心性修持大道生", "断魔归本合元神", "九幽十类尽除名",
+    "名注齐天意未宁", "反天宫诸神捉怪", "小圣施威降大圣",
+    "五行山下定心猿", "观音奉旨上长安", "唐太宗地府还魂",
+    "观音显像化金蝉", "双叉岭伯钦留僧", "六贼无踪心猿归",
+    "鹰愁涧意马收缰", "黑风山怪窃袈裟", "观世音收伏熊罴怪",
+    "浮屠山玄奘受心经", "须弥灵吉定风魔", "木叉奉法收悟净",
+    "圣僧恨逐美猴王"
+)
+
+EMOTIONS: Tuple[str, ...] = ("愤怒", "悲伤", "喜悦", "恐惧", "惊讶", "厌恶", "期待", "信任")
+
+KEY_ACTIONS: Tuple[str, ...] = (
+    "勇敢战斗", "机智应对", "坚持原则", "克服困难",
+    "帮助他人", "自我反省", "学习成长", "承担责任"
+)
+
+GROWTH_STATES: Tuple[str, ...] = ("明显成长", "有所进步", "保持稳定", "面临挑战")
+
+RELATIONSHIP_CHANGES: Tuple[str, ...] = ("加强信任", "产生矛盾", "深化理解", "需要磨合")
+
+CONFLICT_INTENSITIES: Tuple[str, ...] = ("轻微", "中等", "激烈", "生死攸关")
+
+CONFLICT_THEMES: Tuple[str, ...] = ("成长考验", "人性弱点", "智慧挑战", "团队协作")
+
+STAGE_CONTENT: Mapping[str, Tuple[str, ...]] = _freeze({
+    "起（开端）": ["引入主要人物", "设定故事背景", "提出核心冲突", "明确章节目标"],
+    "承（发展）": ["矛盾逐渐升级", "设置更多障碍", "人物关系发展", "悬念不断增加"],
+    "转（高潮）": ["冲突达到顶点", "情感最激烈处", "情节重大转折", "问题最为严重"],
+    "合（结局）": ["问题得到解决", "人物状态变化", "为后续铺垫", "情感余韵留存"],
+    "障碍一": ["第一个困难出现", "初步尝试解决", "遇到挫折失败", "需要调整策略"],
+    "障碍二": ["更大困难出现", "运用智慧应对", "取得部分进展", "但仍未完全解决"],
+    "障碍三": ["最大障碍出现", "需要协作解决", "关键突破点", "彻底克服困难"],
+    "最终解决": ["所有问题解决", "获得深刻教训", "人物明显成长", "主题得到深化"],
+    "谜题呈现": ["神秘事件发生", "初步线索出现", "人物感到困惑", "激发探究欲望"],
+    "调查推理": ["收集更多线索", "进行逻辑推理", "可能有误判断", "逐渐接近真相"],
+    "真相大白": ["关键证据发现", "所有谜团解开", "深层动机揭示", "主题升华体现"],
+    "考验设置": ["人性诱惑出现", "考验规则说明", "人物初始反应", "读者预期形成"],
+    "欲望挣扎": ["欲望理性斗争", "关键选择时刻", "行为后果显现", "心理微妙变化"],
+    "考验总结": ["考验结果评估", "提炼深刻教训", "人物成长体现", "主题深化表达"]
+})
+
+DEFAULT_STAGE_CONTENT: Tuple[str, ...] = ("情节发展", "人物互动", "冲突解决", "主题表达")
+
+KEY_ELEMENTS: Tuple[str, ...] = (
+    "人物对话", "心理描写", "环境烘托", "动作展现",
+    "悬念设置", "情感表达", "冲突升级", "问题解决",
+    "主题呼应", "文化隐喻", "成长体现", "关系变化"
+)
+
+ARTISTIC_FEATURES: Tuple[Mapping, ...] = _freeze([
+    {
+        "type": "叙事视角",
+        "techniques": ["全知视角", "有限视角", "多重视角", "视角转换"],
+        "effect": "增强叙事层次，制造悬念效果"
+    },
+    {
+        "type": "修辞手法",
+        "techniques": ["夸张", "对比", "象征", "讽刺", "反复"],
+        "effect": "增强语言表现力，深化主题内涵"
+    },
+    {
+        "type": "情节设计",
+        "techniques": ["悬念设置", "伏笔照应", "情节反转", "节奏控制"],
+        "effect": "增强戏剧张力，保持读者兴趣"
+    },
+    {
+        "type": "人物刻画",
+        "techniques": ["外貌描写", "动作展现", "心理揭示", "对话艺术"],
+        "effect": "塑造立体人物，增强情感共鸣"
+    }
+])
+
+THEMES: Tuple[Mapping, ...] = _freeze([
+    {
+        "level": "表层主题",
+        "name": "取经冒险",
+        "connection": "通过具体行动展现取经之路的艰难",
+        "significance": "体现人类对真理的不懈追求"
+    },
+    {
+        "level": "中层主题",
+        "name": "修行历练",
+        "connection": "通过磨难考验展现心性成长过程",
+        "significance": "揭示修行对人格完善的积极作用"
+    },
+    {
+        "level": "深层主题",
+        "name": "明心见性",
+        "connection": "通过内心斗争展现觉悟的可能",
+        "significance": "探索人性向神性升华的路径"
+    },
+    {
+        "level": "文化主题",
+        "name": "三教合一",
+        "connection": "通过文化元素展现传统思想的融合",
+        "significance": "体现中国文化包容并蓄的特点"
+    }
+])
+
+THEMES_OVERALL_CONNECTION = "通过不同层面的主题交织，构建立体的叙事意义网络"
+
+ADAPTATIONS: Tuple[Mapping, ...] = _freeze([
+    {
+        "medium": "影视改编",
+        "suggestions": [
+            "注重视觉奇观与情感共鸣的结合",
+            "合理压缩章节，突出核心情节",
+            "运用现代特效技术增强神话色彩",
+            "注意角色形象的统一与深化"
         ]
-    
-    def _load_characters(self) -> List[Dict]:
-        """加载人物数据"""
-        return [
-            {
-                "name": "孙悟空",
-                "type": "主角",
-                "traits": ["机智", "勇敢", "叛逆", "忠诚"],
-                "abilities": ["七十二变", "筋斗云", "火眼金睛"],
-                "symbolism": "自由精神，反抗权威"
-            },
-            {
-                "name": "唐僧",
-                "type": "主角",
-                "traits": ["仁慈", "坚定", "迂腐", "慈悲"],
-                "abilities": ["念紧箍咒", "讲经说法"],
-                "symbolism": "向善求真，修行意志"
-            },
-            {
-                "name": "猪八戒",
-                "type": "主角",
-                "traits": ["贪吃", "好色", "懒惰", "幽默"],
-                "abilities": ["三十六变", "九齿钉耙"],
-                "symbolism": "人性欲望，世俗追求"
-            },
-            {
-                "name": "沙僧",
-                "type": "主角",
-                "traits": ["忠诚", "稳重", "沉默", "可靠"],
-                "abilities": ["降妖宝杖", "负重前行"],
-                "symbolism": "坚忍耐劳，平凡坚持"
-            },
-            {
-                "name": "白龙马",
-                "type": "主角",
-                "traits": ["忠诚", "隐忍", "勇敢", "赎罪"],
-                "abilities": ["变化人形", "日行千里"],
-                "symbolism": "赎罪重生，默默奉献"
-            }
+    },
+    {
+        "medium": "文学改编",
+        "suggestions": [
+            "保持章回体语言风格特色",
+            "深入挖掘人物内心世界",
+            "适当加入现代思想元素",
+            "注意叙事节奏的控制"
         ]
-    
-    def _load_scenes(self) -> List[Dict]:
-        """加载场景数据"""
-        return [
-            {
-                "type": "自然景观",
-                "examples": ["高山", "大河", "森林", "沙漠", "火焰山", "流沙河"],
-                "mood": ["险峻", "壮丽", "神秘", "恐怖"],
-                "function": "制造自然障碍，烘托氛围"
-            },
-            {
-                "type": "人间社会",
-                "examples": ["村庄", "城镇", "王国", "寺庙", "道观"],
-                "mood": ["繁华", "衰败", "祥和", "混乱"],
-                "function": "反映社会现实，制造人际冲突"
-            },
-            {
-                "type": "神魔世界",
-                "examples": ["天宫", "地府", "龙宫", "妖洞", "仙境"],
-                "mood": ["神圣", "阴森", "奇幻", "诡异"],
-                "function": "展现神话体系，制造超自然冲突"
-            },
-            {
-                "type": "心理空间",
-                "examples": ["梦境", "幻觉", "回忆", "内心独白"],
-                "mood": ["朦胧", "扭曲", "深刻", "真实"],
-                "function": "揭示人物内心，深化主题"
-            }
+    },
+    {
+        "medium": "游戏改编",
+        "suggestions": [
+            "将八十一难设计为游戏关卡",
+            "合理设计角色技能与成长系统",
+            "注重游戏性与文化性的平衡",
+            "构建完整的西游游戏世界观"
         ]
-    
-    def _load_conflicts(self) -> List[Dict]:
-        """加载冲突类型"""
-        return [
-            {
-                "type": "人与自然",
-                "examples": ["战胜自然灾害", "克服地理障碍", "适应恶劣环境"],
-                "resolution": ["智慧应对", "技术进步", "神仙帮助"]
-            },
-            {
-                "type": "人与社会",
-                "examples": ["反抗不公制度", "解决社会矛盾", "建立和谐关系"],
-                "resolution": ["改革制度", "调解矛盾", "教化民众"]
-            },
-            {
-                "type": "人与神魔",
-                "examples": ["降妖除魔", "神仙考验", "佛法点化"],
-                "resolution": ["武力战胜", "智慧破解", "觉悟超越"]
-            },
-            {
-                "type": "人与自我",
-                "examples": ["克服欲望", "战胜恐惧", "认识真我", "实现成长"],
-                "resolution": ["自我反思", "修行实践", "他人帮助", "最终觉悟"]
-            }
+    },
+    {
+        "medium": "教育应用",
+        "suggestions": [
+            "提炼章节的教育价值与启示",
+            "设计互动学习活动与讨论",
+            "结合现代教育理念与方法",
+            "注重文化传承与创新结合"
         ]
+    }
+])
+
+CREATIVE_NOTES: Tuple[str, ...] = (
+    "注意情节发展的逻辑性与连贯性",
+    "注重人物情感的细腻表达",
+    "保持中国古典文学的语言特色",
+    "挖掘章节的深层文化内涵"
+)
+
+# 预计算的派生索引
+TEMPLATE_NAMES: Tuple[str, ...] = tuple(template["name"] for template in TEMPLATES)
+TEMPLATES_BY_NAME: Mapping[str, Mapping] = MappingProxyType(
+    {template["name"]: template for template in TEMPLATES}
+)
+MAIN_CHARACTERS: Tuple[Mapping, ...] = tuple(c for c in CHARACTERS if c["type"] == "主角")
+# 上联与下联相同时的候选下联（排除重复句）
+TITLE_SECOND_LINES_EXCLUDING: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    first: tuple(line for line in TITLE_SECOND_LINES if line != first)
+    for first in TITLE_FIRST_LINES if first in TITLE_SECOND_LINES
+})
+
+# 判断两份设计是否“实质相同”时参与比较的字段（不含生成时间、设计编号等元数据）
+FINGERPRINT_FIELDS: Tuple[str, ...] = (
+    "chapter_title", "main_character", "structure_plan", "character_performance", "scenes",
+    "conflicts", "artistic_features", "thematic_connections", "adaptation_suggestions",
+)
+
+def _ordered_samples(n: int, sizes: range) -> int:
+    """从n项中有序抽取k项（k取自sizes）的方案总数，对应 rng.sample 的全部可能结果"""
+    return sum(math.perm(n, k) for k in sizes)
+
+@lru_cache(maxsize=None)
+def duration_splits(stage_count: int) -> Tuple[Tuple[int, ...], ...]:
+    """各阶段篇幅在20-35间取值并归一化为百分比后的全部不同结果（按字典序）"""
+    splits = set()
+    for durations in itertools.product(range(20, 36), repeat=stage_count):
+        total = sum(durations)
+        splits.add(tuple(round(d / total * 100) for d in durations))
+    return tuple(sorted(splits))
+
+def _now_isoformat() -> str:
+    """当前时间的ISO格式字符串"""
+    return datetime.now().isoformat()
+
+class ChapterGenerator:
+    """章节生成器"""
+    
+    def __init__(self, rng: Optional[random.Random] = None,
+                 clock: Optional[Callable[[], str]] = None, seed: Optional[int] = None,
+                 roster: Optional[Any] = None):
+        # rng 与 seed 均为空时沿用全局 random 模块；并行生成时每个工作进程传入独立的 random.Random
+        if seed is not None:
+            if rng is not None:
+                raise ValueError("rng 与 seed 只能指定其一")
+            rng = random.Random(seed)
+        self.rng = rng if rng is not None else random
+        self.clock = clock if clock is not None else _now_isoformat
+        # 人物名册（含 main、supporting 两个姓名元组，见 character_store.Roster）；
+        # 为空时主角取自内置的取经五人，且不生成配角
+        self.roster = roster
+        # 目录数据为模块级只读结构，实例之间共享，不再逐实例重建
+        self.templates = TEMPLATES
+        self.characters = CHARACTERS
+        self.scenes = SCENES
+        self.conflicts = CONFLICTS
+    
+    def _fork_rng(self, seed: Any) -> random.Random:
+        """以 seed 派生独立的随机数流，与本生成器的 rng 同类
+
+        rng 提供 fork(seed) 时（如 WeightedRandom）由其派生，沿用同一组权重表；否则为 random.Random(seed)。
+        """
+        fork = getattr(self.rng, "fork", None)
+        return fork(seed) if fork is not None else random.Random(seed)
     
     def generate_chapter_title(self) -> str:
         """生成章回标题"""
-        first_lines = [
-            "灵根育孕源流出", "心性修持大道生", "悟彻菩提真妙理",
-            "四海千山皆拱伏", "官封弼马心何足", "乱蟠桃大圣偷丹",
-            "八卦炉中逃大圣", "我佛造经传极乐", "观音奉旨上长安",
-            "玄奘秉诚建大会", "陷虎穴金星解厄", "心猿归正六贼无踪",
-            "蛇盘山诸神暗佑", "观音院僧谋宝贝", "孙行者大闹黑风山",
-            "高老庄大圣除魔", "云栈洞悟空收八戒", "黄风岭唐僧有难",
-            "护法设庄留大圣", "八戒大战流沙河", "尸魔三戏唐三藏"
-        ]
-        
-        second_lines = [
-            "心性修持大道生", "断魔归本合元神", "九幽十类尽除名",
-            "名注齐天意未宁", "反天宫诸神捉怪", "小圣施威降大圣",
-            "五行山下定心猿", "观音奉旨上长安", "唐太宗地府还魂",
-            "观音显像化金蝉", "双叉岭伯钦留僧", "六贼无踪心猿归",
-            "鹰愁涧意马收缰", "黑风山怪窃袈裟", "观世音收伏熊罴怪",
-            "浮屠山玄奘受心经", "须弥灵吉定风魔", "木叉奉法收悟净",
-            "圣僧恨逐美猴王"
-        ]
-        
-        first = random.choice(first_lines)
-        second = random.choice(second_lines)
+        first = self.rng.choice(TITLE_FIRST_LINES)
+        second = self.rng.choice(TITLE_SECOND_LINES)
         
         # 确保上下联不重复且有一定关联性
         if first == second:
-            second = random.choice([line for line in second_lines if line != first])
+            second = self.rng.choice(TITLE_SECOND_LINES_EXCLUDING[first])
         
         return f"{first} {second}"
     
-    def generate_character_performance(self, character: Dict) -> Dict:
+    def generate_character_performance(self, character: Mapping) -> Dict:
         """生成人物表现"""
-        emotions = ["愤怒", "悲伤", "喜悦", "恐惧", "惊讶", "厌恶", "期待", "信任"]
-        actions = [
-            "勇敢战斗", "机智应对", "坚持原则", "克服困难",
-            "帮助他人", "自我反省", "学习成长", "承担责任"
-        ]
-        
+        choice = self.rng.choice
         return {
             "character": character["name"],
-            "emotion": random.choice(emotions),
-            "key_action": random.choice(actions),
-            "growth": random.choice(["明显成长", "有所进步", "保持稳定", "面临挑战"]),
-            "relationship_change": random.choice(["加强信任", "产生矛盾", "深化理解", "需要磨合"])
+            "emotion": choice(EMOTIONS),
+            "key_action": choice(KEY_ACTIONS),
+            "growth": choice(GROWTH_STATES),
+            "relationship_change": choice(RELATIONSHIP_CHANGES)
         }
     
     def generate_scene_description(self) -> Dict:
         """生成场景描述"""
-        scene_type = random.choice(self.scenes)
-        example = random.choice(scene_type["examples"])
-        mood = random.choice(scene_type["mood"])
+        choice = self.rng.choice
+        scene_type = choice(self.scenes)
+        example = choice(scene_type["examples"])
+        mood = choice(scene_type["mood"])
         
         return {
             "type": scene_type["type"],
@@ -201,30 +407,29 @@ class ChapterGenerator:
     
     def generate_conflict_scene(self) -> Dict:
         """生成冲突场景"""
-        conflict_type = random.choice(self.conflicts)
-        example = random.choice(conflict_type["examples"])
-        resolution = random.choice(conflict_type["resolution"])
+        choice = self.rng.choice
+        conflict_type = choice(self.conflicts)
+        example = choice(conflict_type["examples"])
+        resolution = choice(conflict_type["resolution"])
         
         return {
             "type": conflict_type["type"],
             "description": example,
-            "intensity": random.choice(["轻微", "中等", "激烈", "生死攸关"]),
+            "intensity": choice(CONFLICT_INTENSITIES),
             "resolution_method": resolution,
-            "theme_connection": random.choice([
-                "成长考验", "人性弱点", "智慧挑战", "团队协作"
-            ])
+            "theme_connection": choice(CONFLICT_THEMES)
         }
     
     def generate_structure_plan(self, template_name: str) -> List[Dict]:
         """生成结构计划"""
-        template = next((t for t in self.templates if t["name"] == template_name), self.templates[0])
+        template = TEMPLATES_BY_NAME.get(template_name, self.templates[0])
         
         structure_plan = []
         for stage in template["structure"]:
             structure_plan.append({
                 "stage": stage,
                 "content": self._generate_stage_content(stage),
-                "duration_percentage": random.randint(20, 35),
+                "duration_percentage": self.rng.randint(20, 35),
                 "key_elements": self._generate_key_elements()
             })
         
@@ -237,267 +442,298 @@ class ChapterGenerator:
     
     def _generate_stage_content(self, stage: str) -> str:
         """生成阶段内容"""
-        content_map = {
-            "起（开端）": ["引入主要人物", "设定故事背景", "提出核心冲突", "明确章节目标"],
-            "承（发展）": ["矛盾逐渐升级", "设置更多障碍", "人物关系发展", "悬念不断增加"],
-            "转（高潮）": ["冲突达到顶点", "情感最激烈处", "情节重大转折", "问题最为严重"],
-            "合（结局）": ["问题得到解决", "人物状态变化", "为后续铺垫", "情感余韵留存"],
-            "障碍一": ["第一个困难出现", "初步尝试解决", "遇到挫折失败", "需要调整策略"],
-            "障碍二": ["更大困难出现", "运用智慧应对", "取得部分进展", "但仍未完全解决"],
-            "障碍三": ["最大障碍出现", "需要协作解决", "关键突破点", "彻底克服困难"],
-            "最终解决": ["所有问题解决", "获得深刻教训", "人物明显成长", "主题得到深化"],
-            "谜题呈现": ["神秘事件发生", "初步线索出现", "人物感到困惑", "激发探究欲望"],
-            "调查推理": ["收集更多线索", "进行逻辑推理", "可能有误判断", "逐渐接近真相"],
-            "真相大白": ["关键证据发现", "所有谜团解开", "深层动机揭示", "主题升华体现"],
-            "考验设置": ["人性诱惑出现", "考验规则说明", "人物初始反应", "读者预期形成"],
-            "欲望挣扎": ["欲望理性斗争", "关键选择时刻", "行为后果显现", "心理微妙变化"],
-            "考验总结": ["考验结果评估", "提炼深刻教训", "人物成长体现", "主题深化表达"]
-        }
-        
-        return random.choice(content_map.get(stage, ["情节发展", "人物互动", "冲突解决", "主题表达"]))
+        return self.rng.choice(STAGE_CONTENT.get(stage, DEFAULT_STAGE_CONTENT))
     
     def _generate_key_elements(self) -> List[str]:
         """生成关键元素"""
-        elements = [
-            "人物对话", "心理描写", "环境烘托", "动作展现",
-            "悬念设置", "情感表达", "冲突升级", "问题解决",
-            "主题呼应", "文化隐喻", "成长体现", "关系变化"
-        ]
-        
-        return random.sample(elements, k=random.randint(3, 6))
+        return self.rng.sample(KEY_ELEMENTS, k=self.rng.randint(3, 6))
     
     def generate_artistic_features(self) -> List[Dict]:
-        """生成艺术特色"""
-        features = [
-            {
-                "type": "叙事视角",
-                "techniques": ["全知视角", "有限视角", "多重视角", "视角转换"],
-                "effect": "增强叙事层次，制造悬念效果"
-            },
-            {
-                "type": "修辞手法",
-                "techniques": ["夸张", "对比", "象征", "讽刺", "反复"],
-                "effect": "增强语言表现力，深化主题内涵"
-            },
-            {
-                "type": "情节设计",
-                "techniques": ["悬念设置", "伏笔照应", "情节反转", "节奏控制"],
-                "effect": "增强戏剧张力，保持读者兴趣"
-            },
+        """生成艺术特色（返回新字典，不修改共享目录；只读的元组字段直接共享）"""
+        sample = self.rng.sample
+        randint = self.rng.randint
+        selected_features = sample(ARTISTIC_FEATURES, k=randint(2, 4))
+        return [
             {
-                "type": "人物刻画",
-                "techniques": ["外貌描写", "动作展现", "心理揭示", "对话艺术"],
-                "effect": "塑造立体人物，增强情感共鸣"
+                "type": feature["type"],
+                "techniques": feature["techniques"],
+                "effect": feature["effect"],
+                "selected_techniques": sample(feature["techniques"], k=randint(1, 3))
             }
+            for feature in selected_features
         ]
-        
-        selected_features = random.sample(features, k=random.randint(2, 4))
-        for feature in selected_features:
-            feature["selected_techniques"] = random.sample(
-                feature["techniques"], 
-                k=random.randint(1, 3)
-            )
-        
-        return selected_features
     
     def generate_thematic_connections(self) -> Dict:
         """生成主题关联"""
-        themes = [
-            {
-                "level": "表层主题",
-                "name": "取经冒险",
-                "connection": "通过具体行动展现取经之路的艰难",
-                "significance": "体现人类对真理的不懈追求"
-            },
-            {
-                "level": "中层主题",
-                "name": "修行历练",
-                "connection": "通过磨难考验展现心性成长过程",
-                "significance": "揭示修行对人格完善的积极作用"
-            },
-            {
-                "level": "深层主题",
-                "name": "明心见性",
-                "connection": "通过内心斗争展现觉悟的可能",
-                "significance": "探索人性向神性升华的路径"
-            },
-            {
-                "level": "文化主题",
-                "name": "三教合一",
-                "connection": "通过文化元素展现传统思想的融合",
-                "significance": "体现中国文化包容并蓄的特点"
-            }
-        ]
-        
-        selected_themes = random.sample(themes, k=random.randint(2, 4))
+        selected_themes = self.rng.sample(THEMES, k=self.rng.randint(2, 4))
         return {
-            "themes": selected_themes,
-            "overall_connection": "通过不同层面的主题交织，构建立体的叙事意义网络"
+            "themes": [dict(theme) for theme in selected_themes],
+            "overall_connection": THEMES_OVERALL_CONNECTION
         }
     
     def generate_adaptation_suggestions(self) -> List[Dict]:
         """生成改编建议"""
-        adaptations = [
-            {
-                "medium": "影视改编",
-                "suggestions": [
-                    "注重视觉奇观与情感共鸣的结合",
-                    "合理压缩章节，突出核心情节",
-                    "运用现代特效技术增强神话色彩",
-                    "注意角色形象的统一与深化"
-                ]
-            },
-            {
-                "medium": "文学改编",
-                "suggestions": [
-                    "保持章回体语言风格特色",
-                    "深入挖掘人物内心世界",
-                    "适当加入现代思想元素",
-                    "注意叙事节奏的控制"
-                ]
-            },
-            {
-                "medium": "游戏改编",
-                "suggestions": [
-                    "将八十一难设计为游戏关卡",
-                    "合理设计角色技能与成长系统",
-                    "注重游戏性与文化性的平衡",
-                    "构建完整的西游游戏世界观"
-                ]
-            },
-            {
-                "medium": "教育应用",
-                "suggestions": [
-                    "提炼章节的教育价值与启示",
-                    "设计互动学习活动与讨论",
-                    "结合现代教育理念与方法",
-                    "注重文化传承与创新结合"
-                ]
-            }
+        selected = self.rng.sample(ADAPTATIONS, k=self.rng.randint(2, 4))
+        return [
+            {"medium": adaptation["medium"], "suggestions": adaptation["suggestions"]}
+            for adaptation in selected
         ]
-        
-        return random.sample(adaptations, k=random.randint(2, 4))
     
-    def generate_complete_chapter_design(self, template_name: Optional[str] = None) -> Dict:
-        """生成完整章节设计"""
+    def generate_complete_chapter_design(self, template_name: Optional[str] = None,
+                                         seed: Optional[int] = None) -> Dict:
+        """生成完整章节设计
+
+        指定 seed 时使用独立的随机数流，结果只由（seed, 模板, clock 的返回值）决定，
+        不影响本生成器自身的随机状态。
+        """
+        if seed is not None:
+            return type(self)(rng=self._fork_rng(seed), clock=self.clock,
+                              roster=self.roster).generate_complete_chapter_design(template_name)
+        rng = self.rng
         if template_name is None:
-            template_name = random.choice(self.templates)["name"]
+            template_name = rng.choice(TEMPLATE_NAMES)
         
-        main_character = random.choice([c for c in self.characters if c["type"] == "主角"])
+        if self.roster is None:
+            main_character = rng.choice(MAIN_CHARACTERS)
+        else:
+            main_character = {"name": rng.choice(self.roster.main)}
+            supporting = self._draw_supporting_characters(main_character["name"])
         
-        return {
+        design = {
             "metadata": {
-                "generated_at": datetime.now().isoformat(),
+                "generated_at": self.clock(),
                 "template_used": template_name,
-                "chapter_number": random.randint(1, 100),
-                "design_id": f"design_{random.randint(1000, 9999)}"
+                "chapter_number": rng.randint(1, 100),
+                "design_id": f"design_{rng.randint(1000, 9999)}"
             },
             "chapter_title": self.generate_chapter_title(),
             "main_character": main_character["name"],
             "structure_plan": self.generate_structure_plan(template_name),
             "character_performance": self.generate_character_performance(main_character),
-            "scenes": [self.generate_scene_description() for _ in range(random.randint(2, 4))],
-            "conflicts": [self.generate_conflict_scene() for _ in range(random.randint(1, 3))],
+            "scenes": [self.generate_scene_description() for _ in range(rng.randint(2, 4))],
+            "conflicts": [self.generate_conflict_scene() for _ in range(rng.randint(1, 3))],
             "artistic_features": self.generate_artistic_features(),
             "thematic_connections": self.generate_thematic_connections(),
             "adaptation_suggestions": self.generate_adaptation_suggestions(),
-            "creative_notes": [
-                "注意情节发展的逻辑性与连贯性",
-                "注重人物情感的细腻表达",
-                "保持中国古典文学的语言特色",
-                "挖掘章节的深层文化内涵"
-            ]
+            "creative_notes": CREATIVE_NOTES
         }
-
-def print_chapter_design(design: Dict, format_type: str = "text"):
-    """打印章节设计"""
-    if format_type == "json":
-        print(json.dumps(design, ensure_ascii=False, indent=2))
-        return
-    
-    # 文本格式输出
-    print("=" * 80)
-    print("《西游记》章节设计生成结果")
-    print("=" * 80)
-    
-    print(f"\n📖 章节标题：{design['chapter_title']}")
-    print(f"🎭 主要人物：{design['main_character']}")
-    print(f"🏛️ 结构模板：{design['metadata']['template_used']}")
-    print(f"🆔 设计编号：{design['metadata']['design_id']}")
+        if self.roster is not None:
+            design["supporting_characters"] = supporting
+        return design
     
-    print(f"\n{'📊 结构规划':-^40}")
-    for stage in design["structure_plan"]:
-        print(f"  {stage['stage']} ({stage['duration_percentage']}%)")
-        print(f"    内容：{stage['content']}")
-        print(f"    关键元素：{', '.join(stage['key_elements'])}")
-    
-    print(f"\n{'🎭 人物表现':-^40}")
-    perf = design["character_performance"]
-    print(f"  人物：{perf['character']}")
-    print(f"  主要情感：{perf['emotion']}")
-    print(f"  关键行为：{perf['key_action']}")
-    print(f"  成长状态：{perf['growth']}")
-    print(f"  关系变化：{perf['relationship_change']}")
-    
-    print(f"\n{'🏞️ 场景设计':-^40}")
-    for i, scene in enumerate(design["scenes"], 1):
-        print(f"  场景{i}：{scene['location']} ({scene['type']})")
-        print(f"    氛围：{scene['mood']}")
-        print(f"    功能：{scene['function']}")
-    
-    print(f"\n{'⚔️ 冲突设计':-^40}")
-    for i, conflict in enumerate(design["conflicts"], 1):
-        print(f"  冲突{i}：{conflict['description']} ({conflict['type']})")
-        print(f"    强度：{conflict['intensity']}")
-        print(f"    解决方法：{conflict['resolution_method']}")
-        print(f"    主题关联：{conflict['theme_connection']}")
+    def constrain(self, **conditions: Any) -> Any:
+        """按条件预先收窄各抽样池，返回可反复使用的 ChapterConstraints
+
+        条件名见 constraints.CONSTRAINT_FIELDS，如 main_character="猪八戒"、
+        conflict_type="人与自我"、conflict_intensity="激烈"；条件无法满足时立即抛出 ValueError。
+        """
+        from constraints import ChapterConstraints
+        return ChapterConstraints(roster=self.roster, **conditions)
     
-    print(f"\n{'🎨 艺术特色':-^40}")
-    for feature in design["artistic_features"]:
-        print(f"  {feature['type']}：{', '.join(feature['selected_techniques'])}")
-        print(f"    效果：{feature['effect']}")
+    def generate_constrained_design(self, constraints: Any, seed: Optional[int] = None) -> Dict:
+        """生成满足约束的章节设计：各项直接从收窄后的池中抽取，不做生成后过滤"""
+        if seed is not None:
+            return type(self)(rng=self._fork_rng(seed), clock=self.clock,
+                              roster=self.roster).generate_constrained_design(constraints)
+        if constraints.roster is not self.roster and constraints.roster != self.roster:
+            raise ValueError("约束对象与生成器使用的人物名册不一致")
+        rng = self.rng
+        choice = rng.choice
+        template_name = choice(constraints.templates)
+        main_name = choice(constraints.main_characters)
+        
+        design = {
+            "metadata": {
+                "generated_at": self.clock(),
+                "template_used": template_name,
+                "chapter_number": rng.randint(1, 100),
+                "design_id": f"design_{rng.randint(1000, 9999)}"
+            },
+            "chapter_title": self.generate_chapter_title(),
+            "main_character": main_name,
+            "structure_plan": self.generate_structure_plan(template_name),
+            "character_performance": {
+                "character": main_name,
+                "emotion": choice(constraints.emotions),
+                "key_action": choice(constraints.key_actions),
+                "growth": choice(constraints.growth_states),
+                "relationship_change": choice(constraints.relationship_changes)
+            },
+            "scenes": constraints.draw_scenes(rng),
+            "conflicts": constraints.draw_conflicts(rng),
+            "artistic_features": self.generate_artistic_features(),
+            "thematic_connections": self.generate_thematic_connections(),
+            "adaptation_suggestions": self.generate_adaptation_suggestions(),
+            "creative_notes": CREATIVE_NOTES
+        }
+        if self.roster is not None:
+            design["supporting_characters"] = self._draw_supporting_characters(main_name)
+        return design
     
-    print(f"\n{'📚 主题关联':-^40}")
-    for theme in design["thematic_connections"]["themes"]:
-        print(f"  {theme['level']}：{theme['name']}")
-        print(f"    关联点：{theme['connection']}")
-        print(f"    意义：{theme['significance']}")
+    def _draw_supporting_characters(self, main_name: str) -> List[str]:
+        """从名册中抽取1-3名配角（不含主角）；多抽一名再剔除主角，避免每次复制候选列表"""
+        pool = self.roster.supporting
+        k = self.rng.randint(1, 3)
+        picks = self.rng.sample(pool, k=min(k + 1, len(pool)))
+        return [name for name in picks if name != main_name][:k]
     
-    print(f"\n{'🎬 改编建议':-^40}")
-    for adapt in design["adaptation_suggestions"]:
-        print(f"  {adapt['medium']}：")
-        for suggestion in adapt['suggestions']:
-            print(f"    • {suggestion}")
+    def combination_space(self, template_name: Optional[str] = None) -> Dict[str, int]:
+        """统计 generate_complete_chapter_design 各内容字段可能取值的数量
+
+        返回 字段名→不同取值数，另含 total 为全部指纹字段的乘积，
+        即去重模式下最多能得到的不同设计数量；指定 template_name 时结构计划只按该模板统计。
+        """
+        templates = self.templates if template_name is None else (TEMPLATES_BY_NAME[template_name],)
+        per_stage = _ordered_samples(len(KEY_ELEMENTS), range(3, 7))
+        structure_plans = 0
+        for template in templates:
+            plans = len(duration_splits(len(template["structure"])))
+            for stage in template["structure"]:
+                plans *= len(STAGE_CONTENT.get(stage, DEFAULT_STAGE_CONTENT)) * per_stage
+            structure_plans += plans
+        
+        per_scene = sum(len(scene["examples"]) * len(scene["mood"]) for scene in self.scenes)
+        per_conflict = sum(len(conflict["examples"]) * len(conflict["resolution"])
+                           for conflict in self.conflicts)
+        per_conflict *= len(CONFLICT_INTENSITIES) * len(CONFLICT_THEMES)
+        
+        # 每种艺术特色被选中后还要有序抽取1-3种手法
+        technique_choices = [_ordered_samples(len(feature["techniques"]), range(1, 4))
+                             for feature in ARTISTIC_FEATURES]
+        artistic_features = sum(
+            math.factorial(k) * math.prod(combo)
+            for k in range(2, 5)
+            for combo in itertools.combinations(technique_choices, k)
+        )
+        
+        titles = len(TITLE_FIRST_LINES) * len(TITLE_SECOND_LINES) - len(TITLE_SECOND_LINES_EXCLUDING)
+        space = {
+            "chapter_title": titles,
+            "main_character": len(self.roster.main) if self.roster is not None else len(MAIN_CHARACTERS),
+            "structure_plan": structure_plans,
+            "character_performance": (len(EMOTIONS) * len(KEY_ACTIONS)
+                                      * len(GROWTH_STATES) * len(RELATIONSHIP_CHANGES)),
+            "scenes": sum(per_scene ** k for k in range(2, 5)),
+            "conflicts": sum(per_conflict ** k for k in range(1, 4)),
+            "artistic_features": artistic_features,
+            "thematic_connections": _ordered_samples(len(THEMES), range(2, 5)),
+            "adaptation_suggestions": _ordered_samples(len(ADAPTATIONS), range(2, 5)),
+        }
+        space["total"] = math.prod(space[field] for field in FINGERPRINT_FIELDS)
+        return space
     
-    print(f"\n{'💡 创作笔记':-^40}")
-    for note in design["creative_notes"]:
-        print(f"  • {note}")
+    def iter_chapter_designs(self, count: int, template_name: Optional[str] = None,
+                             constraints: Optional[Any] = None) -> Iterator[Dict]:
+        """逐个生成章节设计（惰性迭代，不在内存中保留整批结果）；指定 constraints 时生成满足约束的设计"""
+        if constraints is not None:
+            for _ in range(count):
+                yield self.generate_constrained_design(constraints)
+            return
+        for _ in range(count):
+            yield self.generate_complete_chapter_design(template_name)
     
-    print("\n" + "=" * 80)
-    print(f"生成时间：{design['metadata']['generated_at']}")
-    print("=" * 80)
+    def write_designs_jsonl(self, stream: TextIO, count: int,
+                            template_name: Optional[str] = None) -> int:
+        """批量生成章节设计，每生成一份即写出一行JSON，返回写出的数量"""
+        dumps = json.dumps
+        write = stream.write
+        written = 0
+        for design in self.iter_chapter_designs(count, template_name):
+            write(dumps(design, ensure_ascii=False) + "\n")
+            written += 1
+        return written
 
-def main():
-    """主函数"""
+def print_chapter_design(design: Dict, format_type: str = "text"):
+    """打印章节设计（渲染为单个字符串后一次写出）"""
+    sys.stdout.write(render_design(design, format_type))
+
+def resolve_template_name(generator: ChapterGenerator, value: Optional[str]) -> Optional[str]:
+    """将模板编号或名称解析为模板名称，无法识别时返回None"""
+    if not value:
+        return None
+    names = [template["name"] for template in generator.templates]
+    if value in names:
+        return value
+    if value.isdigit() and 0 < int(value) <= len(names):
+        return names[int(value) - 1]
+    return None
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》章节设计生成工具")
+    parser.add_argument("-n", "--count", type=int,
+                        help="非交互批量模式：生成的章节设计数量")
+    parser.add_argument("-s", "--seed", type=int,
+                        help="随机种子；指定后相同参数的输出内容可复现")
+    parser.add_argument("--generated-at",
+                        help="固定写入 metadata.generated_at 的时间戳；与 --seed 同用时输出逐字节可复现")
+    parser.add_argument("-t", "--template",
+                        help="模板编号或名称（默认每份设计随机选择）")
+    parser.add_argument("-o", "--output", default="-",
+                        help="输出文件路径（默认 - 表示标准输出）")
+    parser.add_argument("-f", "--format", default="jsonl", choices=sorted(RENDERERS),
+                        help="批量模式的输出格式（默认jsonl）")
+    parser.add_argument("-w", "--where", action="append", default=[], metavar="条件=取值",
+                        help="约束条件，可重复；同一条件给出多次时满足其一即可，"
+                             "如 --where main_character=猪八戒 --where conflict_intensity=激烈")
+    parser.add_argument("--roster", nargs="*", metavar="CATEGORY",
+                        help="从人物资料库抽取主角与配角；可指定主角所属分类（如 妖怪魔王），不指定时取全体人物")
+    parser.add_argument("--ngram-titles", action="store_true",
+                        help="章回标题改由100回回目训练的 n 元模型生成（见 title_model.py）")
+    return parser.parse_args(argv)
+
+def load_roster(main_categories: Optional[List[str]] = None):
+    """从人物技能的资料库构建人物名册（只读取索引，不解析档案正文）"""
+    if str(CHARACTER_SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(CHARACTER_SCRIPTS_DIR))
+    from character_store import default_store
+    return default_store().roster(main=main_categories or None)
+
+def parse_conditions(items: List[str]) -> Dict[str, List[str]]:
+    """把 --where 的 条件=取值 列表整理为 条件→取值列表"""
+    conditions: Dict[str, List[str]] = {}
+    for item in items:
+        field, sep, value = item.partition("=")
+        if not sep or not field.strip() or not value.strip():
+            raise ValueError(f"约束条件格式应为 条件=取值：{item}")
+        conditions.setdefault(field.strip(), []).append(value.strip())
+    return conditions
+
+def run_batch(generator: ChapterGenerator, count: int,
+              template_name: Optional[str], output: str, format_type: str = "jsonl",
+              constraints: Optional[Any] = None) -> int:
+    """批量模式：生成count份设计，按批渲染后合并写出"""
+    designs = generator.iter_chapter_designs(count, template_name, constraints)
+    if output == "-":
+        return write_designs(designs, sys.stdout, format_type)
+    with open(output, "w", encoding="utf-8") as f:
+        return write_designs(designs, f, format_type)
+
+def save_design_file(design: Dict, directory: Path = Path(".")) -> Path:
+    """把设计保存为 chapter_design_<design_id>.json；design_id 只有四位随机数，
+    同名文件已存在时依次加 _2、_3 … 后缀，不覆盖已有文件（大量保存请改用 scripts/sqlite_sink.py）"""
+    stem = f"chapter_design_{design['metadata']['design_id']}"
+    for attempt in itertools.count(1):
+        path = directory / (f"{stem}.json" if attempt == 1 else f"{stem}_{attempt}.json")
+        try:
+            with open(path, "x", encoding="utf-8") as f:
+                json.dump(design, f, ensure_ascii=False, indent=2)
+        except FileExistsError:
+            continue
+        return path
+
+def run_interactive(generator: ChapterGenerator):
+    """交互模式：生成单份设计并按提示输出或保存"""
     print("《西游记》章节设计生成工具")
     print("-" * 40)
     
-    generator = ChapterGenerator()
-    
     print("\n可用模板：")
     for i, template in enumerate(generator.templates, 1):
         print(f"  {i}. {template['name']} - {template['description']}")
     
     try:
         choice = input("\n选择模板编号（直接回车随机选择）：").strip()
-        if choice and choice.isdigit():
-            idx = int(choice) - 1
-            if 0 <= idx < len(generator.templates):
-                template_name = generator.templates[idx]["name"]
-            else:
-                template_name = None
-        else:
-            template_name = None
+        template_name = resolve_template_name(generator, choice) if choice.isdigit() else None
         
         print("\n生成中...")
         design = generator.generate_complete_chapter_design(template_name)
@@ -514,9 +750,7 @@ def main():
         # 保存选项
         save_choice = input("\n是否保存到文件？(y/n，默认n)：").strip().lower()
         if save_choice == 'y':
-            filename = f"chapter_design_{design['metadata']['design_id']}.json"
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(design, f, ensure_ascii=False, indent=2)
+            filename = save_design_file(design)
             print(f"已保存到：{filename}")
         
     except KeyboardInterrupt:
@@ -524,5 +758,46 @@ def main():
     except Exception as e:
         print(f"\n生成过程中出现错误：{e}")
 
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    clock = (lambda: args.generated_at) if args.generated_at else None
+    try:
+        roster = load_roster(args.roster) if args.roster is not None else None
+    except ValueError as e:
+        sys.exit(str(e))
+    generator_class = ChapterGenerator
+    if args.ngram_titles:
+        from title_model import NgramTitleChapterGenerator
+        generator_class = NgramTitleChapterGenerator
+    generator = generator_class(clock=clock, seed=args.seed, roster=roster)
+    
+    if args.count is None:
+        run_interactive(generator)
+        return
+    
+    if args.count < 0:
+        sys.exit("生成数量不能为负数")
+    template_name = resolve_template_name(generator, args.template)
+    if args.template and template_name is None:
+        sys.exit(f"未知模板：{args.template}")
+    constraints = None
+    if args.where:
+        try:
+            conditions = parse_conditions(args.where)
+            if template_name is not None:
+                conditions.setdefault("template", [template_name])
+            constraints = generator.constrain(**conditions)
+        except ValueError as e:
+            sys.exit(str(e))
+    
+    try:
+        written = run_batch(generator, args.count, template_name, args.output, args.format, constraints)
+    except BrokenPipeError:
+        # 下游管道（如 head）提前关闭时静默退出
+        sys.stderr.close()
+        return
+    print(f"已生成 {written} 份章节设计", file=sys.stderr)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
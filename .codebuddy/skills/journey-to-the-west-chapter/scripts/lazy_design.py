@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》惰性章节设计
+每个字段使用由（设计种子, 字段名）派生的独立随机数流，首次访问时才抽样生成，
+因此结果只由种子决定、与访问顺序和访问了哪些字段无关；批量生成时可只选取需要的字段，
+完整展开后的字典结构与 generate_complete_chapter_design 相同
+"""
+
+import argparse
+import json
+import random
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple
+
+from generate_chapter import CREATIVE_NOTES, MAIN_CHARACTERS, TEMPLATE_NAMES, ChapterGenerator
+
+# 字段顺序与 generate_complete_chapter_design 的输出一致；supporting_characters 只在使用人物名册时出现
+DESIGN_FIELDS: Tuple[str, ...] = (
+    "metadata", "chapter_title", "main_character", "structure_plan", "character_performance",
+    "scenes", "conflicts", "artistic_features", "thematic_connections", "adaptation_suggestions",
+    "creative_notes",
+)
+ROSTER_FIELDS: Tuple[str, ...] = DESIGN_FIELDS + ("supporting_characters",)
+
+# 依赖模板或主角、需要先抽取 core 随机数流的字段
+_CORE_FIELDS = frozenset(("metadata", "main_character", "structure_plan", "character_performance",
+                          "supporting_characters"))
+
+SEED_BITS = 64
+
+
+class LazyChapterDesign(Mapping):
+    """按字段惰性生成的章节设计（只读映射）
+
+    模板、主角与 metadata 的编号来自同一个“core”随机数流（被 structure_plan、character_performance
+    等字段共用），其余字段各自使用独立的随机数流。generated_at 在创建时取一次。
+    """
+
+    __slots__ = ("seed", "template_name", "_generator", "_generated_at", "_core", "_values")
+
+    def __init__(self, seed: int, generator: ChapterGenerator, template_name: Optional[str] = None):
+        self.seed = seed
+        self.template_name = template_name
+        # 生成器只用于调用各子生成方法，rng 在每个字段生成前替换为该字段的随机数流
+        self._generator = generator
+        self._generated_at = generator.clock()
+        self._core: Optional[Tuple[str, Dict, int, int]] = None
+        self._values: Dict[str, Any] = {}
+
+    # ---- 随机数流 ----
+
+    def _rng(self, field: str) -> random.Random:
+        """字段的独立随机数流，与生成器的 rng 同类（WeightedRandom 沿用其权重表）；
+        以字符串为种子时经 SHA-512 派生，不受 PYTHONHASHSEED 影响"""
+        return self._generator._fork_rng(f"{self.seed}:{field}")
+
+    def _use(self, field: str) -> ChapterGenerator:
+        generator = self._generator
+        generator.rng = self._rng(field)
+        return generator
+
+    def _core_values(self) -> Tuple[str, Dict, int, int]:
+        """模板名称、主角、回目编号与设计编号"""
+        if self._core is None:
+            rng = self._rng("core")
+            template_name = self.template_name if self.template_name is not None else rng.choice(TEMPLATE_NAMES)
+            roster = self._generator.roster
+            main_character = rng.choice(MAIN_CHARACTERS) if roster is None else {"name": rng.choice(roster.main)}
+            self._core = (template_name, main_character, rng.randint(1, 100), rng.randint(1000, 9999))
+        return self._core
+
+    # ---- 各字段 ----
+
+    def _compute(self, field: str) -> Any:
+        if field == "creative_notes":
+            return CREATIVE_NOTES
+        if field in _CORE_FIELDS:
+            template_name, main_character, chapter_number, design_number = self._core_values()
+            if field == "metadata":
+                return {
+                    "generated_at": self._generated_at,
+                    "template_used": template_name,
+                    "chapter_number": chapter_number,
+                    "design_id": f"design_{design_number}"
+                }
+            if field == "main_character":
+                return main_character["name"]
+            generator = self._use(field)
+            if field == "structure_plan":
+                return generator.generate_structure_plan(template_name)
+            if field == "character_performance":
+                return generator.generate_character_performance(main_character)
+            return generator._draw_supporting_characters(main_character["name"])
+        generator = self._use(field)
+        if field == "chapter_title":
+            return generator.generate_chapter_title()
+        if field == "scenes":
+            return [generator.generate_scene_description() for _ in range(generator.rng.randint(2, 4))]
+        if field == "conflicts":
+            return [generator.generate_conflict_scene() for _ in range(generator.rng.randint(1, 3))]
+        if field == "artistic_features":
+            return generator.generate_artistic_features()
+        if field == "thematic_connections":
+            return generator.generate_thematic_connections()
+        return generator.generate_adaptation_suggestions()
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return DESIGN_FIELDS if self._generator.roster is None else ROSTER_FIELDS
+
+    def __getitem__(self, field: str) -> Any:
+        values = self._values
+        if field in values:
+            return values[field]
+        if field not in self.fields:
+            raise KeyError(field)
+        value = values[field] = self._compute(field)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.fields)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __repr__(self) -> str:
+        computed = "、".join(field for field in self.fields if field in self._values) or "无"
+        return f"<LazyChapterDesign seed={self.seed} 已生成：{computed}>"
+
+    def is_computed(self, field: str) -> bool:
+        """字段是否已经生成"""
+        return field in self._values
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict:
+        """展开为普通字典；fields 为空时展开全部字段（结构与 generate_complete_chapter_design 相同）"""
+        if fields is None:
+            return {field: self[field] for field in self.fields}
+        return {field: self[field] for field in select_fields(fields, self.fields)}
+
+
+def select_fields(fields: Iterable[str], available: Sequence[str] = ROSTER_FIELDS) -> Tuple[str, ...]:
+    """校验字段名并按设计中的字段顺序排列"""
+    wanted = set(fields)
+    unknown = wanted.difference(available)
+    if unknown:
+        raise ValueError(f"未知字段：{'、'.join(sorted(unknown))}（可用：{'、'.join(available)}）")
+    return tuple(field for field in available if field in wanted)
+
+
+class LazyChapterGenerator(ChapterGenerator):
+    """生成惰性章节设计的章节生成器
+
+    每份设计的种子取自本生成器的随机数流（指定 seed 时可复现），字段在访问时才生成。
+    """
+
+    def lazy_design(self, template_name: Optional[str] = None, seed: Optional[int] = None) -> LazyChapterDesign:
+        """创建一份惰性设计；指定 seed 时结果只由（seed, 模板, clock 的返回值）决定"""
+        if seed is None:
+            seed = self.rng.getrandbits(SEED_BITS)
+        # 每份设计持有自己的生成器副本，避免与本生成器或其他设计共享 rng；
+        # 副本的 rng 由本生成器派生，各字段的随机数流随之保持同类
+        worker = type(self)(rng=self._fork_rng(seed), clock=self.clock, roster=self.roster)
+        return LazyChapterDesign(seed, worker, template_name)
+
+    def iter_lazy_designs(self, count: int, template_name: Optional[str] = None,
+                          fields: Optional[Iterable[str]] = None) -> Iterator[Any]:
+        """逐个产出设计：fields 为空时产出 LazyChapterDesign，否则产出只含所选字段的字典"""
+        if fields is None:
+            for _ in range(count):
+                yield self.lazy_design(template_name)
+            return
+        selected = select_fields(fields, DESIGN_FIELDS if self.roster is None else ROSTER_FIELDS)
+        for _ in range(count):
+            design = self.lazy_design(template_name)
+            yield {field: design[field] for field in selected}
+
+
+def write_jsonl(designs: Iterable[Mapping], stream: TextIO) -> int:
+    """逐行写出 JSONL，返回写出数量"""
+    dumps = json.dumps
+    count = 0
+    for design in designs:
+        if isinstance(design, LazyChapterDesign):
+            design = design.to_dict()
+        stream.write(dumps(design, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="按字段惰性生成章节设计，可只输出选定字段")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="生成数量（默认1000）")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    parser.add_argument("-t", "--template", choices=TEMPLATE_NAMES, help="指定模板")
+    parser.add_argument("--fields", help="只输出这些字段（逗号分隔），如 chapter_title,structure_plan")
+    parser.add_argument("--generated-at", help="固定生成时间（用于可复现输出）")
+    parser.add_argument("-o", "--output", default="-", help="输出文件路径（默认 - 表示标准输出）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    clock = (lambda: args.generated_at) if args.generated_at else None
+    generator = LazyChapterGenerator(seed=args.seed, clock=clock)
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+    try:
+        designs = generator.iter_lazy_designs(args.count, args.template, fields)
+        if args.output == "-":
+            written = write_jsonl(designs, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                written = write_jsonl(designs, f)
+    except ValueError as e:
+        sys.exit(str(e))
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    print(f"已生成 {written} 份章节设计", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
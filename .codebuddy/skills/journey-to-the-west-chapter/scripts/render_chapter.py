@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》章节设计渲染引擎
+将章节设计渲染到单个缓冲区后一次写出，支持文本、Markdown、JSON、紧凑JSON与JSONL格式
+"""
+
+import json
+from typing import Callable, Dict, Iterable, List, TextIO
+
+Renderer = Callable[[Dict], str]
+
+# 渲染器注册表：格式名称 → 将单份设计渲染为字符串的函数
+RENDERERS: Dict[str, Renderer] = {}
+
+
+def register_renderer(name: str) -> Callable[[Renderer], Renderer]:
+    """注册渲染器的装饰器，可用于扩展新的输出格式"""
+    def decorator(func: Renderer) -> Renderer:
+        RENDERERS[name] = func
+        return func
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# 预编译模板：分隔线与小节标题只计算一次
+# ---------------------------------------------------------------------------
+
+_RULE = "=" * 80
+_TEXT_HEADER = f"{_RULE}\n《西游记》章节设计生成结果\n{_RULE}\n"
+_TEXT_SECTION = {
+    name: f"\n{name:-^40}\n"
+    for name in ("📊 结构规划", "🎭 人物表现", "🏞️ 场景设计", "⚔️ 冲突设计",
+                 "🎨 艺术特色", "📚 主题关联", "🎬 改编建议", "💡 创作笔记")
+}
+_TEXT_FOOTER_RULE = "\n" + _RULE + "\n生成时间："
+
+
+@register_renderer("text")
+def render_text(design: Dict) -> str:
+    """文本格式，与 print_chapter_design 的文本输出逐字节一致"""
+    metadata = design["metadata"]
+    sections = _TEXT_SECTION
+    perf = design["character_performance"]
+    parts: List[str] = [
+        _TEXT_HEADER,
+        f"\n📖 章节标题：{design['chapter_title']}\n🎭 主要人物：{design['main_character']}\n"
+        f"🏛️ 结构模板：{metadata['template_used']}\n🆔 设计编号：{metadata['design_id']}\n",
+        sections["📊 结构规划"],
+    ]
+    append = parts.append
+    if design.get("supporting_characters"):
+        parts.insert(2, f"👥 配角：{'、'.join(design['supporting_characters'])}\n")
+    for stage in design["structure_plan"]:
+        append(f"  {stage['stage']} ({stage['duration_percentage']}%)\n    内容：{stage['content']}\n"
+               f"    关键元素：{', '.join(stage['key_elements'])}\n")
+
+    append(sections["🎭 人物表现"])
+    append(f"  人物：{perf['character']}\n  主要情感：{perf['emotion']}\n  关键行为：{perf['key_action']}\n"
+           f"  成长状态：{perf['growth']}\n  关系变化：{perf['relationship_change']}\n")
+
+    append(sections["🏞️ 场景设计"])
+    for index, scene in enumerate(design["scenes"], 1):
+        append(f"  场景{index}：{scene['location']} ({scene['type']})\n    氛围：{scene['mood']}\n"
+               f"    功能：{scene['function']}\n")
+
+    append(sections["⚔️ 冲突设计"])
+    for index, conflict in enumerate(design["conflicts"], 1):
+        append(f"  冲突{index}：{conflict['description']} ({conflict['type']})\n    强度：{conflict['intensity']}\n"
+               f"    解决方法：{conflict['resolution_method']}\n    主题关联：{conflict['theme_connection']}\n")
+
+    append(sections["🎨 艺术特色"])
+    for feature in design["artistic_features"]:
+        append(f"  {feature['type']}：{', '.join(feature['selected_techniques'])}\n    效果：{feature['effect']}\n")
+
+    append(sections["📚 主题关联"])
+    for theme in design["thematic_connections"]["themes"]:
+        append(f"  {theme['level']}：{theme['name']}\n    关联点：{theme['connection']}\n"
+               f"    意义：{theme['significance']}\n")
+
+    append(sections["🎬 改编建议"])
+    for adapt in design["adaptation_suggestions"]:
+        append(f"  {adapt['medium']}：\n")
+        for suggestion in adapt["suggestions"]:
+            append(f"    • {suggestion}\n")
+
+    append(sections["💡 创作笔记"])
+    for note in design["creative_notes"]:
+        append(f"  • {note}\n")
+
+    append(f"{_TEXT_FOOTER_RULE}{metadata['generated_at']}\n{_RULE}\n")
+    return "".join(parts)
+
+
+@register_renderer("markdown")
+def render_markdown(design: Dict) -> str:
+    """Markdown 格式，适合直接粘贴到创作文档"""
+    metadata = design["metadata"]
+    parts: List[str] = [
+        f"## {design['chapter_title']}\n\n",
+        f"- **主要人物**：{design['main_character']}\n",
+        f"- **配角**：{'、'.join(design['supporting_characters'])}\n" if design.get("supporting_characters") else "",
+        f"- **结构模板**：{metadata['template_used']}\n",
+        f"- **回目编号**：第{metadata['chapter_number']}回\n",
+        f"- **设计编号**：{metadata['design_id']}\n",
+        "\n### 结构规划\n\n| 阶段 | 篇幅 | 内容 | 关键元素 |\n| --- | --- | --- | --- |\n",
+    ]
+    append = parts.append
+    for stage in design["structure_plan"]:
+        append(f"| {stage['stage']} | {stage['duration_percentage']}% | {stage['content']} "
+               f"| {'、'.join(stage['key_elements'])} |\n")
+
+    perf = design["character_performance"]
+    append(f"\n### 人物表现\n\n- **人物**：{perf['character']}\n- **主要情感**：{perf['emotion']}\n"
+           f"- **关键行为**：{perf['key_action']}\n- **成长状态**：{perf['growth']}\n"
+           f"- **关系变化**：{perf['relationship_change']}\n")
+
+    append("\n### 场景设计\n\n")
+    for index, scene in enumerate(design["scenes"], 1):
+        append(f"{index}. **{scene['location']}**（{scene['type']}）：{scene['mood']}，{scene['function']}\n")
+
+    append("\n### 冲突设计\n\n")
+    for index, conflict in enumerate(design["conflicts"], 1):
+        append(f"{index}. **{conflict['description']}**（{conflict['type']}，{conflict['intensity']}）："
+               f"{conflict['resolution_method']}，关联{conflict['theme_connection']}\n")
+
+    append("\n### 艺术特色\n\n")
+    for feature in design["artistic_features"]:
+        append(f"- **{feature['type']}**：{'、'.join(feature['selected_techniques'])}——{feature['effect']}\n")
+
+    append("\n### 主题关联\n\n")
+    for theme in design["thematic_connections"]["themes"]:
+        append(f"- **{theme['level']}·{theme['name']}**：{theme['connection']}，{theme['significance']}\n")
+
+    append("\n### 改编建议\n\n")
+    for adapt in design["adaptation_suggestions"]:
+        append(f"- **{adapt['medium']}**\n")
+        for suggestion in adapt["suggestions"]:
+            append(f"  - {suggestion}\n")
+
+    append("\n### 创作笔记\n\n")
+    for note in design["creative_notes"]:
+        append(f"- {note}\n")
+    append(f"\n> 生成时间：{metadata['generated_at']}\n")
+    return "".join(parts)
+
+
+@register_renderer("json")
+def render_json(design: Dict) -> str:
+    """缩进 JSON，与 print_chapter_design 的 JSON 输出一致"""
+    return json.dumps(design, ensure_ascii=False, indent=2) + "\n"
+
+
+@register_renderer("compact-json")
+def render_compact_json(design: Dict) -> str:
+    """紧凑 JSON，去掉缩进与分隔符后的空格"""
+    return json.dumps(design, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@register_renderer("jsonl")
+def render_jsonl(design: Dict) -> str:
+    """JSONL 单行，与批量模式输出一致"""
+    return json.dumps(design, ensure_ascii=False) + "\n"
+
+
+def get_renderer(format_type: str) -> Renderer:
+    """按格式名称获取渲染器"""
+    try:
+        return RENDERERS[format_type]
+    except KeyError:
+        raise ValueError(f"不支持的输出格式：{format_type}（可选：{', '.join(RENDERERS)}）") from None
+
+
+def render_design(design: Dict, format_type: str = "text") -> str:
+    """将单份设计渲染为字符串"""
+    return get_renderer(format_type)(design)
+
+
+def render_batch(designs: Iterable[Dict], format_type: str = "text") -> str:
+    """将一批设计渲染为单个字符串"""
+    return "".join(map(get_renderer(format_type), designs))
+
+
+def write_designs(designs: Iterable[Dict], sink: TextIO, format_type: str = "text",
+                  batch_size: int = 256) -> int:
+    """渲染设计并写入任意文件对象
+
+    每累积 batch_size 份设计合并为一次 write；batch_size 为 0 时整批只写一次。
+    返回写出的设计数量。
+    """
+    renderer = get_renderer(format_type)
+    write = sink.write
+    buffer: List[str] = []
+    written = 0
+    for design in designs:
+        buffer.append(renderer(design))
+        written += 1
+        if batch_size and len(buffer) >= batch_size:
+            write("".join(buffer))
+            buffer.clear()
+    if buffer:
+        write("".join(buffer))
+    return written
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》章回标题 n 元模型
+以100回真实回目为语料训练逐字 n 元转移表（上下联分别统计起止分布），转移表存为紧凑整数数组；
+生成时按“长度 + 逐位约束”做后向计数，从满足约束的全部路径中按频次精确抽样，
+不会走进无法补全的死路。训练结果缓存到 .cache/，回目文件未变化时启动不再重新训练
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sys
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from generate_chapter import ChapterGenerator
+
+OUTLINE_SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "journey-to-the-west-outline" / "scripts"
+if str(OUTLINE_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(OUTLINE_SCRIPTS_DIR))
+
+from outline_store import CHAPTER_CATALOG_PATH, CHAPTER_GALLERY_PATH, OutlineStore  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+DEFAULT_CACHE_PATH = REPO_ROOT / ".cache" / "title_model.pickle"
+
+MODEL_VERSION = 1
+DEFAULT_ORDER = 2
+LINE_LENGTH = 7
+WILDCARDS = "?？.＊*"
+
+# 上联、下联
+SIDES = (0, 1)
+
+
+def training_couplets(store: Optional[OutlineStore] = None) -> List[Tuple[str, ...]]:
+    """100回回目按空白切分后的上下联"""
+    store = store if store is not None else OutlineStore()
+    couplets = []
+    for chapter in range(1, 101):
+        outline = store.get(chapter)
+        if outline is not None:
+            halves = tuple(outline.title.split())
+            if len(halves) == 2:
+                couplets.append(halves)
+    return couplets
+
+
+def source_signature() -> Dict[str, Tuple[int, int]]:
+    """回目来源文件的修改时间与大小"""
+    signature = {}
+    for path in (CHAPTER_CATALOG_PATH, CHAPTER_GALLERY_PATH):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature[str(path)] = (stat.st_mtime_ns, stat.st_size)
+    return signature
+
+
+class _Plan:
+    """某一长度与逐位约束下的抽样计划：起始状态与每个位置上各状态的累计权重表"""
+
+    __slots__ = ("starts", "start_cumulative", "steps")
+
+    def __init__(self, starts: List[int], start_weights: List[float],
+                 steps: List[Dict[int, Tuple[List[float], List[int], List[int]]]]):
+        self.starts = starts
+        self.start_cumulative = list(accumulate(start_weights))
+        self.steps = steps
+
+
+class TitleModel:
+    """逐字 n 元标题模型
+
+    状态为最近 order-1 个字；转移表按状态编号以 CSR 形式存放：
+    offsets[s]:offsets[s+1] 为状态 s 的出边，edge_chars / edge_targets / edge_counts 分别为
+    出边的字编号、到达的状态编号与出现次数。starts[side] / ends[side] 为各状态作为上联或下联
+    开头、结尾的次数。
+    """
+
+    def __init__(self, couplets: Sequence[Tuple[str, ...]], order: int = DEFAULT_ORDER):
+        if order < 2:
+            raise ValueError("n 元模型的阶数至少为2")
+        self.order = order
+        self.context = order - 1
+        chars: Dict[str, int] = {}
+        states: Dict[Tuple[int, ...], int] = {}
+        edges: Dict[Tuple[int, int], int] = {}
+        starts: Tuple[Dict[int, int], ...] = ({}, {})
+        ends: Tuple[Dict[int, int], ...] = ({}, {})
+
+        def state_id(key: Tuple[int, ...]) -> int:
+            return states.setdefault(key, len(states))
+
+        self.lines = frozenset(half for couplet in couplets for half in couplet)
+        for couplet in couplets:
+            for side, half in zip(SIDES, couplet):
+                if len(half) < self.context:
+                    continue
+                ids = [chars.setdefault(ch, len(chars)) for ch in half]
+                first = state_id(tuple(ids[:self.context]))
+                starts[side][first] = starts[side].get(first, 0) + 1
+                for i in range(self.context, len(ids)):
+                    source = state_id(tuple(ids[i - self.context:i]))
+                    state_id(tuple(ids[i - self.context + 1:i + 1]))
+                    edges[source, ids[i]] = edges.get((source, ids[i]), 0) + 1
+                last = state_id(tuple(ids[len(ids) - self.context:]))
+                ends[side][last] = ends[side].get(last, 0) + 1
+
+        self.chars = "".join(chars)
+        self.char_ids = chars
+        state_keys = list(states)
+        self.state_chars = array("H", (ch for key in state_keys for ch in key))
+        self.offsets = array("I", [0] * (len(states) + 1))
+        self.edge_chars = array("H")
+        self.edge_targets = array("I")
+        self.edge_counts = array("I")
+        for (source, ch), count in sorted(edges.items()):
+            self.offsets[source + 1] += 1
+            self.edge_chars.append(ch)
+            self.edge_targets.append(states[state_keys[source][1:] + (ch,)])
+            self.edge_counts.append(count)
+        for s in range(len(states)):
+            self.offsets[s + 1] += self.offsets[s]
+        self.starts = tuple(array("I", (side_starts.get(s, 0) for s in range(len(states)))) for side_starts in starts)
+        self.ends = tuple(array("I", (side_ends.get(s, 0) for s in range(len(states)))) for side_ends in ends)
+        self._plans: Dict[Tuple, _Plan] = {}
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_plans"] = {}
+        return state
+
+    @property
+    def state_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"order": self.order, "chars": len(self.chars), "states": self.state_count,
+                "transitions": len(self.edge_chars), "training_lines": len(self.lines)}
+
+    # ---- 约束 ----
+
+    def parse_pattern(self, pattern: Optional[str], length: int = LINE_LENGTH) -> Tuple[Optional[frozenset], ...]:
+        """把逐位约束解析为各位置允许的字编号集合（None 表示不限）
+
+        pattern 每个字符对应一个位置，通配符 ? 表示不限，如“孙行者????”；也可用 [...] 给出
+        某一位置的候选字，如“[唐孙]??????”。
+        """
+        if not pattern:
+            return (None,) * length
+        slots: List[Optional[frozenset]] = []
+        i = 0
+        while i < len(pattern):
+            ch = pattern[i]
+            if ch == "[":
+                end = pattern.find("]", i)
+                if end < 0:
+                    raise ValueError(f"约束中的 [ 没有闭合：{pattern}")
+                options = pattern[i + 1:end]
+                i = end + 1
+            else:
+                options = None if ch in WILDCARDS else ch
+                i += 1
+            if options is None:
+                slots.append(None)
+                continue
+            unknown = [c for c in options if c not in self.char_ids]
+            if unknown:
+                raise ValueError(f"回目语料中没有这些字：{'、'.join(unknown)}")
+            slots.append(frozenset(self.char_ids[c] for c in options))
+        if len(slots) != length:
+            raise ValueError(f"约束长度 {len(slots)} 与标题长度 {length} 不一致：{pattern}")
+        return tuple(slots)
+
+    def _plan(self, side: int, slots: Tuple[Optional[frozenset], ...]) -> _Plan:
+        """后向计数：weights[s] 为从“末字位于当前位置的状态 s”出发、满足约束补全整行的路径数"""
+        key = (side, slots)
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        length = len(slots)
+        context = self.context
+        if length < context:
+            raise ValueError(f"标题长度不能小于 {context}")
+        ends = self.ends[side]
+        offsets, edge_chars, edge_targets, edge_counts = self.offsets, self.edge_chars, self.edge_targets, self.edge_counts
+        weights = {s: float(count) for s, count in enumerate(ends) if count}
+        steps: List[Dict[int, Tuple[List[float], List[int], List[int]]]] = [{} for _ in range(length)]
+        for position in range(length - 2, context - 2, -1):
+            allowed = slots[position + 1]
+            step = steps[position]
+            next_weights: Dict[int, float] = {}
+            for s in range(self.state_count):
+                cumulative, targets, chars_out = [], [], []
+                total = 0.0
+                for e in range(offsets[s], offsets[s + 1]):
+                    if allowed is not None and edge_chars[e] not in allowed:
+                        continue
+                    weight = weights.get(edge_targets[e])
+                    if not weight:
+                        continue
+                    total += edge_counts[e] * weight
+                    cumulative.append(total)
+                    targets.append(edge_targets[e])
+                    chars_out.append(edge_chars[e])
+                if total:
+                    step[s] = (cumulative, targets, chars_out)
+                    next_weights[s] = total
+            weights = next_weights
+
+        starts, start_weights = [], []
+        side_starts = self.starts[side]
+        state_chars = self.state_chars
+        for s, weight in weights.items():
+            if not side_starts[s]:
+                continue
+            prefix = state_chars[s * context:(s + 1) * context]
+            if any(slot is not None and ch not in slot for slot, ch in zip(slots, prefix)):
+                continue
+            starts.append(s)
+            start_weights.append(side_starts[s] * weight)
+        if not starts:
+            raise ValueError("没有满足约束的标题")
+        plan = _Plan(starts, start_weights, steps)
+        if len(self._plans) < 256:
+            self._plans[key] = plan
+        return plan
+
+    # ---- 生成 ----
+
+    def _draw(self, plan: _Plan, length: int, rng) -> str:
+        random = rng.random
+        cumulative = plan.start_cumulative
+        state = plan.starts[min(bisect_right(cumulative, random() * cumulative[-1]), len(cumulative) - 1)]
+        chars = self.chars
+        context = self.context
+        line = [chars[c] for c in self.state_chars[state * context:(state + 1) * context]]
+        for position in range(context - 1, length - 1):
+            cumulative, targets, chars_out = plan.steps[position][state]
+            i = min(bisect_right(cumulative, random() * cumulative[-1]), len(cumulative) - 1)
+            state = targets[i]
+            line.append(chars[chars_out[i]])
+        return "".join(line)
+
+    def generate_line(self, rng, side: int = 0, pattern: Optional[str] = None, length: int = LINE_LENGTH,
+                      novel: bool = True, avoid: str = "", max_tries: int = 200) -> str:
+        """生成一联；novel 为真时不输出语料中已有的半联，avoid 中的字不得出现在相同位置"""
+        slots = self.parse_pattern(pattern, length)
+        plan = self._plan(side, slots)
+        for _ in range(max_tries):
+            line = self._draw(plan, length, rng)
+            if novel and line in self.lines:
+                continue
+            if avoid and any(a == b for a, b in zip(line, avoid)):
+                continue
+            return line
+        raise ValueError(f"尝试 {max_tries} 次仍未得到符合要求的新标题（约束可能过严）")
+
+    def generate_couplet(self, rng, first: Optional[str] = None, second: Optional[str] = None,
+                         length: int = LINE_LENGTH, novel: bool = True) -> Tuple[str, str]:
+        """生成上下联：两联等长，下联与上联不同且同一位置不重字"""
+        upper = self.generate_line(rng, 0, first, length, novel)
+        lower = self.generate_line(rng, 1, second, length, novel, avoid=upper)
+        return upper, lower
+
+    def iter_couplets(self, rng, count: int, **options) -> Iterable[Tuple[str, str]]:
+        for _ in range(count):
+            yield self.generate_couplet(rng, **options)
+
+
+def load_model(order: int = DEFAULT_ORDER, cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+               retrain: bool = False) -> TitleModel:
+    """读取缓存的模型；缓存缺失、版本或回目文件变化时重新训练并写回缓存"""
+    signature = source_signature()
+    models: Dict[int, TitleModel] = {}
+    if cache_path is not None:
+        try:
+            with open(cache_path, "rb") as f:
+                payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            payload = None
+        if payload and payload.get("version") == MODEL_VERSION and payload.get("signature") == signature:
+            models = payload["models"]
+            if order in models and not retrain:
+                return models[order]
+    model = TitleModel(training_couplets(), order)
+    if cache_path is not None:
+        models[order] = model
+        cache_path = Path(cache_path)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": MODEL_VERSION, "signature": signature, "models": models}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    return model
+
+
+@lru_cache(maxsize=None)
+def default_model(order: int = DEFAULT_ORDER) -> TitleModel:
+    """进程内共享的标题模型"""
+    return load_model(order)
+
+
+class NgramTitleChapterGenerator(ChapterGenerator):
+    """章回标题改由 n 元模型生成的章节生成器，其余字段与 ChapterGenerator 相同"""
+
+    title_order = DEFAULT_ORDER
+
+    def generate_chapter_title(self) -> str:
+        """生成章回标题（语料中未出现过的七言上下联）"""
+        return " ".join(default_model(self.title_order).generate_couplet(self.rng))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="基于100回回目的 n 元章回标题生成")
+    parser.add_argument("-n", "--count", type=int, default=10, help="生成数量（默认10）")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子")
+    parser.add_argument("--order", type=int, default=DEFAULT_ORDER, help=f"n 元阶数（默认{DEFAULT_ORDER}）")
+    parser.add_argument("--length", type=int, default=LINE_LENGTH, help=f"每联字数（默认{LINE_LENGTH}）")
+    parser.add_argument("--first", help="上联逐位约束，? 为不限，如 孙行者????")
+    parser.add_argument("--second", help="下联逐位约束，如 ??[山洞]????")
+    parser.add_argument("--allow-known", action="store_true", help="允许输出语料中已有的半联")
+    parser.add_argument("--retrain", action="store_true", help="忽略缓存重新训练")
+    parser.add_argument("--stats", action="store_true", help="只输出模型统计")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    import random
+
+    args = parse_args(argv)
+    try:
+        model = load_model(args.order, retrain=args.retrain)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.stats:
+        print(json.dumps(model.stats(), ensure_ascii=False, indent=2))
+        return
+    rng = random.Random(args.seed)
+    try:
+        for upper, lower in model.iter_couplets(rng, args.count, first=args.first, second=args.second,
+                                                length=args.length, novel=not args.allow_known):
+            print(f"{upper} {lower}")
+    except ValueError as e:
+        sys.exit(str(e))
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
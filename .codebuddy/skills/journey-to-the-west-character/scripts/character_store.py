@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》人物资料库仓库
+按姓名、分类与性格特点索引 references/characters/ 下的全部人物档案，索引持久化到 .cache/，
+启动时只读取索引文件，完整档案在首次查询时才解析；可为章节生成器提供全体人物名册
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+SKILL_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SKILL_DIR.parents[2]
+CHARACTERS_DIR = SKILL_DIR / "references" / "characters"
+DEFAULT_INDEX_PATH = REPO_ROOT / ".cache" / "character_index.json"
+
+# 人物分类目录，同名人物出现在多个分类时以靠前的分类为主
+CATEGORIES: Tuple[str, ...] = (
+    "取经团队", "神仙佛祖", "菩萨罗汉", "西天佛界", "天庭系统", "妖怪魔王", "妖怪精怪", "凡人", "其他",
+)
+
+INDEX_VERSION = 3
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+_FIELD = re.compile(r"^-\s+\*\*(.+?)\*\*[：:]\s*(.*)$")
+_TRAIT = re.compile(r"^(?:\d+\.|-)\s+\*\*(.+?)\*\*")
+_EMOJI = re.compile(r"^[^\w]+")
+
+# 档案开头用作一句话身份说明的字段（按优先级）
+IDENTITY_FIELDS = ("身份", "身份定位", "称号", "真实身份")
+
+
+class Roster(NamedTuple):
+    """章节生成器使用的人物名册：主角候选与配角候选"""
+    main: Tuple[str, ...]
+    supporting: Tuple[str, ...]
+
+
+def _heading_title(title: str) -> str:
+    """去掉标题开头的表情符号"""
+    return _EMOJI.sub("", title).strip()
+
+
+def scan_header(path: Path) -> Dict:
+    """只读取档案开头到性格特点一节为止，提取身份说明与性格特点"""
+    identity = ""
+    traits: List[str] = []
+    in_traits = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            heading = _HEADING.match(line)
+            if heading:
+                level = len(heading.group(1))
+                if "性格" in heading.group(2):
+                    in_traits = True
+                elif in_traits and level <= 2:
+                    break
+                continue
+            if in_traits:
+                trait = _TRAIT.match(line)
+                if trait:
+                    traits.append(trait.group(1).strip())
+            elif not identity:
+                field = _FIELD.match(line)
+                if field and field.group(1) in IDENTITY_FIELDS:
+                    identity = field.group(2).strip()
+    return {"identity": identity, "traits": traits}
+
+
+def parse_profile(text: str) -> Dict:
+    """解析完整档案：字段、性格特点与各二级小节正文"""
+    fields: Dict[str, str] = {}
+    traits: List[str] = []
+    sections: Dict[str, List[str]] = {}
+    current: Optional[List[str]] = None
+    in_traits = False
+    for line in text.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            level, title = len(heading.group(1)), _heading_title(heading.group(2))
+            if level == 2:
+                current = sections.setdefault(title, [])
+                in_traits = "性格" in title
+            elif current is not None:
+                current.append(line)
+                in_traits = in_traits or "性格" in title
+            continue
+        if current is not None:
+            current.append(line)
+        if in_traits:
+            trait = _TRAIT.match(line)
+            if trait:
+                traits.append(trait.group(1).strip())
+                continue
+        field = _FIELD.match(line)
+        if field:
+            fields.setdefault(field.group(1).strip(), field.group(2).strip())
+    return {
+        "fields": fields,
+        "traits": traits,
+        "sections": {title: "\n".join(lines).strip() for title, lines in sections.items()},
+    }
+
+
+class CharacterStore:
+    """人物资料库：索引常驻内存，档案按需解析并缓存"""
+
+    def __init__(self, root: Path = CHARACTERS_DIR, index_path: Optional[Path] = DEFAULT_INDEX_PATH):
+        self.root = Path(root)
+        self.index_path = Path(index_path) if index_path is not None else None
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._by_category: Dict[str, Tuple[str, ...]] = {}
+        self._by_trait: Dict[str, Tuple[str, ...]] = {}
+        self._profiles: Dict[str, Dict] = {}
+
+    # ---- 索引 ----
+
+    def _signature(self) -> Dict[str, List[int]]:
+        """各档案（分类/文件名）的修改时间与大小；增删、重命名与原地修改都能发现"""
+        signature = {}
+        for category in CATEGORIES:
+            try:
+                with os.scandir(self.root / category) as it:
+                    files = sorted((entry for entry in it if entry.name.endswith(".md") and entry.is_file()),
+                                   key=lambda entry: entry.name)
+            except FileNotFoundError:
+                continue
+            for entry in files:
+                if entry.name[:-3] == category:
+                    continue  # 分类总览（如 取经团队.md）不是单个人物
+                stat = entry.stat()
+                signature[f"{category}/{entry.name}"] = [stat.st_mtime_ns, stat.st_size]
+        return signature
+
+    def _load_saved(self) -> Optional[Dict]:
+        if self.index_path is None:
+            return None
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if saved.get("version") != INDEX_VERSION or saved.get("root") != str(self.root):
+            return None
+        return saved
+
+    def build_index(self, force: bool = False) -> int:
+        """建立（必要时更新）索引并返回人物数量；只重新扫描修改时间或大小变化的档案"""
+        signature = self._signature()
+        saved = None if force else self._load_saved()
+        old_files = saved["files"] if saved else {}
+        old_signature = saved["signature"] if saved else {}
+        files: Dict[str, Dict] = {}
+        changed = set(old_signature) != set(signature)
+        for path, stamp in signature.items():
+            entry = old_files.get(path)
+            if entry is None or old_signature.get(path) != stamp:
+                entry = scan_header(self.root / path)
+                changed = True
+            files[path] = entry
+        if changed and self.index_path is not None:
+            payload = {"version": INDEX_VERSION, "root": str(self.root),
+                       "signature": signature, "files": files}
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(self.index_path.name + f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+
+        entries: Dict[str, Dict] = {}
+        by_category: Dict[str, List[str]] = {}
+        by_trait: Dict[str, List[str]] = {}
+        # signature 按 CATEGORIES 的顺序排列，同名人物以靠前的分类为主
+        for path, entry in files.items():
+            category, filename = path.split("/", 1)
+            name = filename[:-3]
+            by_category.setdefault(category, []).append(name)
+            if name in entries:
+                entries[name]["categories"].append(category)
+                continue
+            entries[name] = {**entry, "path": path, "category": category, "categories": [category]}
+            for trait in entry["traits"]:
+                by_trait.setdefault(trait, []).append(name)
+        self._entries = entries
+        self._by_category = {category: tuple(names) for category, names in by_category.items()}
+        self._by_trait = {trait: tuple(names) for trait, names in by_trait.items()}
+        self._profiles.clear()
+        return len(entries)
+
+    def _index(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self.build_index()
+        return self._entries
+
+    # ---- 查询 ----
+
+    def __len__(self) -> int:
+        return len(self._index())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index())
+
+    def names(self, category: Optional[str] = None) -> Tuple[str, ...]:
+        """全部人物姓名，或某一分类下的人物姓名"""
+        index = self._index()
+        if category is None:
+            return tuple(index)
+        return self._by_category.get(category, ())
+
+    def categories(self) -> Tuple[str, ...]:
+        """存在档案的分类"""
+        self._index()
+        return tuple(category for category in CATEGORIES if category in self._by_category)
+
+    def entry(self, name: str) -> Dict:
+        """索引中的条目：分类、身份说明、性格特点与档案路径"""
+        try:
+            return self._index()[name]
+        except KeyError:
+            raise KeyError(f"未找到人物：{name}") from None
+
+    def traits(self, name: str) -> Tuple[str, ...]:
+        """人物的性格特点"""
+        return tuple(self.entry(name)["traits"])
+
+    def all_traits(self) -> Tuple[str, ...]:
+        """索引中出现过的全部性格特点"""
+        self._index()
+        return tuple(self._by_trait)
+
+    def with_trait(self, trait: str, partial: bool = False) -> Tuple[str, ...]:
+        """具有某一性格特点的人物；partial 为真时按子串匹配，如“勇”匹配“机智勇敢”"""
+        self._index()
+        if not partial:
+            return self._by_trait.get(trait, ())
+        found: Dict[str, None] = {}
+        for name_trait, names in self._by_trait.items():
+            if trait in name_trait:
+                found.update(dict.fromkeys(names))
+        return tuple(found)
+
+    def profile(self, name: str) -> Dict:
+        """完整档案（首次查询时读取并解析，之后直接返回缓存）"""
+        cached = self._profiles.get(name)
+        if cached is not None:
+            return cached
+        entry = self.entry(name)
+        text = (self.root / entry["path"]).read_text(encoding="utf-8")
+        profile = {"name": name, "category": entry["category"], "categories": list(entry["categories"]),
+                   "path": entry["path"], **parse_profile(text)}
+        self._profiles[name] = profile
+        return profile
+
+    def roster(self, main: Optional[Sequence[str]] = None,
+               supporting: Optional[Sequence[str]] = None) -> Roster:
+        """按分类组成章节生成器的人物名册；分类为空时取全体人物"""
+        def pool(categories: Optional[Sequence[str]]) -> Tuple[str, ...]:
+            if not categories:
+                return self.names()
+            unknown = [category for category in categories if category not in CATEGORIES]
+            if unknown:
+                raise ValueError(f"未知人物分类：{'、'.join(unknown)}")
+            return tuple(dict.fromkeys(name for category in categories for name in self.names(category)))
+
+        roster = Roster(pool(main), pool(supporting))
+        if not roster.main:
+            raise ValueError("人物名册中没有可选的主角")
+        return roster
+
+
+@lru_cache(maxsize=1)
+def default_store() -> CharacterStore:
+    """默认路径的人物资料库，进程内共享"""
+    return CharacterStore()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》人物资料库索引与查询")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="索引文件路径")
+    sub = parser.add_subparsers(dest="command", required=True)
+    index = sub.add_parser("index", help="建立或更新索引并显示统计")
+    index.add_argument("--rebuild", action="store_true", help="忽略已有索引，重新扫描全部档案")
+    listing = sub.add_parser("list", help="列出人物姓名")
+    listing.add_argument("-c", "--category", choices=CATEGORIES, help="只列出某一分类")
+    trait = sub.add_parser("trait", help="按性格特点查找人物")
+    trait.add_argument("trait", help="性格特点，如 机智勇敢")
+    trait.add_argument("-p", "--partial", action="store_true", help="按子串匹配")
+    show = sub.add_parser("show", help="显示人物完整档案")
+    show.add_argument("name", help="人物姓名")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    store = CharacterStore(index_path=Path(args.index))
+    if args.command == "index":
+        count = store.build_index(force=args.rebuild)
+        result = {"characters": count,
+                  "categories": {category: len(store.names(category)) for category in store.categories()},
+                  "traits": len(store.all_traits()),
+                  "index": str(store.index_path)}
+    elif args.command == "list":
+        result = list(store.names(args.category))
+    elif args.command == "trait":
+        result = list(store.with_trait(args.trait, partial=args.partial))
+    else:
+        if args.name not in store:
+            print(f"未找到人物：{args.name}", file=sys.stderr)
+            return 1
+        result = store.profile(args.name)
+    try:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    except BrokenPipeError:
+        sys.stderr.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
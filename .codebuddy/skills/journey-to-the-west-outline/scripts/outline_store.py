@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》100回大纲数据仓库
+解析章节目录一次，提供按回目编号的O(1)查询、阶段区间索引与惰性范围查询
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+REPO_ROOT = SKILLS_DIR.parents[1]
+
+# 目录来源：章节技能的100回目录（含概要），以及仓库根目录的100回组图（含全部回目）
+CHAPTER_CATALOG_PATH = SKILLS_DIR / "journey-to-the-west-chapter" / "references" / "chapter_catalog.md"
+CHAPTER_GALLERY_PATH = REPO_ROOT / "西游记100回.md"
+
+TOTAL_CHAPTERS = 100
+
+# 整体情节阶段，与 generate_overview 的阶段划分一致
+OVERVIEW_STAGES: Tuple[Dict[str, str], ...] = (
+    {
+        "name": "序幕：孙悟空出世与大闹天宫",
+        "range": "第1-7回",
+        "summary": "石猴从花果山出世，拜师学艺得名孙悟空。大闹龙宫地府，偷蟠桃盗仙丹，与天庭大战后被如来佛祖压于五行山下。"
+    },
+    {
+        "name": "引子：取经任务缘起",
+        "range": "第8-12回",
+        "summary": "如来佛祖欲传经东土，观音菩萨寻找取经人。唐僧出身历难，唐太宗还阳后派其西行取经。"
+    },
+    {
+        "name": "开端：取经团队组建",
+        "range": "第13-22回",
+        "summary": "唐僧救出孙悟空，收为徒弟。随后收服白龙马、猪八戒、沙僧，师徒五人正式踏上西行之路。"
+    },
+    {
+        "name": "主体：西行取经历程",
+        "range": "第23-99回",
+        "summary": "师徒历经八十一难，遭遇白骨精、红孩儿、火焰山、狮驼岭等重重考验。降妖除魔中师徒不断磨合成长。"
+    },
+    {
+        "name": "结局：取经圆满成功",
+        "range": "第100回",
+        "summary": "到达灵山取得真经，返回东土传经布道。师徒五人修成正果，受封佛位。"
+    }
+)
+
+# 各阶段的回目区间（闭区间），顺序与 OVERVIEW_STAGES 对应
+STAGE_RANGES: Tuple[Tuple[int, int], ...] = ((1, 7), (8, 12), (13, 22), (23, 99), (100, 100))
+
+# 精选章节的2-3句总结，优先于目录中的简短概要
+CURATED_CHAPTERS: Dict[int, Tuple[str, str]] = {
+    1: ("灵根育孕源流出 心性修持大道生",
+        "花果山石猴出世，发现水帘洞成为美猴王。为求长生出海拜师，得名孙悟空开始修行之路。"),
+    7: ("八卦炉中逃大圣 五行山下定心猿",
+        "孙悟空大闹天宫后被太上老君投入八卦炉。四十九天后跳出，大闹天宫，被如来佛祖压于五行山下。"),
+    14: ("心猿归正 六贼无踪",
+         "唐僧救出孙悟空，为其戴上紧箍咒。孙悟空打死六个强盗，师徒开始建立信任关系。"),
+    22: ("八戒大战流沙河 木叉奉法收悟净",
+         "收服沙僧，取经团队完整。师徒五人正式踏上西行取经之路，开始八十一难历程。"),
+    27: ("尸魔三戏唐三藏 圣僧恨逐美猴王",
+         "白骨精三次变化人形欺骗唐僧。孙悟空三次识破并打死，唐僧误以为滥杀无辜将其逐出师门。"),
+    49: ("三藏有灾沉水宅 观音救难现鱼篮",
+         "师徒过通天河，完成前期磨难。观音菩萨化身渔妇救助，师徒继续西行。"),
+    59: ("唐三藏路阻火焰山 孙行者一调芭蕉扇",
+         "师徒被火焰山阻挡去路。孙悟空向铁扇公主借芭蕉扇灭火，初次借扇被骗得到假扇。"),
+    74: ("长庚传报魔头狠 行者施为变化能",
+         "师徒过狮驼岭，完成中期磨难。孙悟空运用智慧变化，克服强大妖怪阻挠。"),
+    99: ("九九数完魔灭尽 三三行满道归根",
+         "八十一难圆满，取经任务完成。师徒功德圆满，准备到达灵山取得真经。"),
+    100: ("径回东土 五圣成真",
+          "师徒到达灵山取得真经。返回东土传经布道，五人受封佛位修成正果。"),
+}
+
+_CATALOG_ENTRY = re.compile(r"\*\*第(\d+)(?:-(\d+))?回\*\*：(.+?)\s*$")
+_CATALOG_SUMMARY = re.compile(r"^\s*-\s*概要：(.+?)\s*$")
+_GALLERY_TITLE = re.compile(r"^\*\*\*第(\d+)回\s+(.+?)\*\*\*\s*$")
+
+
+class ChapterOutline(NamedTuple):
+    """单回大纲记录"""
+    chapter: int
+    title: str
+    summary: str
+    has_summary: bool
+
+    def as_dict(self) -> Dict:
+        """转换为 generate_chapter_summary 的输出结构"""
+        return {"chapter": self.chapter, "title": self.title, "summary": self.summary}
+
+
+def placeholder_outline(chapter_number: int) -> ChapterOutline:
+    """目录中没有的回目使用的通用占位记录"""
+    return ChapterOutline(
+        chapter_number,
+        f"第{chapter_number}回标题",
+        f"这是《西游记》第{chapter_number}回的简要内容总结。",
+        False,
+    )
+
+
+def _read_lines(path: Path) -> List[str]:
+    """读取文本行，文件不存在时返回空列表"""
+    try:
+        return path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def parse_chapter_catalog(lines: List[str]) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """解析章节目录，返回（回目编号→标题，回目编号→概要）
+
+    “第59-61回”这类合并条目的概要会分配给区间内每一回，标题只记给首回。
+    """
+    titles: Dict[int, str] = {}
+    summaries: Dict[int, str] = {}
+    pending: Optional[Tuple[int, int]] = None
+    for line in lines:
+        entry = _CATALOG_ENTRY.search(line)
+        if entry:
+            start = int(entry.group(1))
+            end = int(entry.group(2) or start)
+            titles.setdefault(start, entry.group(3))
+            pending = (start, end)
+            continue
+        summary = _CATALOG_SUMMARY.match(line)
+        if summary and pending:
+            for chapter in range(pending[0], pending[1] + 1):
+                summaries.setdefault(chapter, summary.group(1))
+            pending = None
+    return titles, summaries
+
+
+def parse_chapter_gallery(lines: List[str]) -> Dict[int, str]:
+    """解析100回组图中的回目标题"""
+    titles: Dict[int, str] = {}
+    for line in lines:
+        match = _GALLERY_TITLE.match(line)
+        if match:
+            titles[int(match.group(1))] = match.group(2)
+    return titles
+
+
+class OutlineStore:
+    """100回大纲仓库：按编号O(1)查询，按阶段区间索引，范围查询惰性产出"""
+
+    def __init__(self, catalog_path: Path = CHAPTER_CATALOG_PATH,
+                 gallery_path: Path = CHAPTER_GALLERY_PATH):
+        catalog_titles, catalog_summaries = parse_chapter_catalog(_read_lines(catalog_path))
+        gallery_titles = parse_chapter_gallery(_read_lines(gallery_path))
+
+        # 下标即回目编号，0号位空置
+        self._chapters: List[Optional[ChapterOutline]] = [None] * (TOTAL_CHAPTERS + 1)
+        for chapter in range(1, TOTAL_CHAPTERS + 1):
+            curated = CURATED_CHAPTERS.get(chapter)
+            title = gallery_titles.get(chapter) or catalog_titles.get(chapter) or (curated and curated[0])
+            summary = (curated and curated[1]) or catalog_summaries.get(chapter)
+            if title is None and summary is None:
+                continue
+            fallback = placeholder_outline(chapter)
+            self._chapters[chapter] = ChapterOutline(
+                chapter, title or fallback.title, summary or fallback.summary, summary is not None
+            )
+
+        self._stage_starts = [start for start, _ in STAGE_RANGES]
+        self._summarized = tuple(o for o in self._chapters if o is not None and o.has_summary)
+
+    def __len__(self) -> int:
+        return sum(1 for outline in self._chapters if outline is not None)
+
+    def get(self, chapter_number: int) -> Optional[ChapterOutline]:
+        """按回目编号查询，超出范围或缺失时返回None"""
+        if 0 < chapter_number <= TOTAL_CHAPTERS:
+            return self._chapters[chapter_number]
+        return None
+
+    def lookup(self, chapter_number: int) -> ChapterOutline:
+        """按回目编号查询，缺失时返回占位记录"""
+        return self.get(chapter_number) or placeholder_outline(chapter_number)
+
+    def stage_index(self, chapter_number: int) -> Optional[int]:
+        """返回回目所在阶段在 OVERVIEW_STAGES 中的下标"""
+        position = bisect_right(self._stage_starts, chapter_number) - 1
+        if position < 0 or chapter_number > STAGE_RANGES[position][1]:
+            return None
+        return position
+
+    def stage_of(self, chapter_number: int) -> Optional[Dict[str, str]]:
+        """返回回目所在的整体情节阶段"""
+        position = self.stage_index(chapter_number)
+        return None if position is None else dict(OVERVIEW_STAGES[position])
+
+    def iter_range(self, start: int, end: int) -> Iterator[ChapterOutline]:
+        """惰性产出第start至第end回（闭区间）的大纲，缺失回目以占位记录补齐"""
+        for chapter in range(max(start, 1), min(end, TOTAL_CHAPTERS) + 1):
+            yield self.lookup(chapter)
+
+    def iter_stage(self, stage: int) -> Iterator[ChapterOutline]:
+        """惰性产出指定阶段内的全部回目"""
+        start, end = STAGE_RANGES[stage]
+        return self.iter_range(start, end)
+
+    def summarized_chapters(self) -> Tuple[ChapterOutline, ...]:
+        """返回带有真实概要的回目"""
+        return self._summarized
+
+
+@lru_cache(maxsize=None)
+def get_outline_store() -> OutlineStore:
+    """获取进程内共享的大纲仓库（首次调用时解析目录）"""
+    return OutlineStore()
@@ -0,0 +1,707 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》世界观实体图谱
+从 references/*.md 与人物资料库 characters/ 目录抽取法宝、妖怪、神佛、地点之间的关系，
+建立持有（holds）、来历（origin）、所在（located_in）、收服（subdued_by）四类邻接索引，
+支持“西牛贺洲妖怪持有的全部法宝”一类的遍历查询，并为世界观生成器提供一致的关系数据
+"""
+
+import argparse
+import json
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+from generate_worldview import (
+    ARTIFACT_CATEGORIES, ARTIFACTS, GEOGRAPHY, MONSTER_ORIGINS, MONSTERS, REALMS,
+    WorldViewGenerator, artifact_record, geography_record, monster_record, realm_record,
+)
+
+SKILL_DIR = Path(__file__).resolve().parent.parent
+REFERENCES_DIR = SKILL_DIR / "references"
+CHARACTERS_DIR = SKILL_DIR.parent / "journey-to-the-west-character" / "references" / "characters"
+
+RELATIONS = ("holds", "origin", "located_in", "subdued_by")
+
+# 人物资料库分类目录 → 实体类型
+CATEGORY_KINDS = {
+    "妖怪魔王": "monster",
+    "妖怪精怪": "monster",
+    "神仙佛祖": "deity",
+    "菩萨罗汉": "deity",
+    "天庭系统": "deity",
+    "西天佛界": "deity",
+    "取经团队": "pilgrim",
+    "凡人": "mortal",
+    "其他": "other",
+}
+
+# 资料中的简称、异名与重复条目 → 规范名称
+ALIASES = {
+    "如来": "如来佛祖",
+    "观音": "观音菩萨",
+    "文殊": "文殊菩萨",
+    "普贤": "普贤菩萨",
+    "老君": "太上老君",
+    "玉帝": "玉皇大帝",
+    "嫦娥仙子": "嫦娥",
+    "大鹏": "金翅大鹏雕",
+    "大鹏金翅雕": "金翅大鹏雕",
+    "青狮": "青毛狮子怪",
+    "白象": "黄牙老象",
+    "黄眉大王": "黄眉怪",
+    "黄眉老佛": "黄眉怪",
+    "老鼠精": "金鼻白毛老鼠精",
+    "狮驼岭三怪": "狮驼岭三妖",
+    "金刚圈": "金刚琢",
+    "如意金箍棒": "金箍棒",
+    "羊脂玉净瓶": "玉净瓶",
+    "后天人种袋": "人种袋",
+    "西天灵山": "灵山",
+    "小雷音": "小雷音寺",
+    "弥勒": "弥勒佛",
+    "玉兔": "玉兔精",
+    "九灵": "九灵元圣",
+    "老寿": "寿星",
+    # 取经人物在回目与概要中的常用称呼（含回目里的丹道隐语：心猿、金公指悟空，木母指八戒，黄婆指沙僧，意马指白龙马）
+    "唐三藏": "唐僧",
+    "三藏": "唐僧",
+    "玄奘": "唐僧",
+    "唐长老": "唐僧",
+    "悟空": "孙悟空",
+    "行者": "孙悟空",
+    "孙行者": "孙悟空",
+    "大圣": "孙悟空",
+    "美猴王": "孙悟空",
+    "猴王": "孙悟空",
+    "心猿": "孙悟空",
+    "金公": "孙悟空",
+    "八戒": "猪八戒",
+    "悟能": "猪八戒",
+    "猪悟能": "猪八戒",
+    "木母": "猪八戒",
+    "悟净": "沙僧",
+    "沙和尚": "沙僧",
+    "黄婆": "沙僧",
+    "小白龙": "白龙马",
+    "意马": "白龙马",
+}
+
+# 取经路线各阶段途经地点所属的部洲（第一阶段在南赡部洲境内，两界山以西属西牛贺洲）
+ROUTE_STAGE_REGIONS = ("南赡部洲", "西牛贺洲", "西牛贺洲", "西牛贺洲")
+
+# 参考文档未写明所属部洲的取经途中山头，按原著补充
+PLACE_REGIONS = {
+    "黑风山": "西牛贺洲",
+    "碗子山": "西牛贺洲",
+    "压龙山": "西牛贺洲",
+    "翠云山": "西牛贺洲",
+    "金兜山": "西牛贺洲",
+    "盘丝岭": "西牛贺洲",
+    "黄花观": "西牛贺洲",
+    "小西天": "西牛贺洲",
+    "陷空山": "西牛贺洲",
+}
+
+# 人物资料中各字段对应的关系
+HOLD_FIELDS = ("法宝", "武器")
+LOCATION_FIELDS = ("居所", "洞府", "地盘", "居住")
+ORIGIN_FIELDS = ("真实身份", "主人", "原主人", "身份", "身份定位", "出身")
+FATE_FIELDS = ("结局", "结局转折")
+ALIAS_FIELDS = ("称号", "别名", "原名")
+# 身份描述中可作为来历的实体类型（结义兄弟、同伙等妖怪不算来历）
+ORIGIN_KINDS = ("deity", "origin")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+_FIELD = re.compile(r"^-\s+\*\*(.+?)\*\*[：:]\s*(.*)$")
+_NESTED = re.compile(r"^\s+-\s+(.+)$")
+_ORDERED = re.compile(r"^\d+\.\s+(.+)$")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_PAREN = re.compile(r"（[^）]*）|\([^)]*\)")
+_SPLIT = re.compile(r"[、，,；;]")
+_PASSIVE = re.compile(r"被([^被，。；]{1,20}?)(?:收服|降服|收为|收回|镇压|打死|消灭|打败|制服)")
+_ACTIVE = re.compile(r"^(.+?)(?:收服|降服)(.+)$")
+_SUBDUES_SELF = re.compile(r"(?:收服|降服)(?:他|她|它)")
+
+
+class _Section:
+    """Markdown 中的一个小节：二级标题、三级标题及其字段"""
+
+    __slots__ = ("h2", "h3", "fields", "ordered")
+
+    def __init__(self, h2: str, h3: str):
+        self.h2 = h2
+        self.h3 = h3
+        self.fields: List[Tuple[str, str, List[str]]] = []
+        self.ordered: List[str] = []
+
+    def get(self, key: str) -> str:
+        for name, value, _ in self.fields:
+            if name == key:
+                return value
+        return ""
+
+
+def parse_sections(text: str) -> List[_Section]:
+    """按标题切分 Markdown：字段为 `- **键**：值`，其下缩进的列表项归入该字段"""
+    sections = [_Section("", "")]
+    h2 = ""
+    for line in text.splitlines():
+        heading = _HEADING.match(line)
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+            if level <= 2:
+                h2 = title if level == 2 else ""
+                sections.append(_Section(h2, ""))
+            elif level == 3:
+                sections.append(_Section(h2, title))
+            continue
+        current = sections[-1]
+        nested = _NESTED.match(line)
+        if nested and current.fields:
+            current.fields[-1][2].append(nested.group(1).strip())
+            continue
+        field = _FIELD.match(line)
+        if field:
+            current.fields.append((field.group(1).strip(), field.group(2).strip(), []))
+            continue
+        ordered = _ORDERED.match(line)
+        if ordered:
+            current.ordered.append(ordered.group(1).strip())
+    return [section for section in sections if section.fields or section.ordered]
+
+
+def split_names(text: str) -> List[str]:
+    """把“紫金红葫芦、玉净瓶、幌金绳等”一类的列举拆成名称列表"""
+    names = []
+    for item in _SPLIT.split(_PAREN.sub("", text)):
+        item = re.sub(r"等.*$", "", item).strip(" 　*")
+        if len(item) >= 2 and item != "无":
+            names.append(item)
+    return names
+
+
+class EntityGraph:
+    """实体图谱：实体类型表与四类关系的正向、反向邻接索引"""
+
+    def __init__(self):
+        self.kinds: Dict[str, str] = {}
+        self.aliases: Dict[str, str] = dict(ALIASES)
+        self._out: Dict[str, Dict[str, Dict[str, None]]] = {relation: {} for relation in RELATIONS}
+        self._in: Dict[str, Dict[str, Dict[str, None]]] = {relation: {} for relation in RELATIONS}
+        self._mention_pattern: Optional[re.Pattern] = None
+        self._within: Dict[Tuple[str, Optional[str]], FrozenSet[str]] = {}
+        self._regions: Dict[str, Tuple[str, ...]] = {}
+        self._held: Dict[Tuple[str, Optional[str]], FrozenSet[str]] = {}
+
+    # ---- 构建 ----
+
+    def resolve(self, name: str) -> str:
+        """返回规范名称（别名换成本名，去掉括注）"""
+        name = _PAREN.sub("", name).strip()
+        return self.aliases.get(name, name)
+
+    def add_entity(self, name: str, kind: str) -> str:
+        """登记实体；已登记的实体保留最先确定的类型"""
+        name = self.resolve(name)
+        if name and name not in self.kinds:
+            self.kinds[name] = kind
+            self._mention_pattern = None
+        return name
+
+    def add_alias(self, alias: str, name: str):
+        """登记别名；与已有实体或别名冲突时忽略"""
+        alias = alias.strip()
+        if len(alias) >= 3 and alias not in self.kinds and alias not in self.aliases:
+            self.aliases[alias] = name
+            self._mention_pattern = None
+
+    def add_edge(self, source: str, relation: str, target: str):
+        """添加一条关系边，同时写入反向索引"""
+        if not source or not target or source == target:
+            return
+        self._out[relation].setdefault(source, {})[target] = None
+        self._in[relation].setdefault(target, {})[source] = None
+        self._within.clear()
+        self._regions.clear()
+        self._held.clear()
+
+    def mentions(self, text: str, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        """按出现顺序返回文本中提到的已登记实体（可限定类型）"""
+        if self._mention_pattern is None:
+            names = sorted((name for name in (*self.kinds, *self.aliases) if len(name) >= 2),
+                           key=len, reverse=True)
+            self._mention_pattern = re.compile("|".join(map(re.escape, names)))
+        wanted = frozenset(kinds) if kinds is not None else None
+        found: Dict[str, None] = {}
+        for match in self._mention_pattern.finditer(text):
+            name = self.resolve(match.group(0))
+            if wanted is None or self.kinds.get(name) in wanted:
+                found[name] = None
+        return list(found)
+
+    def subduers(self, text: str) -> List[str]:
+        """从“被观音菩萨收为善财童子”一类的描述中找出收服者"""
+        result: Dict[str, None] = {}
+        for match in _PASSIVE.finditer(text):
+            for name in self.mentions(match.group(1)) or split_names(match.group(1)):
+                result[self.resolve(name)] = None
+        return list(result)
+
+    # ---- 查询 ----
+
+    def kind(self, name: str) -> Optional[str]:
+        """实体类型，未登记时为 None"""
+        return self.kinds.get(self.resolve(name))
+
+    def entities(self, kind: Optional[str] = None) -> List[str]:
+        """全部实体名称（可限定类型）"""
+        return [name for name, entity_kind in self.kinds.items() if kind is None or entity_kind == kind]
+
+    def neighbors(self, name: str, relation: str) -> Tuple[str, ...]:
+        """正向邻居：name 持有的法宝、name 的来历、所在地、收服者"""
+        return tuple(self._out[relation].get(self.resolve(name), ()))
+
+    def inverse(self, name: str, relation: str) -> Tuple[str, ...]:
+        """反向邻居：法宝的持有者、来历为 name 的实体、位于 name 的实体、被 name 收服者"""
+        return tuple(self._in[relation].get(self.resolve(name), ()))
+
+    def holders(self, artifact: str) -> Tuple[str, ...]:
+        """法宝的持有者"""
+        return self.inverse(artifact, "holds")
+
+    def within(self, place: str, kind: Optional[str] = None) -> FrozenSet[str]:
+        """位于 place 之内（沿所在关系逐层包含）的全部实体，结果按（地点, 类型）缓存"""
+        place = self.resolve(place)
+        key = (place, kind)
+        cached = self._within.get(key)
+        if cached is not None:
+            return cached
+        located_in = self._in["located_in"]
+        seen = {place}
+        stack = [place]
+        while stack:
+            for child in located_in.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        seen.discard(place)
+        if kind is not None:
+            seen = {name for name in seen if self.kinds.get(name) == kind}
+        result = self._within[key] = frozenset(seen)
+        return result
+
+    def regions(self, name: str) -> Tuple[str, ...]:
+        """实体沿所在关系向上可达的部洲与三界"""
+        name = self.resolve(name)
+        cached = self._regions.get(name)
+        if cached is not None:
+            return cached
+        located_in = self._out["located_in"]
+        found: Dict[str, None] = {}
+        seen = {name}
+        queue = [name]
+        for current in queue:
+            for parent in located_in.get(current, ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    queue.append(parent)
+                    if self.kinds.get(parent) in ("region", "realm"):
+                        found[parent] = None
+        result = self._regions[name] = tuple(found)
+        return result
+
+    def artifacts_held_in(self, place: str, kind: Optional[str] = "monster") -> FrozenSet[str]:
+        """位于 place 之内的某类实体持有的全部法宝，如西牛贺洲妖怪的法宝（结果缓存）"""
+        key = (self.resolve(place), kind)
+        cached = self._held.get(key)
+        if cached is not None:
+            return cached
+        holds = self._out["holds"]
+        result = set()
+        for holder in self.within(place, kind):
+            result.update(holds.get(holder, ()))
+        result = self._held[key] = frozenset(result)
+        return result
+
+    def edges(self, relation: Optional[str] = None) -> Iterator[Tuple[str, str, str]]:
+        """遍历全部关系边（起点, 关系, 终点）"""
+        for name in (relation,) if relation else RELATIONS:
+            for source, targets in self._out[name].items():
+                for target in targets:
+                    yield source, name, target
+
+    def describe(self, name: str) -> Dict:
+        """单个实体的全部关系，供命令行与生成器使用"""
+        name = self.resolve(name)
+        return {
+            "name": name,
+            "kind": self.kinds.get(name),
+            "regions": list(self.regions(name)),
+            **{relation: list(self.neighbors(name, relation)) for relation in RELATIONS},
+            **{f"{relation}_of": list(self.inverse(name, relation)) for relation in RELATIONS},
+        }
+
+    def stats(self) -> Dict:
+        """实体与关系数量统计"""
+        kinds: Dict[str, int] = {}
+        for kind in self.kinds.values():
+            kinds[kind] = kinds.get(kind, 0) + 1
+        return {
+            "entities": len(self.kinds),
+            "kinds": dict(sorted(kinds.items())),
+            "edges": {relation: sum(len(targets) for targets in self._out[relation].values())
+                      for relation in RELATIONS},
+        }
+
+
+def _read_sections(path: Path) -> List[_Section]:
+    return parse_sections(path.read_text(encoding="utf-8"))
+
+
+def _character_files(characters_dir: Path) -> List[Tuple[str, Path]]:
+    return [(category, path)
+            for category in CATEGORY_KINDS
+            for path in sorted((characters_dir / category).glob("*.md"))]
+
+
+def _register_catalog(graph: EntityGraph):
+    """世界观生成器的目录数据：三界与场所、四大部洲、妖怪来历与法宝"""
+    for realm, locations in REALMS.items():
+        graph.add_entity(realm, "realm")
+        for location in locations:
+            graph.add_entity(location, "place")
+    for region in GEOGRAPHY["四大部洲"]:
+        graph.add_entity(region, "region")
+    for place in GEOGRAPHY["名山大川"]:
+        graph.add_entity(place, "place")
+    for origin, names in MONSTERS.items():
+        graph.add_entity(origin, "origin")
+        for name in names:
+            graph.add_entity(name, "monster")
+    for names in ARTIFACTS.values():
+        for name in names:
+            graph.add_entity(name, "artifact")
+    for place in PLACE_REGIONS:
+        graph.add_entity(place, "place")
+
+
+def _link_catalog(graph: EntityGraph):
+    for realm, locations in REALMS.items():
+        for location in locations:
+            graph.add_edge(graph.resolve(location), "located_in", realm)
+    for region in GEOGRAPHY["四大部洲"]:
+        graph.add_edge(region, "located_in", "人界")
+    for origin, names in MONSTERS.items():
+        for name in names:
+            graph.add_edge(graph.resolve(name), "origin", origin)
+    for place, region in PLACE_REGIONS.items():
+        graph.add_edge(place, "located_in", region)
+
+
+def _register_references(graph: EntityGraph, references: Dict[str, List[_Section]]):
+    """先登记各参考文档中的实体，关系在全部实体登记完成后再建立"""
+    for section in references.get("realms", ()):
+        if section.h2 in REALMS:
+            for _, _, children in section.fields:
+                for child in children:
+                    graph.add_entity(child.split("：")[0].split(":")[0], "place")
+    for section in references.get("geography", ()):
+        if section.h2 == "四大部洲" and section.h3:
+            graph.add_entity(section.h3, "region")
+            for child in next((children for key, _, children in section.fields if key == "著名地点"), ()):
+                for name in split_names(child.split("：")[0]):
+                    graph.add_entity(name, "place")
+        elif section.h2 == "取经路线":
+            for item in section.ordered:
+                for bold in _BOLD.findall(item):
+                    graph.add_entity(re.sub(r"出发$", "", bold), "place")
+        elif section.h2 == "著名地点" and section.h3:
+            graph.add_entity(section.h3, "place")
+            for name in split_names(section.get("妖王")):
+                graph.add_entity(name, "monster")
+    for section in references.get("monsters", ()):
+        if section.h2 == "著名妖怪" and section.h3:
+            for name in split_names(section.h3):
+                graph.add_entity(name, "monster")
+            for name in split_names(section.get("法宝")):
+                graph.add_entity(name, "artifact")
+            for name in split_names(section.get("居住")):
+                graph.add_entity(name, "place")
+    for section in references.get("artifacts", ()):
+        if section.h2 == "著名法宝" and section.h3:
+            graph.add_entity(section.h3, "artifact")
+
+
+def _link_place(graph: EntityGraph, entity: str, text: str):
+    """把“黄风岭黄风洞”一类的住处登记为地点，并挂到其中提到的已知地点之下"""
+    text = _PAREN.sub("", text).replace("，", "").replace(",", "").strip()
+    if len(text) < 2 or text.startswith("无"):
+        return
+    place = graph.resolve(text)
+    if graph.kind(place) not in (None, "place", "region", "realm"):
+        return
+    # 取住处名称中包含的最长已知地点作为上级，如“黄风岭黄风洞”挂在黄风岭之下
+    parents = [name for name, kind in graph.kinds.items()
+               if kind in ("place", "region", "realm") and name != place and name in text]
+    graph.add_entity(place, "place")
+    graph.add_edge(entity, "located_in", place)
+    if parents:
+        graph.add_edge(place, "located_in", max(parents, key=len))
+
+
+def _link_references(graph: EntityGraph, references: Dict[str, List[_Section]]):
+    for section in references.get("realms", ()):
+        if section.h2 in REALMS:
+            for _, _, children in section.fields:
+                for child in children:
+                    graph.add_edge(graph.resolve(child.split("：")[0].split(":")[0]), "located_in", section.h2)
+
+    stage = 0
+    for section in references.get("geography", ()):
+        if section.h2 == "四大部洲" and section.h3:
+            for child in next((children for key, _, children in section.fields if key == "著名地点"), ()):
+                for name in split_names(child.split("：")[0]):
+                    graph.add_edge(graph.resolve(name), "located_in", section.h3)
+        elif section.h2 == "取经路线":
+            region = ROUTE_STAGE_REGIONS[min(stage, len(ROUTE_STAGE_REGIONS) - 1)]
+            stage += 1
+            for item in section.ordered:
+                places = [graph.resolve(re.sub(r"出发$", "", bold)) for bold in _BOLD.findall(item)]
+                for place in places:
+                    if not graph.regions(place):
+                        graph.add_edge(place, "located_in", region)
+                # 路线条目中提到的妖怪视为盘踞在该地点
+                description = _BOLD.sub("", item)
+                for monster in graph.mentions(description, ("monster",)):
+                    if places and not graph.neighbors(monster, "located_in"):
+                        graph.add_edge(monster, "located_in", places[0])
+        elif section.h2 == "著名地点" and section.h3:
+            place = graph.resolve(section.h3)
+            parents = graph.mentions(section.get("位置"), ("place", "region", "realm"))
+            if parents:
+                graph.add_edge(place, "located_in", parents[-1])
+            for name in split_names(section.get("妖王")):
+                graph.add_edge(graph.resolve(name), "located_in", place)
+            active = _ACTIVE.match(section.get("结局"))
+            if active:
+                for target in graph.mentions(active.group(2)):
+                    for subduer in graph.mentions(active.group(1)):
+                        graph.add_edge(target, "subdued_by", subduer)
+
+    for section in references.get("monsters", ()):
+        if section.h2 == "著名妖怪" and section.h3:
+            for name in map(graph.resolve, split_names(section.h3)):
+                for artifact in split_names(section.get("法宝")):
+                    graph.add_edge(name, "holds", graph.resolve(artifact))
+                for place in split_names(section.get("居住")):
+                    _link_place(graph, name, place)
+                for subduer in graph.subduers(section.get("结局")):
+                    graph.add_edge(name, "subdued_by", subduer)
+                origins = graph.mentions(section.get("身份"), ORIGIN_KINDS)
+                if origins:
+                    graph.add_edge(name, "origin", origins[0])
+
+    for section in references.get("artifacts", ()):
+        if section.h2 == "著名法宝" and section.h3:
+            artifact = graph.resolve(section.h3)
+            holder_text = section.get("持有者")
+            for former in re.findall(r"[（(]原属(.+?)[）)]", holder_text):
+                for name in graph.mentions(former):
+                    graph.add_edge(artifact, "origin", name)
+            for name in graph.mentions(_PAREN.sub("", holder_text)):
+                graph.add_edge(name, "holds", artifact)
+            origins = graph.mentions(section.get("来源"))
+            if origins:
+                graph.add_edge(artifact, "origin", origins[0])
+
+
+def _link_character(graph: EntityGraph, name: str, sections: List[_Section]):
+    kind = graph.kind(name)
+    places: Dict[str, None] = {}
+    for section in sections:
+        relations = section.h2.endswith("人物关系")
+        for key, value, _ in section.fields:
+            if relations:
+                other = graph.resolve(key)
+                if other in graph.kinds and _SUBDUES_SELF.search(value):
+                    graph.add_edge(name, "subdued_by", other)
+                for subduer in graph.subduers(value):
+                    if other in graph.kinds:
+                        graph.add_edge(other, "subdued_by", subduer)
+            elif key in HOLD_FIELDS:
+                for artifact in split_names(value):
+                    artifact = graph.add_entity(artifact, "artifact")
+                    if graph.kind(artifact) == "artifact":
+                        graph.add_edge(name, "holds", artifact)
+            elif key in LOCATION_FIELDS:
+                for place in _PAREN.sub("", value).split("、"):
+                    _link_place(graph, name, re.sub(r"附近$", "", place.split("，")[0]))
+            elif key == "收服者":
+                for subduer in split_names(value):
+                    graph.add_edge(name, "subdued_by", graph.add_entity(subduer, "other"))
+            elif key in FATE_FIELDS:
+                for subduer in graph.subduers(value):
+                    graph.add_edge(name, "subdued_by", subduer)
+            elif key in ORIGIN_FIELDS and kind == "monster":
+                # 身份描述中的人物作为来历，地点作为所在地的候补（如“狮驼岭小妖”）
+                for other in graph.mentions(value):
+                    if other == name:
+                        continue
+                    if graph.kind(other) in ("place", "region", "realm"):
+                        places.setdefault(other, None)
+                    elif graph.kind(other) in ORIGIN_KINDS and not graph.neighbors(name, "origin"):
+                        graph.add_edge(name, "origin", other)
+    if not graph.neighbors(name, "located_in"):
+        for place in places:
+            graph.add_edge(name, "located_in", place)
+
+
+def build_graph(references_dir: Path = REFERENCES_DIR,
+                characters_dir: Optional[Path] = CHARACTERS_DIR) -> EntityGraph:
+    """从参考文档与人物资料库构建实体图谱"""
+    graph = EntityGraph()
+    characters: List[Tuple[str, List[_Section]]] = []
+    if characters_dir is not None and characters_dir.is_dir():
+        for category, path in _character_files(characters_dir):
+            sections = _read_sections(path)
+            characters.append((graph.add_entity(path.stem, CATEGORY_KINDS[category]), sections))
+
+    _register_catalog(graph)
+    references = {path.stem: _read_sections(path) for path in sorted(references_dir.glob("*.md"))}
+    _register_references(graph, references)
+
+    # 称号、别名在全部实体登记后再加入；“文殊菩萨坐骑”一类含有其他实体名的描述不作别名
+    aliases = [(alias, name)
+               for name, sections in characters
+               for section in sections
+               for key, value, _ in section.fields if key in ALIAS_FIELDS
+               for alias in split_names(value)]
+    for alias, name in [(alias, name) for alias, name in aliases if not graph.mentions(alias)]:
+        graph.add_alias(alias, name)
+
+    _link_catalog(graph)
+    _link_references(graph, references)
+    for name, sections in characters:
+        _link_character(graph, name, sections)
+    return graph
+
+
+@lru_cache(maxsize=1)
+def default_graph() -> EntityGraph:
+    """按默认资料路径构建的图谱，进程内只构建一次"""
+    return build_graph()
+
+
+class GraphWorldViewGenerator(WorldViewGenerator):
+    """使用实体图谱填充持有者、结局等关系字段的世界观生成器
+
+    随机抽取过程与 WorldViewGenerator 完全相同，相同种子抽到相同的条目，
+    只是关系字段改由图谱给出，彼此一致。
+    """
+
+    def __init__(self, rng=None, seed=None, graph: Optional[EntityGraph] = None):
+        super().__init__(rng=rng, seed=seed)
+        self.graph = graph if graph is not None else default_graph()
+        # 名称 → 所属目录分组的反查表（按妖怪、法宝、地理、三界的顺序匹配），构造后只读，可供多线程共用
+        self._catalog_lookup = (
+            ("monster", _invert(self.monsters), self.monster_snippet),
+            ("artifact", _invert(self.artifacts), self.artifact_snippet),
+            ("geography", _invert(self.geography), geography_record),
+            ("realm", _invert(self.realms), realm_record),
+        )
+
+    def monster_snippet(self, origin: str, monster: str) -> Dict:
+        """妖怪故事记录，结局、所在部洲与法宝取自图谱"""
+        record = monster_record(origin, monster)
+        subduers = self.graph.neighbors(monster, "subdued_by")
+        if subduers:
+            record["fate"] = f"被{'、'.join(subduers)}降服"
+        record["regions"] = list(self.graph.regions(monster))
+        record["artifacts"] = list(self.graph.neighbors(monster, "holds"))
+        return record
+
+    def artifact_snippet(self, category: str, artifact: str) -> Dict:
+        """法宝信息记录，持有者与来历取自图谱"""
+        record = artifact_record(category, artifact)
+        holders = self.graph.holders(artifact)
+        record["holder"] = "、".join(holders) if holders else "未知"
+        record["origin"] = list(self.graph.neighbors(artifact, "origin"))
+        return record
+
+    def generate_monster_story(self):
+        """生成妖怪故事（结局、所在部洲与法宝取自图谱）"""
+        origin = self.rng.choice(MONSTER_ORIGINS)
+        return self.monster_snippet(origin, self.rng.choice(self.monsters[origin]))
+
+    def generate_artifact_info(self):
+        """生成法宝信息（持有者与来历取自图谱）"""
+        category = self.rng.choice(ARTIFACT_CATEGORIES)
+        return self.artifact_snippet(category, self.rng.choice(self.artifacts[category]))
+
+    def snippet_for(self, name: str) -> Tuple[str, Dict]:
+        """某一实体对应的世界观片段（类别, 记录），不消耗随机数
+
+        目录中有的妖怪、法宝、地点与三界场所给出与 generate_worldview_snippet 相同结构的记录，
+        其余实体给出图谱中的关系（describe）。
+        """
+        name = self.graph.resolve(name)
+        for category, groups, build in self._catalog_lookup:
+            group = groups.get(name)
+            if group is not None:
+                return category, build(group, name)
+        return "entity", self.graph.describe(name)
+
+
+def _invert(catalog: Dict[str, Iterable[str]]) -> Dict[str, str]:
+    """{分组: 名称列表} → {名称: 分组}"""
+    return {name: group for group, names in catalog.items() for name in names}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》世界观实体图谱")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="实体与关系数量统计")
+    show = sub.add_parser("show", help="显示单个实体的全部关系")
+    show.add_argument("name", help="实体名称（可用别名）")
+    held = sub.add_parser("held-in", help="某地之内某类实体持有的法宝")
+    held.add_argument("place", help="地点、部洲或三界名称，如 西牛贺洲")
+    held.add_argument("-k", "--kind", default="monster", help="持有者类型（默认 monster，all 为不限）")
+    within = sub.add_parser("within", help="某地之内的实体")
+    within.add_argument("place", help="地点、部洲或三界名称")
+    within.add_argument("-k", "--kind", help="限定实体类型")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    graph = default_graph()
+    if args.command == "stats":
+        result = graph.stats()
+    elif args.command == "show":
+        if graph.kind(args.name) is None:
+            print(f"未找到实体：{args.name}", file=sys.stderr)
+            return 1
+        result = graph.describe(args.name)
+    elif args.command == "held-in":
+        kind = None if args.kind == "all" else args.kind
+        # 只列出同在该地之内、属于该类型的持有者，与选出法宝的范围一致
+        members = graph.within(args.place, kind)
+        result = {artifact: [holder for holder in graph.holders(artifact) if holder in members]
+                  for artifact in sorted(graph.artifacts_held_in(args.place, kind))}
+    else:
+        result = sorted(graph.within(args.place, args.kind))
+    try:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    except BrokenPipeError:
+        sys.stderr.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
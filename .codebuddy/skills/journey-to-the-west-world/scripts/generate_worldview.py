@@ -6,185 +6,281 @@
 
 import random
 import json
+from types import MappingProxyType
+
+def _freeze(value):
+    """递归冻结目录数据：dict 转为只读映射，list 转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# 共享目录数据：模块级只读结构，所有生成器实例共用，生成过程中从不修改
+REALMS = _freeze({
+    "天界": ["灵霄宝殿", "瑶池", "兜率宫", "斗牛宫", "南天门", "三十三重天"],
+    "地界": ["地府", "阎罗殿", "十八层地狱", "奈何桥", "忘川河", "鬼门关"],
+    "人界": ["东土大唐", "西天灵山", "花果山", "高老庄", "流沙河", "火焰山"]
+})
+
+DEITIES = _freeze({
+    "道教": ["三清", "四御", "五方五老", "六司", "七元", "八极", "九曜", "十都"],
+    "佛教": ["佛", "菩萨", "罗汉", "金刚", "护法神"],
+    "散仙": ["山神", "土地", "城隍", "河神"]
+})
+
+MONSTERS = _freeze({
+    "天生妖怪": ["孙悟空", "红孩儿"],
+    "修炼成精": ["狐狸精", "蛇精", "虎精", "树精"],
+    "神仙下凡": ["猪八戒", "沙僧", "青牛精", "金角大王"]
+})
+
+ARTIFACTS = _freeze({
+    "攻击型": ["金箍棒", "九齿钉耙", "降妖宝杖"],
+    "防御型": ["锦斓袈裟", "紫金铃"],
+    "困敌型": ["幌金绳", "人种袋", "紫金红葫芦"]
+})
+
+CULTIVATION_LEVELS = (
+    "凡人", "炼气期", "筑基期", "金丹期", "元婴期", "化神期",
+    "炼虚期", "合体期", "大乘期", "渡劫期", "仙人"
+)
+
+GEOGRAPHY = _freeze({
+    "四大部洲": ["东胜神洲", "西牛贺洲", "南赡部洲", "北俱芦洲"],
+    "名山大川": ["昆仑山", "峨眉山", "五台山", "蓬莱岛", "花果山"]
+})
+
+REALM_DESCRIPTIONS = _freeze({
+    "天界": "位于人界之上的神圣领域，{location}是其中重要的场所。",
+    "地界": "位于人界之下的幽冥世界，{location}是亡魂必经之地。",
+    "人界": "位于天界与地界之间，{location}是故事发生的重要地点。"
+})
+
+DEITY_DUTIES = _freeze({
+    "三清": "道教最高神，生于太元之先",
+    "四御": "协助玉帝管理三界",
+    "佛": "佛教最高领袖，觉悟圆满",
+    "菩萨": "自觉觉他，救苦救难",
+    "山神": "掌管名山大川，守护一方"
+})
+
+MONSTER_STORIES = _freeze({
+    "孙悟空": "由仙石孕育而生，拜师菩提祖师，学会七十二变和筋斗云。",
+    "红孩儿": "牛魔王与铁扇公主之子，修炼三昧真火，后被观音收服。",
+    "猪八戒": "原为天蓬元帅，因调戏嫦娥被贬下凡，错投猪胎。",
+    "狐狸精": "修炼千年的狐狸，擅长变化和迷惑人心。"
+})
+
+SUBDUED_MONSTERS = frozenset(["孙悟空", "红孩儿", "猪八戒"])
+
+ARTIFACT_INFO = _freeze({
+    "金箍棒": "原为定海神针，重一万三千五百斤，可大小如意。",
+    "九齿钉耙": "太上老君炼制，玉帝赐予天蓬元帅，重五千零四十八斤。",
+    "紫金红葫芦": "喊人名字，答应即被吸入，一时三刻化为脓血。",
+    "幌金绳": "可捆仙缚妖，念动咒语即自动捆绑。"
+})
+
+GEOGRAPHY_FEATURES = _freeze({
+    "东胜神洲": "多仙山福地，灵气浓郁，孙悟空的花果山即位于此。",
+    "西牛贺洲": "佛教兴盛，如来佛祖的灵山位于此洲。",
+    "昆仑山": "万山之祖，神仙居所，充满神秘色彩。",
+    "花果山": "十洲之祖脉，三岛之来龙，孙悟空出生地。"
+})
+
+CULTIVATION_DIFFICULTIES = ("容易", "中等", "困难", "极难")
+
+CULTIVATION_CHALLENGES = ("筑基", "结丹", "元婴", "化神", "渡劫")
+
+SNIPPET_CATEGORIES = ("realm", "deity", "monster", "artifact", "cultivation", "geography")
+
+# 预计算的类别键列表，避免每次调用都 list(dict.keys())
+REALM_KEYS = tuple(REALMS)
+DEITY_SYSTEMS = tuple(DEITIES)
+MONSTER_ORIGINS = tuple(MONSTERS)
+ARTIFACT_CATEGORIES = tuple(ARTIFACTS)
+GEOGRAPHY_REGIONS = tuple(GEOGRAPHY)
+
+
+# 由抽取结果构造输出记录；逐个生成与批量生成（worldview_batch）共用
+def realm_record(realm, location):
+    """三界描述记录"""
+    return {
+        "realm": realm,
+        "location": location,
+        "description": REALM_DESCRIPTIONS[realm].format(location=location),
+        "time_rule": "天上一日，地上一年" if realm == "天界" else "正常时间流速"
+    }
+
+
+def deity_record(system, rank):
+    """神仙档案记录"""
+    return {
+        "system": system,
+        "rank": rank,
+        "duty": DEITY_DUTIES.get(rank) or f"{system}中的{rank}，承担相应职责",
+        "residence": "天界" if system in ("道教", "佛教") else "人界"
+    }
+
+
+def monster_record(origin, monster):
+    """妖怪故事记录"""
+    return {
+        "origin": origin,
+        "name": monster,
+        "story": MONSTER_STORIES.get(monster) or f"一只{origin}，在《西游记》中有精彩表现。",
+        "fate": "被收服" if monster in SUBDUED_MONSTERS else "被消灭"
+    }
+
+
+def artifact_record(category, artifact):
+    """法宝信息记录"""
+    return {
+        "category": category,
+        "name": artifact,
+        "description": ARTIFACT_INFO.get(artifact) or f"一件{category}法宝，在战斗中发挥重要作用。",
+        "holder": "孙悟空" if artifact == "金箍棒" else "未知"
+    }
+
+
+def cultivation_record(start_level, end_level, time_required, difficulty):
+    """修炼路径记录"""
+    return {
+        "path": list(CULTIVATION_LEVELS[start_level:end_level+1]),
+        "start": CULTIVATION_LEVELS[start_level],
+        "end": CULTIVATION_LEVELS[end_level],
+        "difficulty": difficulty,
+        "time_required": f"{time_required}年",
+        "key_challenges": CULTIVATION_CHALLENGES
+    }
+
+
+def geography_record(region, place):
+    """地理特征记录"""
+    return {
+        "region": region,
+        "place": place,
+        "description": GEOGRAPHY_FEATURES.get(place) or f"{region}中的{place}，在《西游记》中有重要地位。",
+        "significance": "重要地点" if place in GEOGRAPHY_FEATURES else "普通地点"
+    }
+
 
 class WorldViewGenerator:
     """世界观生成器"""
     
-    def __init__(self):
-        self.realms = {
-            "天界": ["灵霄宝殿", "瑶池", "兜率宫", "斗牛宫", "南天门", "三十三重天"],
-            "地界": ["地府", "阎罗殿", "十八层地狱", "奈何桥", "忘川河", "鬼门关"],
-            "人界": ["东土大唐", "西天灵山", "花果山", "高老庄", "流沙河", "火焰山"]
-        }
-        
-        self.deities = {
-            "道教": ["三清", "四御", "五方五老", "六司", "七元", "八极", "九曜", "十都"],
-            "佛教": ["佛", "菩萨", "罗汉", "金刚", "护法神"],
-            "散仙": ["山神", "土地", "城隍", "河神"]
-        }
+    def __init__(self, rng=None, seed=None):
+        # rng 与 seed 均为空时沿用全局 random 模块；并行生成时每个工作进程传入独立的 random.Random
+        if seed is not None:
+            if rng is not None:
+                raise ValueError("rng 与 seed 只能指定其一")
+            rng = random.Random(seed)
+        self.rng = rng if rng is not None else random
         
-        self.monsters = {
-            "天生妖怪": ["孙悟空", "红孩儿"],
-            "修炼成精": ["狐狸精", "蛇精", "虎精", "树精"],
-            "神仙下凡": ["猪八戒", "沙僧", "青牛精", "金角大王"]
-        }
-        
-        self.artifacts = {
-            "攻击型": ["金箍棒", "九齿钉耙", "降妖宝杖"],
-            "防御型": ["锦斓袈裟", "紫金铃"],
-            "困敌型": ["幌金绳", "人种袋", "紫金红葫芦"]
-        }
+        # 目录数据为模块级只读结构，实例之间共享
+        self.realms = REALMS
+        self.deities = DEITIES
+        self.monsters = MONSTERS
+        self.artifacts = ARTIFACTS
+        self.cultivation_levels = CULTIVATION_LEVELS
+        self.geography = GEOGRAPHY
         
-        self.cultivation_levels = [
-            "凡人", "炼气期", "筑基期", "金丹期", "元婴期", "化神期",
-            "炼虚期", "合体期", "大乘期", "渡劫期", "仙人"
-        ]
-        
-        self.geography = {
-            "四大部洲": ["东胜神洲", "西牛贺洲", "南赡部洲", "北俱芦洲"],
-            "名山大川": ["昆仑山", "峨眉山", "五台山", "蓬莱岛", "花果山"]
+        # 片段类别到生成方法的分派表，每个实例只构建一次
+        self._snippet_generators = {
+            "realm": self.generate_realm_description,
+            "deity": self.generate_deity_profile,
+            "monster": self.generate_monster_story,
+            "artifact": self.generate_artifact_info,
+            "cultivation": self.generate_cultivation_path,
+            "geography": self.generate_geography_feature
         }
     
+    def _fork_rng(self, seed):
+        """以 seed 派生独立的随机数流，与本生成器的 rng 同类（WeightedRandom 沿用其权重表）"""
+        fork = getattr(self.rng, "fork", None)
+        return fork(seed) if fork is not None else random.Random(seed)
+    
     def generate_realm_description(self):
         """生成三界描述"""
-        realm = random.choice(list(self.realms.keys()))
-        location = random.choice(self.realms[realm])
-        
-        descriptions = {
-            "天界": f"位于人界之上的神圣领域，{location}是其中重要的场所。",
-            "地界": f"位于人界之下的幽冥世界，{location}是亡魂必经之地。",
-            "人界": f"位于天界与地界之间，{location}是故事发生的重要地点。"
-        }
-        
-        return {
-            "realm": realm,
-            "location": location,
-            "description": descriptions[realm],
-            "time_rule": "天上一日，地上一年" if realm == "天界" else "正常时间流速"
-        }
+        realm = self.rng.choice(REALM_KEYS)
+        location = self.rng.choice(self.realms[realm])
+        return realm_record(realm, location)
     
     def generate_deity_profile(self):
         """生成神仙档案"""
-        system = random.choice(list(self.deities.keys()))
-        rank = random.choice(self.deities[system])
-        
-        duties = {
-            "三清": "道教最高神，生于太元之先",
-            "四御": "协助玉帝管理三界",
-            "佛": "佛教最高领袖，觉悟圆满",
-            "菩萨": "自觉觉他，救苦救难",
-            "山神": "掌管名山大川，守护一方"
-        }
-        
-        duty = duties.get(rank, f"{system}中的{rank}，承担相应职责")
-        
-        return {
-            "system": system,
-            "rank": rank,
-            "duty": duty,
-            "residence": "天界" if system in ["道教", "佛教"] else "人界"
-        }
+        system = self.rng.choice(DEITY_SYSTEMS)
+        rank = self.rng.choice(self.deities[system])
+        return deity_record(system, rank)
     
     def generate_monster_story(self):
         """生成妖怪故事"""
-        origin = random.choice(list(self.monsters.keys()))
-        monster = random.choice(self.monsters[origin])
-        
-        stories = {
-            "孙悟空": "由仙石孕育而生，拜师菩提祖师，学会七十二变和筋斗云。",
-            "红孩儿": "牛魔王与铁扇公主之子，修炼三昧真火，后被观音收服。",
-            "猪八戒": "原为天蓬元帅，因调戏嫦娥被贬下凡，错投猪胎。",
-            "狐狸精": "修炼千年的狐狸，擅长变化和迷惑人心。"
-        }
-        
-        story = stories.get(monster, f"一只{origin}，在《西游记》中有精彩表现。")
-        
-        return {
-            "origin": origin,
-            "name": monster,
-            "story": story,
-            "fate": "被收服" if monster in ["孙悟空", "红孩儿", "猪八戒"] else "被消灭"
-        }
+        origin = self.rng.choice(MONSTER_ORIGINS)
+        monster = self.rng.choice(self.monsters[origin])
+        return monster_record(origin, monster)
     
     def generate_artifact_info(self):
         """生成法宝信息"""
-        category = random.choice(list(self.artifacts.keys()))
-        artifact = random.choice(self.artifacts[category])
-        
-        info = {
-            "金箍棒": "原为定海神针，重一万三千五百斤，可大小如意。",
-            "九齿钉耙": "太上老君炼制，玉帝赐予天蓬元帅，重五千零四十八斤。",
-            "紫金红葫芦": "喊人名字，答应即被吸入，一时三刻化为脓血。",
-            "幌金绳": "可捆仙缚妖，念动咒语即自动捆绑。"
-        }
-        
-        description = info.get(artifact, f"一件{category}法宝，在战斗中发挥重要作用。")
-        
-        return {
-            "category": category,
-            "name": artifact,
-            "description": description,
-            "holder": "孙悟空" if artifact == "金箍棒" else "未知"
-        }
+        category = self.rng.choice(ARTIFACT_CATEGORIES)
+        artifact = self.rng.choice(self.artifacts[category])
+        return artifact_record(category, artifact)
     
     def generate_cultivation_path(self):
         """生成修炼路径"""
-        start_level = random.randint(0, 3)
-        end_level = random.randint(7, 10)
-        
-        path = self.cultivation_levels[start_level:end_level+1]
-        
-        difficulties = ["容易", "中等", "困难", "极难"]
-        time_required = random.randint(10, 1000)  # 年
-        
-        return {
-            "path": path,
-            "start": self.cultivation_levels[start_level],
-            "end": self.cultivation_levels[end_level],
-            "difficulty": random.choice(difficulties),
-            "time_required": f"{time_required}年",
-            "key_challenges": ["筑基", "结丹", "元婴", "化神", "渡劫"]
-        }
+        start_level = self.rng.randint(0, 3)
+        end_level = self.rng.randint(7, 10)
+        time_required = self.rng.randint(10, 1000)  # 年
+        difficulty = self.rng.choice(CULTIVATION_DIFFICULTIES)
+        return cultivation_record(start_level, end_level, time_required, difficulty)
     
     def generate_geography_feature(self):
         """生成地理特征"""
-        region = random.choice(list(self.geography.keys()))
-        place = random.choice(self.geography[region])
-        
-        features = {
-            "东胜神洲": "多仙山福地，灵气浓郁，孙悟空的花果山即位于此。",
-            "西牛贺洲": "佛教兴盛，如来佛祖的灵山位于此洲。",
-            "昆仑山": "万山之祖，神仙居所，充满神秘色彩。",
-            "花果山": "十洲之祖脉，三岛之来龙，孙悟空出生地。"
-        }
-        
-        description = features.get(place, f"{region}中的{place}，在《西游记》中有重要地位。")
-        
-        return {
-            "region": region,
-            "place": place,
-            "description": description,
-            "significance": "重要地点" if place in features else "普通地点"
-        }
+        region = self.rng.choice(GEOGRAPHY_REGIONS)
+        place = self.rng.choice(self.geography[region])
+        return geography_record(region, place)
     
-    def generate_worldview_snippet(self, category=None):
-        """生成世界观片段"""
+    def generate_worldview_snippet(self, category=None, seed=None):
+        """生成世界观片段（指定 seed 时使用独立的随机数流，结果只由参数决定）"""
+        if seed is not None:
+            return type(self)(rng=self._fork_rng(seed)).generate_worldview_snippet(category)
         if category is None:
-            category = random.choice(["realm", "deity", "monster", "artifact", "cultivation", "geography"])
+            category = self.rng.choice(SNIPPET_CATEGORIES)
         
-        generators = {
-            "realm": self.generate_realm_description,
-            "deity": self.generate_deity_profile,
-            "monster": self.generate_monster_story,
-            "artifact": self.generate_artifact_info,
-            "cultivation": self.generate_cultivation_path,
-            "geography": self.generate_geography_feature
+        return self._snippet_generators[category]()
+    
+    def combination_space(self):
+        """统计各类片段与完整世界观可能取值的数量
+
+        snippets 为单个片段在每个类别下的不同取值数；full_worldview 中每一项为
+        generate_full_worldview 对应列表的不同取值数，total 为其乘积。
+        """
+        # 起点境界 0-3、终点境界 7-10、修炼年数 10-1000，与 generate_cultivation_path 一致
+        cultivation = 4 * 4 * len(range(10, 1001)) * len(CULTIVATION_DIFFICULTIES)
+        snippets = {
+            "realm": sum(len(locations) for locations in self.realms.values()),
+            "deity": sum(len(ranks) for ranks in self.deities.values()),
+            "monster": sum(len(names) for names in self.monsters.values()),
+            "artifact": sum(len(names) for names in self.artifacts.values()),
+            "cultivation": cultivation,
+            "geography": sum(len(places) for places in self.geography.values()),
         }
-        
-        return generators[category]()
+        full_worldview = {
+            "realms": snippets["realm"] ** 2,
+            "deities": snippets["deity"] ** 2,
+            "monsters": snippets["monster"] ** 2,
+            "artifacts": snippets["artifact"] ** 2,
+            "cultivation_paths": cultivation,
+            "geography": snippets["geography"] ** 2,
+        }
+        total = 1
+        for count in full_worldview.values():
+            total *= count
+        full_worldview["total"] = total
+        return {"snippets": snippets, "full_worldview": full_worldview}
     
-    def generate_full_worldview(self):
-        """生成完整世界观描述"""
+    def generate_full_worldview(self, seed=None):
+        """生成完整世界观描述（指定 seed 时使用独立的随机数流，结果只由 seed 决定）"""
+        if seed is not None:
+            return type(self)(rng=self._fork_rng(seed)).generate_full_worldview()
         return {
             "realms": [self.generate_realm_description() for _ in range(2)],
             "deities": [self.generate_deity_profile() for _ in range(2)],
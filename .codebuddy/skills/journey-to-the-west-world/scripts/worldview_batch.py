@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+《西游记》世界观批量采样
+将三界、神仙、妖怪、法宝、修炼、地理目录编码为整数索引表，一次性抽取 N 个片段的
+类别与条目编号，只在输出时才构造字典；安装 NumPy 时使用向量化抽样，否则退回纯 Python
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from array import array
+
+from generate_worldview import (
+    ARTIFACT_CATEGORIES, CULTIVATION_DIFFICULTIES, DEITY_SYSTEMS, GEOGRAPHY_REGIONS,
+    MONSTER_ORIGINS, REALM_KEYS, SNIPPET_CATEGORIES, WorldViewGenerator,
+    artifact_record, cultivation_record, deity_record, geography_record, monster_record,
+    realm_record,
+)
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时使用纯 Python 实现
+    np = None
+
+BACKENDS = ("numpy", "python")
+
+# 修炼路径的四个独立抽取（起点 0-3、终点 7-10、年数 10-1000、难度）打包为单个条目编号
+CULTIVATION_STARTS = range(0, 4)
+CULTIVATION_ENDS = range(7, 11)
+CULTIVATION_YEARS = range(10, 1001)
+CULTIVATION_SIZE = (len(CULTIVATION_STARTS) * len(CULTIVATION_ENDS)
+                    * len(CULTIVATION_YEARS) * len(CULTIVATION_DIFFICULTIES))
+
+# 完整世界观各部分对应的片段类别与条数，顺序与 generate_full_worldview 一致
+WORLDVIEW_SECTIONS = (
+    ("realms", "realm", 2),
+    ("deities", "deity", 2),
+    ("monsters", "monster", 2),
+    ("artifacts", "artifact", 2),
+    ("cultivation_paths", "cultivation", 1),
+    ("geography", "geography", 2),
+)
+
+
+class CategoryTable:
+    """单个类别的索引表：条目按分组连续编号，每个条目预先构造好输出记录"""
+
+    def __init__(self, name, groups, build):
+        self.name = name
+        self.groups = tuple(key for key, _ in groups)
+        self.offsets = []
+        self.counts = []
+        records = []
+        for key, items in groups:
+            self.offsets.append(len(records))
+            self.counts.append(len(items))
+            records.extend(build(key, item) for item in items)
+        self.records = tuple(records)
+        # 逐个生成时先等概率选分组、再在组内等概率选条目，故条目概率为 1/(分组数×组大小)
+        weight = 0.0
+        self.cum_weights = []
+        for count in self.counts:
+            for _ in range(count):
+                weight += 1.0 / (len(self.counts) * count)
+                self.cum_weights.append(weight)
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, item):
+        """条目编号 → 输出记录（新字典）"""
+        return dict(self.records[item])
+
+
+def _build_tables():
+    """由世界观目录构建各类别的索引表"""
+    generator = WorldViewGenerator()
+    sources = {
+        "realm": (REALM_KEYS, generator.realms, realm_record),
+        "deity": (DEITY_SYSTEMS, generator.deities, deity_record),
+        "monster": (MONSTER_ORIGINS, generator.monsters, monster_record),
+        "artifact": (ARTIFACT_CATEGORIES, generator.artifacts, artifact_record),
+        "geography": (GEOGRAPHY_REGIONS, generator.geography, geography_record),
+    }
+    return {
+        name: CategoryTable(name, [(key, catalog[key]) for key in keys], build)
+        for name, (keys, catalog, build) in sources.items()
+    }
+
+
+TABLES = _build_tables()
+CATEGORY_CODES = {name: code for code, name in enumerate(SNIPPET_CATEGORIES)}
+
+
+def cultivation_from_item(item):
+    """将打包的修炼条目编号解码为修炼路径记录"""
+    item, difficulty = divmod(item, len(CULTIVATION_DIFFICULTIES))
+    item, years = divmod(item, len(CULTIVATION_YEARS))
+    start, end = divmod(item, len(CULTIVATION_ENDS))
+    return cultivation_record(CULTIVATION_STARTS[start], CULTIVATION_ENDS[end],
+                              CULTIVATION_YEARS[years], CULTIVATION_DIFFICULTIES[difficulty])
+
+
+def materialize(category, item):
+    """类别名 + 条目编号 → 与 generate_worldview_snippet 结构相同的字典"""
+    if category == "cultivation":
+        return cultivation_from_item(item)
+    return TABLES[category].record(item)
+
+
+# ---------------------------------------------------------------------------
+# 抽样后端：返回整数编号序列（NumPy 数组或 array 模块数组）
+# ---------------------------------------------------------------------------
+
+class _NumpySampler:
+    """NumPy 向量化抽样"""
+
+    def __init__(self, seed):
+        self.rng = np.random.default_rng(seed)
+        self._tables = {
+            name: (np.asarray(table.offsets), np.asarray(table.counts))
+            for name, table in TABLES.items()
+        }
+
+    def integers(self, high, n):
+        return self.rng.integers(0, high, size=n)
+
+    def items(self, category, n):
+        if category == "cultivation":
+            return self.rng.integers(0, CULTIVATION_SIZE, size=n)
+        offsets, counts = self._tables[category]
+        groups = self.rng.integers(0, len(counts), size=n)
+        return offsets[groups] + (self.rng.random(n) * counts[groups]).astype(np.int64)
+
+    @staticmethod
+    def full(n, value):
+        return np.full(n, value, dtype=np.int64)
+
+    @staticmethod
+    def count(codes, code):
+        return int(np.count_nonzero(codes == code))
+
+    @staticmethod
+    def assemble(codes, values_by_code):
+        items = np.zeros(len(codes), dtype=np.int64)
+        for code, values in enumerate(values_by_code):
+            items[codes == code] = values
+        return items
+
+
+class _PythonSampler:
+    """纯 Python 抽样：每个类别一次 random.choices 调用"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def integers(self, high, n):
+        return array("l", self.rng.choices(range(high), k=n))
+
+    def items(self, category, n):
+        if category == "cultivation":
+            return array("l", self.rng.choices(range(CULTIVATION_SIZE), k=n))
+        table = TABLES[category]
+        return array("l", self.rng.choices(range(len(table)), cum_weights=table.cum_weights, k=n))
+
+    @staticmethod
+    def full(n, value):
+        return array("l", [value]) * n
+
+    @staticmethod
+    def count(codes, code):
+        return codes.count(code)
+
+    @staticmethod
+    def assemble(codes, values_by_code):
+        # 单次遍历：每个位置从所属类别的编号序列中依次取值
+        takers = [iter(values).__next__ for values in values_by_code]
+        return array("l", [takers[code]() for code in codes])
+
+
+def make_sampler(backend=None, seed=None):
+    """按名称创建抽样后端；未指定时有 NumPy 则用 NumPy"""
+    if backend is None:
+        backend = "numpy" if np is not None else "python"
+    if backend == "numpy":
+        if np is None:
+            raise RuntimeError("未安装 NumPy，请改用 python 后端")
+        return _NumpySampler(seed)
+    if backend == "python":
+        return _PythonSampler(seed)
+    raise ValueError(f"未知后端：{backend}")
+
+
+class SnippetBatch:
+    """列式片段批次：categories 为类别编号，items 为类别内条目编号
+
+    只有在索引、迭代或取列时才构造字典，批次本身只占两列整数。
+    """
+
+    def __init__(self, categories, items):
+        self.categories = categories
+        self.items = items
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return materialize(SNIPPET_CATEGORIES[int(self.categories[index])], int(self.items[index]))
+
+    def __iter__(self):
+        names = SNIPPET_CATEGORIES
+        for code, item in zip(_to_list(self.categories), _to_list(self.items)):
+            yield materialize(names[code], item)
+
+    def counts(self):
+        """各类别的片段数量"""
+        codes = _to_list(self.categories)
+        return {name: codes.count(code) for code, name in enumerate(SNIPPET_CATEGORIES)}
+
+    def column(self, field):
+        """取出所有片段的某个字段，不含该字段的片段为 None"""
+        names = SNIPPET_CATEGORIES
+        values = []
+        for code, item in zip(_to_list(self.categories), _to_list(self.items)):
+            category = names[code]
+            if category == "cultivation":
+                values.append(cultivation_from_item(item).get(field))
+            else:
+                values.append(TABLES[category].records[item].get(field))
+        return values
+
+    def to_columns(self):
+        """转换为 类别名列 + 条目编号列 的列式字典"""
+        names = SNIPPET_CATEGORIES
+        return {
+            "category": [names[code] for code in _to_list(self.categories)],
+            "item": _to_list(self.items),
+        }
+
+
+class WorldviewBatch:
+    """列式完整世界观批次：每个部分保存 N×条数 个条目编号"""
+
+    def __init__(self, count, sections):
+        self.count = count
+        self.sections = sections
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("编号超出范围")
+        worldview = {}
+        for key, category, per_worldview in WORLDVIEW_SECTIONS:
+            items = self.sections[key]
+            start = index * per_worldview
+            worldview[key] = [materialize(category, int(items[start + i])) for i in range(per_worldview)]
+        return worldview
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+
+def _to_list(values):
+    """NumPy 数组或 array 数组转为 Python 整数列表"""
+    return values.tolist()
+
+
+def sample_snippets(n, seed=None, category=None, backend=None):
+    """抽取 n 个世界观片段，返回列式批次；category 为空时每个片段随机选择类别"""
+    sampler = make_sampler(backend, seed)
+    if category is not None:
+        return SnippetBatch(sampler.full(n, CATEGORY_CODES[category]), sampler.items(category, n))
+    categories = sampler.integers(len(SNIPPET_CATEGORIES), n)
+    values_by_code = [sampler.items(name, sampler.count(categories, code))
+                      for code, name in enumerate(SNIPPET_CATEGORIES)]
+    return SnippetBatch(categories, sampler.assemble(categories, values_by_code))
+
+
+def sample_worldviews(n, seed=None, backend=None):
+    """抽取 n 份完整世界观，返回列式批次"""
+    sampler = make_sampler(backend, seed)
+    sections = {
+        key: sampler.items(category, n * per_worldview)
+        for key, category, per_worldview in WORLDVIEW_SECTIONS
+    }
+    return WorldviewBatch(n, sections)
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》世界观批量采样")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="生成数量（默认1000）")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    parser.add_argument("-c", "--category", choices=SNIPPET_CATEGORIES, help="只生成指定类别的片段")
+    parser.add_argument("--worldview", action="store_true", help="生成完整世界观而非片段")
+    parser.add_argument("--backend", choices=BACKENDS, help="抽样后端（默认有 NumPy 时用 numpy）")
+    parser.add_argument("--columns", action="store_true", help="片段以列式 JSON 输出（类别列与条目编号列）")
+    parser.add_argument("-o", "--output", default="-", help="输出文件路径（默认 - 表示标准输出）")
+    return parser.parse_args(argv)
+
+
+def write_batch(batch, stream, columns=False, batch_size=256):
+    """写出批次：默认逐行 JSONL，每 batch_size 条合并为一次 write；columns 为真时写出单个列式 JSON"""
+    if columns:
+        json.dump(batch.to_columns(), stream, ensure_ascii=False)
+        stream.write("\n")
+        return
+    dumps = json.dumps
+    write = stream.write
+    buffer = []
+    for record in batch:
+        buffer.append(dumps(record, ensure_ascii=False) + "\n")
+        if len(buffer) >= batch_size:
+            write("".join(buffer))
+            buffer.clear()
+    if buffer:
+        write("".join(buffer))
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(argv)
+    if args.worldview and (args.category or args.columns):
+        sys.exit("--worldview 不支持 --category 与 --columns")
+    start = time.perf_counter()
+    try:
+        if args.worldview:
+            batch = sample_worldviews(args.count, args.seed, args.backend)
+        else:
+            batch = sample_snippets(args.count, args.seed, args.category, args.backend)
+    except RuntimeError as exc:
+        sys.exit(str(exc))
+    sampled = time.perf_counter()
+
+    try:
+        if args.output == "-":
+            write_batch(batch, sys.stdout, args.columns)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                write_batch(batch, f, args.columns)
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    finished = time.perf_counter()
+    print(f"已生成 {len(batch)} 份，抽样 {(sampled - start) * 1000:.1f} ms，"
+          f"构造与写出 {(finished - sampled) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享只读目录基准测试
+对比当前 generate_chapter.py 与指定 git 版本在单份设计上的耗时与内存分配
+"""
+
+import argparse
+import importlib.util
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CHAPTER_SCRIPT = Path(".codebuddy/skills/journey-to-the-west-chapter/scripts/generate_chapter.py")
+# 当前版本依赖同目录下的 render_chapter 等模块
+sys.path.insert(0, str(REPO_ROOT / CHAPTER_SCRIPT.parent))
+
+
+def load_module(path: Path, name: str):
+    """从文件路径加载模块"""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_module_at_ref(ref: str, workdir: Path):
+    """从 git 历史中取出指定版本的 generate_chapter.py 并加载"""
+    source = subprocess.run(
+        ["git", "-C", str(REPO_ROOT), "show", f"{ref}:{CHAPTER_SCRIPT.as_posix()}"],
+        check=True, capture_output=True,
+    ).stdout
+    path = workdir / f"generate_chapter_{ref.replace('/', '_')}.py"
+    path.write_bytes(source)
+    return load_module(path, path.stem)
+
+
+def make_generator(module):
+    """构建生成器；旧版本不支持 rng 参数时退回全局 random"""
+    try:
+        return module.ChapterGenerator(rng=random.Random(0))
+    except TypeError:
+        random.seed(0)
+        return module.ChapterGenerator()
+
+
+# 对比的调用：构造函数、各热点方法与完整设计
+CASES = (
+    ("ChapterGenerator()", None),
+    ("generate_chapter_title", ()),
+    ("_generate_stage_content", ("起（开端）",)),
+    ("_generate_key_elements", ()),
+    ("generate_artistic_features", ()),
+    ("generate_thematic_connections", ()),
+    ("generate_adaptation_suggestions", ()),
+    ("generate_complete_chapter_design", ()),
+)
+
+
+def measure_call(func, count: int) -> Dict[str, float]:
+    """测量单次调用的平均耗时（微秒）与平均峰值内存分配（字节）"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed_us = (time.perf_counter() - start) / count * 1e6
+
+    samples = min(count, 2000)
+    tracemalloc.start()
+    peak_total = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        func()
+        peak_total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {"us": elapsed_us, "peak_bytes": peak_total / samples}
+
+
+def measure(module, count: int) -> Dict[str, Dict[str, float]]:
+    """逐项测量构造开销与热点方法"""
+    generator = make_generator(module)
+    results = {}
+    for name, call_args in CASES:
+        if call_args is None:
+            func = module.ChapterGenerator
+        else:
+            method = getattr(generator, name)
+            func = lambda method=method, call_args=call_args: method(*call_args)
+        results[name] = measure_call(func, count)
+    return results
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="共享只读目录基准测试")
+    parser.add_argument("--ref", default="c92c897",
+                        help="对比的 git 版本（默认为引入共享目录之前的基线提交）")
+    parser.add_argument("-n", "--count", type=int, default=20000, help="计时的设计数量")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None):
+    """主函数"""
+    args = parse_args(argv)
+    current = load_module(REPO_ROOT / CHAPTER_SCRIPT, "generate_chapter_current")
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = load_module_at_ref(args.ref, Path(tmp))
+        results = {args.ref: measure(previous, args.count), "当前": measure(current, args.count)}
+
+    before, after = results[args.ref], results["当前"]
+    print(f"{'调用':<34}{args.ref + '(µs)':>14}{'当前(µs)':>12}{args.ref + '(B)':>14}{'当前(B)':>12}")
+    for name, _ in CASES:
+        print(f"{name:<34}{before[name]['us']:>14.2f}{after[name]['us']:>12.2f}"
+              f"{before[name]['peak_bytes']:>14.0f}{after[name]['peak_bytes']:>12.0f}")
+    total_before = before["generate_complete_chapter_design"]["us"]
+    total_after = after["generate_complete_chapter_design"]["us"]
+    print(f"\n单份设计耗时节省：{(1 - total_after / total_before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
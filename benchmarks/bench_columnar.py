@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式导出扫描基准测试
+同一批章节设计分别写成 JSONL 与列式文件，对比统计单列取值分布（如冲突强度、模板、主角）的耗时
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from columnar_export import ColumnarReader, ColumnarWriter, iter_records  # noqa: E402
+
+# 列名 → 从 JSON 记录中取出该列全部取值的函数
+QUERIES = {
+    "conflicts[].intensity": lambda design: [conflict["intensity"] for conflict in design["conflicts"]],
+    "metadata.template_used": lambda design: [design["metadata"]["template_used"]],
+    "main_character": lambda design: [design["main_character"]],
+}
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="列式导出扫描基准测试")
+    parser.add_argument("-n", "--count", type=int, default=200000, help="章节设计数量（默认200000）")
+    parser.add_argument("-s", "--seed", type=int, default=42, help="随机种子")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl_path = Path(tmp) / "designs.jsonl"
+        columnar_path = Path(tmp) / "designs.xycol"
+        start = time.perf_counter()
+        with open(jsonl_path, "w", encoding="utf-8") as jsonl, ColumnarWriter(columnar_path, kind="chapter") as writer:
+            for design in iter_records("chapter", args.count, args.seed):
+                jsonl.write(json.dumps(design, ensure_ascii=False) + "\n")
+                writer.append(design)
+        print(f"写出 {args.count} 份设计用时 {time.perf_counter() - start:.1f} s（生成 + 两种格式）")
+        print(f"JSONL {jsonl_path.stat().st_size / 2**20:.1f} MiB，列式 {columnar_path.stat().st_size / 2**20:.1f} MiB\n")
+
+        print(f"{'列':<26}{'JSONL(s)':>10}{'列式(s)':>10}{'加速':>8}")
+        for column, extract in QUERIES.items():
+            start = time.perf_counter()
+            expected = Counter()
+            with open(jsonl_path, encoding="utf-8") as jsonl:
+                for line in jsonl:
+                    expected.update(extract(json.loads(line)))
+            json_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ColumnarReader(columnar_path) as reader:
+                counts = reader.value_counts(column)
+            columnar_time = time.perf_counter() - start
+            if counts != dict(expected):
+                sys.exit(f"{column} 统计结果不一致")
+            print(f"{column:<26}{json_time:>10.3f}{columnar_time:>10.4f}{json_time / columnar_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑章节设计内存基准测试
+在内存中保留 N 份章节设计，对比字典形式与 __slots__ 紧凑形式的常驻内存、生成耗时，
+以及紧凑形式按需还原为字典的耗时
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CHAPTER_SCRIPTS = REPO_ROOT / ".codebuddy" / "skills" / "journey-to-the-west-chapter" / "scripts"
+sys.path.insert(0, str(CHAPTER_SCRIPTS))
+
+from compact_design import CompactChapterGenerator, CompactDesign  # noqa: E402
+from generate_chapter import ChapterGenerator  # noqa: E402
+
+
+def _clock() -> str:
+    return "2024-01-01T00:00:00"
+
+
+def timed(build: Callable[[], List]) -> float:
+    """不开启 tracemalloc 时的构建耗时（秒），结果随即丢弃"""
+    gc.collect()
+    start = time.perf_counter()
+    build()
+    return time.perf_counter() - start
+
+
+def resident(build: Callable[[], List]) -> tuple:
+    """返回（结果列表, 常驻内存字节）；常驻内存为构建完成后 tracemalloc 的当前值"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="紧凑章节设计内存基准测试")
+    parser.add_argument("-n", "--count", type=int, default=100000, help="保留的设计份数（默认100000）")
+    parser.add_argument("-s", "--seed", type=int, default=42, help="随机种子")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    n = args.count
+
+    def dicts():
+        generator = ChapterGenerator(seed=args.seed, clock=_clock)
+        return [generator.generate_complete_chapter_design() for _ in range(n)]
+
+    def compact():
+        generator = CompactChapterGenerator(seed=args.seed, clock=_clock)
+        return [generator.generate_compact_design() for _ in range(n)]
+
+    dict_time = timed(dicts)
+    compact_time = timed(compact)
+    designs, dict_bytes = resident(dicts)
+    # 以默认参数绑定当前列表，随后 del 释放字典形式的设计，再测量紧凑形式的常驻内存
+    encode_time = timed(lambda batch=designs: [CompactDesign.from_dict(design) for design in batch])
+    del designs
+    records, compact_bytes = resident(compact)
+    restore_time = timed(lambda: [record.to_dict() for record in records])
+
+    print(f"保留 {n} 份章节设计")
+    print(f"{'表示':<16}{'常驻内存(MiB)':>16}{'每份(B)':>10}{'生成(s)':>10}")
+    print(f"{'字典':<16}{dict_bytes / 2**20:>16.1f}{dict_bytes / n:>10.0f}{dict_time:>10.2f}")
+    print(f"{'紧凑 __slots__':<16}{compact_bytes / 2**20:>16.1f}{compact_bytes / n:>10.0f}{compact_time:>10.2f}")
+    print(f"\n内存降为字典形式的 {compact_bytes / dict_bytes * 100:.1f}%")
+    print(f"字典 → 紧凑编码 {encode_time / n * 1e6:.1f} µs/份，紧凑 → 字典还原 {restore_time / n * 1e6:.1f} µs/份")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
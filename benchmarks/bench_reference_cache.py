@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+参考资料缓存基准测试
+在全新子进程中测量“加载全部参考资料并生成第一份章节设计”的耗时，
+对比直接解析 Markdown 与读取编译缓存两种方式
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# 子进程内执行的脚本：{loader} 为加载参考资料的表达式
+_CHILD = """
+import sys, time
+start = time.perf_counter()
+sys.path[:0] = [{scripts!r}, {chapter!r}]
+import reference_cache
+records = {loader}
+from generate_chapter import ChapterGenerator
+ChapterGenerator().generate_complete_chapter_design()
+print((time.perf_counter() - start) * 1000)
+"""
+
+LOADERS = {
+    "解析Markdown": "reference_cache.parse_all_references()",
+    "编译缓存": "reference_cache.load_references()",
+}
+
+
+def time_to_first_design(loader: str) -> float:
+    """在新进程中执行一次，返回进程内测得的毫秒数"""
+    code = _CHILD.format(
+        scripts=str(REPO_ROOT / "scripts"),
+        chapter=str(REPO_ROOT / ".codebuddy" / "skills" / "journey-to-the-west-chapter" / "scripts"),
+        loader=loader,
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True).stdout
+    return float(output.strip())
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="参考资料缓存基准测试")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="每种方式的重复次数")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    # 预热一次，确保缓存文件存在且为最新
+    time_to_first_design(LOADERS["编译缓存"])
+    print(f"{'方式':<14}{'中位数(ms)':>12}{'最小(ms)':>12}")
+    for label, loader in LOADERS.items():
+        samples = [time_to_first_design(loader) for _ in range(args.repeat)]
+        print(f"{label:<14}{statistics.median(samples):>12.1f}{min(samples):>12.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
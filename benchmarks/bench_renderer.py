@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节设计渲染基准测试
+对比指定 git 版本中逐行 print 的 print_chapter_design 与缓冲渲染引擎的整批输出耗时
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from bench_catalog import CHAPTER_SCRIPT, REPO_ROOT, load_module_at_ref
+
+sys.path.insert(0, str(REPO_ROOT / CHAPTER_SCRIPT.parent))
+
+from generate_chapter import ChapterGenerator  # noqa: E402
+from render_chapter import RENDERERS, write_designs  # noqa: E402
+
+
+def time_batch(func: Callable[[], None], repeat: int) -> float:
+    """多次执行取最快一次的耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="章节设计渲染基准测试")
+    parser.add_argument("--ref", default="c92c897", help="提供旧版 print_chapter_design 的 git 版本")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="每批渲染的设计数量")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="每项的重复次数")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    generator = ChapterGenerator(rng=random.Random(0), clock=lambda: "2024-01-01T00:00:00")
+    designs = list(generator.iter_chapter_designs(args.count))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = load_module_at_ref(args.ref, Path(tmp))
+
+    # 输出写入真实文件（/dev/null），使逐行 print 的系统调用开销计入测量
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        def print_all(format_type: str):
+            with contextlib.redirect_stdout(sink):
+                for design in designs:
+                    previous.print_chapter_design(design, format_type)
+
+        rows = [
+            (f"{args.ref} print text", time_batch(lambda: print_all("text"), args.repeat)),
+            (f"{args.ref} print json", time_batch(lambda: print_all("json"), args.repeat)),
+        ]
+        for format_type in RENDERERS:
+            rows.append((f"render {format_type}", time_batch(
+                lambda: write_designs(designs, sink, format_type), args.repeat)))
+            rows.append((f"render {format_type}（整批一次写出）", time_batch(
+                lambda: write_designs(designs, sink, format_type, batch_size=0), args.repeat)))
+
+    print(f"{args.count} 份设计，最快 {args.repeat} 次中的一次")
+    print(f"{'方式':<36}{'总耗时(ms)':>12}{'单份(µs)':>12}")
+    for label, elapsed_ms in rows:
+        print(f"{label:<36}{elapsed_ms:>12.1f}{elapsed_ms / args.count * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地生成服务基准测试
+在子进程中启动 generation_server.py（Unix 套接字），用若干长连接并发请求单份章节设计，
+统计客户端侧的延迟分位数，并附上服务端 /stats 的统计
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SERVER_SCRIPT = REPO_ROOT / "scripts" / "generation_server.py"
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> bytes:
+    """在长连接上发送一个 GET 请求并读取响应体"""
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return await reader.readexactly(length)
+
+
+async def client(socket_path: str, target: str, count: int, latencies: List[float]):
+    """单个客户端：在同一连接上顺序发送 count 个请求"""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    for _ in range(count):
+        start = time.perf_counter()
+        await request(reader, writer, target)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def run_load(socket_path: str, target: str, clients: int, count: int) -> List[float]:
+    """并发运行若干客户端，返回全部请求的延迟（秒）"""
+    latencies: List[float] = []
+    await asyncio.gather(*(client(socket_path, target, count, latencies) for _ in range(clients)))
+    return latencies
+
+
+async def fetch_stats(socket_path: str) -> dict:
+    """读取服务端统计"""
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    body = await request(reader, writer, "/stats")
+    writer.close()
+    return json.loads(body)
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """已排序样本的分位数（毫秒）"""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="本地生成服务基准测试")
+    parser.add_argument("-n", "--count", type=int, default=2000, help="每个客户端的请求数")
+    parser.add_argument("-c", "--clients", default="1,8,32", help="并发客户端数，逗号分隔（默认1,8,32）")
+    parser.add_argument("--target", default="/chapter", help="请求路径（默认 /chapter）")
+    parser.add_argument("--warmup", type=int, default=500, help="正式测量前的预热请求数")
+    parser.add_argument("--threads", type=int, default=1, help="服务端执行器线程数，0 为事件循环内直接运行")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = str(Path(tmp) / "server.sock")
+        server = subprocess.Popen([sys.executable, str(SERVER_SCRIPT), "--no-http", "--unix", socket_path,
+                                   "--threads", str(args.threads)], stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.time() + 10
+            while not Path(socket_path).exists():
+                if time.time() > deadline or server.poll() is not None:
+                    sys.exit("服务启动失败")
+                time.sleep(0.05)
+            asyncio.run(run_load(socket_path, args.target, 1, args.warmup))
+
+            print(f"请求 {args.target}，每个客户端 {args.count} 次（客户端侧延迟）")
+            print(f"{'并发':>6}{'吞吐(req/s)':>14}{'p50(ms)':>10}{'p90(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}")
+            for clients in (int(value) for value in args.clients.split(",")):
+                start = time.perf_counter()
+                latencies = sorted(asyncio.run(run_load(socket_path, args.target, clients, args.count)))
+                elapsed = time.perf_counter() - start
+                print(f"{clients:>6}{len(latencies) / elapsed:>14.0f}"
+                      f"{percentile(latencies, 0.5):>10.3f}{percentile(latencies, 0.9):>10.3f}"
+                      f"{percentile(latencies, 0.99):>10.3f}{latencies[-1] * 1000:>10.3f}")
+
+            stats = asyncio.run(fetch_stats(socket_path))
+            print("\n服务端统计：")
+            print(json.dumps(stats, ensure_ascii=False, indent=2))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成器入口基准测试套件
+对每个入口测量单次调用延迟、批量吞吐、峰值内存与冷启动导入耗时，
+结果可保存为 JSON 基线，后续运行与基线对比，退化超过阈值时以非零状态退出
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+SCRIPT_DIRS = {
+    skill: SKILLS_DIR / f"journey-to-the-west-{skill}" / "scripts"
+    for skill in ("chapter", "world", "outline")
+}
+for _scripts_dir in SCRIPT_DIRS.values():
+    if str(_scripts_dir) not in sys.path:
+        sys.path.insert(0, str(_scripts_dir))
+
+from generate_chapter import ChapterGenerator, print_chapter_design  # noqa: E402
+from generate_outline import generate_chapter_summary  # noqa: E402
+from generate_worldview import WorldViewGenerator  # noqa: E402
+
+DEFAULT_BASELINE = REPO_ROOT / ".cache" / "bench_baseline.json"
+SUITE_VERSION = 1
+
+# 指标名 → 是否越大越好
+METRICS = {
+    "latency_us": False,
+    "throughput_per_s": True,
+    "peak_kib": False,
+    "import_ms": False,
+}
+
+
+def _fixed_clock() -> str:
+    return "2024-01-01T00:00:00"
+
+
+def build_entry_points() -> Dict[str, Dict]:
+    """各入口：call 为无参调用；module 为冷启动时导入的模块"""
+    chapter = ChapterGenerator(rng=random.Random(0), clock=_fixed_clock)
+    worldview = WorldViewGenerator(rng=random.Random(0))
+    outline_rng = random.Random(0)
+    design = chapter.generate_complete_chapter_design()
+    sink = io.StringIO()
+
+    def print_design(format_type: str) -> Callable[[], None]:
+        def call():
+            sink.seek(0)
+            sink.truncate()
+            with redirect_stdout(sink):
+                print_chapter_design(design, format_type)
+        return call
+
+    return {
+        "generate_complete_chapter_design": {
+            "call": chapter.generate_complete_chapter_design, "module": ("chapter", "generate_chapter")},
+        "generate_full_worldview": {
+            "call": worldview.generate_full_worldview, "module": ("world", "generate_worldview")},
+        "generate_worldview_snippet": {
+            "call": worldview.generate_worldview_snippet, "module": ("world", "generate_worldview")},
+        "generate_chapter_summary": {
+            "call": lambda: generate_chapter_summary(rng=outline_rng), "module": ("outline", "generate_outline")},
+        "print_chapter_design(text)": {
+            "call": print_design("text"), "module": ("chapter", "generate_chapter")},
+        "print_chapter_design(json)": {
+            "call": print_design("json"), "module": ("chapter", "generate_chapter")},
+    }
+
+
+def measure_latency(call: Callable, repeat: int, number: int) -> float:
+    """单次调用延迟：repeat 轮、每轮 number 次，取各轮均值的中位数（微秒）"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        rounds.append((time.perf_counter() - start) / number)
+    return statistics.median(rounds) * 1e6
+
+
+def measure_throughput(call: Callable, batch: int) -> float:
+    """批量吞吐：连续调用 batch 次并保留结果，返回每秒调用数"""
+    start = time.perf_counter()
+    results = [call() for _ in range(batch)]
+    elapsed = time.perf_counter() - start
+    del results
+    return batch / elapsed
+
+
+def measure_peak(call: Callable, batch: int) -> float:
+    """峰值内存：保留 batch 个结果期间 tracemalloc 记录的峰值（KiB）"""
+    tracemalloc.start()
+    try:
+        results = [call() for _ in range(batch)]
+        _, peak = tracemalloc.get_traced_memory()
+        del results
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def measure_import(skill: str, module: str, repeat: int) -> float:
+    """冷启动：在全新解释器中导入模块的耗时中位数（毫秒）"""
+    code = ("import sys, time; sys.path.insert(0, {path!r}); start = time.perf_counter(); "
+            "import {module}; print((time.perf_counter() - start) * 1000)").format(
+                path=str(SCRIPT_DIRS[skill]), module=module)
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], check=True,
+                                capture_output=True, text=True).stdout
+        samples.append(float(output.strip()))
+    return statistics.median(samples)
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """运行全部入口的全部指标"""
+    results = {}
+    import_cache: Dict[tuple, float] = {}
+    for name, entry in build_entry_points().items():
+        if args.only and args.only not in name:
+            continue
+        call = entry["call"]
+        for _ in range(args.warmup):
+            call()
+        module = entry["module"]
+        if module not in import_cache:
+            import_cache[module] = measure_import(*module, repeat=args.import_repeat)
+        results[name] = {
+            "latency_us": round(measure_latency(call, args.repeat, args.number), 3),
+            "throughput_per_s": round(measure_throughput(call, args.batch), 1),
+            "peak_kib": round(measure_peak(call, args.memory_batch), 1),
+            "import_ms": round(import_cache[module], 3),
+        }
+    return results
+
+
+def environment() -> Dict[str, str]:
+    """记录运行环境，便于判断基线是否可比"""
+    try:
+        commit = subprocess.run(["git", "-C", str(REPO_ROOT), "rev-parse", "--short", "HEAD"],
+                                check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": str(os.cpu_count()),
+        "commit": commit,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, memory_threshold: float) -> List[str]:
+    """与基线对比，返回超过阈值的退化描述"""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            # 统一换算成“变差的比例”：耗时/内存增加或吞吐下降
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            limit = memory_threshold if metric == "peak_kib" else threshold
+            if change > limit:
+                regressions.append(f"{name} {metric}: {old:g} → {new:g}（变差 {change * 100:.1f}%，阈值 {limit * 100:.0f}%）")
+    return regressions
+
+
+def print_table(results: Dict, baseline: Optional[Dict]):
+    """打印结果表，有基线时附带变化比例"""
+    header = f"{'入口':<34}{'延迟(µs)':>12}{'吞吐(次/s)':>14}{'峰值(KiB)':>12}{'导入(ms)':>10}"
+    print(header)
+    for name, metrics in results.items():
+        line = (f"{name:<34}{metrics['latency_us']:>12.2f}{metrics['throughput_per_s']:>14.0f}"
+                f"{metrics['peak_kib']:>12.1f}{metrics['import_ms']:>10.2f}")
+        base = (baseline or {}).get(name)
+        if base:
+            changes = []
+            for metric in METRICS:
+                if base.get(metric):
+                    changes.append(f"{(metrics[metric] / base[metric] - 1) * 100:+.0f}%")
+            line += "   [" + " ".join(changes) + "]"
+        print(line)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="生成器入口基准测试套件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件路径")
+    parser.add_argument("--save", action="store_true", help="将本次结果保存为新的基线")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="耗时与吞吐允许的退化比例（默认0.25，即25%%）")
+    parser.add_argument("--memory-threshold", type=float, default=0.10,
+                        help="峰值内存允许的增长比例（默认0.10）")
+    parser.add_argument("--only", help="只运行名称包含该字符串的入口")
+    parser.add_argument("--repeat", type=int, default=7, help="延迟测量轮数")
+    parser.add_argument("--number", type=int, default=500, help="每轮调用次数")
+    parser.add_argument("--batch", type=int, default=5000, help="吞吐测量的批量大小")
+    parser.add_argument("--memory-batch", type=int, default=1000, help="峰值内存测量保留的结果数")
+    parser.add_argument("--import-repeat", type=int, default=5, help="冷启动导入测量次数")
+    parser.add_argument("--warmup", type=int, default=200, help="每个入口的预热调用次数")
+    parser.add_argument("--quick", action="store_true", help="缩小各项规模，用于快速冒烟检查")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出本次结果")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeat, args.number, args.batch = 3, 100, 1000
+        args.memory_batch, args.import_repeat, args.warmup = 200, 2, 50
+    return args
+
+
+def run_settings(args: argparse.Namespace) -> Dict[str, int]:
+    """影响测量结果的规模参数，写入基线以判断两次运行是否可比"""
+    return {name: getattr(args, name)
+            for name in ("repeat", "number", "batch", "memory_batch", "import_repeat", "warmup")}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数：返回 0 表示无退化，1 表示存在超过阈值的退化，2 表示参数无法执行"""
+    args = parse_args(argv)
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.is_file():
+        payload = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if payload.get("version") == SUITE_VERSION:
+            baseline = payload["results"]
+            if payload.get("settings") != run_settings(args):
+                print("注意：本次规模参数与基线不同，对比结果（尤其峰值内存）仅供参考", file=sys.stderr)
+                if args.save and args.only:
+                    # 部分入口的新结果与其余入口的旧结果规模不同，不能合并到同一份基线
+                    print("--save 与 --only 同时使用时规模参数须与基线一致，请去掉 --only 重新保存完整基线",
+                          file=sys.stderr)
+                    return 2
+
+    results = run_suite(args)
+    if args.json:
+        print(json.dumps({"environment": environment(), "results": results}, ensure_ascii=False, indent=2))
+    else:
+        print_table(results, baseline)
+
+    status = 0
+    if baseline is not None and not args.save:
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        if regressions:
+            print("\n性能退化：", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            status = 1
+        else:
+            print(f"\n与基线 {baseline_path} 相比无超过阈值的退化", file=sys.stderr)
+    elif baseline is None and not args.save:
+        print(f"\n未找到基线 {baseline_path}，使用 --save 记录", file=sys.stderr)
+
+    if args.save:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        # 只运行了部分入口时并入已有基线，未运行的入口保留原结果
+        saved = {**baseline, **results} if args.only and baseline is not None else results
+        payload = {"version": SUITE_VERSION, "environment": environment(),
+                   "settings": run_settings(args), "results": saved}
+        baseline_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\n已保存基线：{baseline_path}", file=sys.stderr)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
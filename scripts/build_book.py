@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》整书设计包构建
+以大纲中的100回为骨架，为每一回生成章节设计（回目、回数取自大纲，回目中点名的取经人物作为主角），
+并按回目与概要中提到的实体从世界观图谱取出对应的世界观片段；
+各回分发到线程池并行生成，共享数据只在进程内加载一次，结果按回目顺序流式写入一个设计包目录
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world", "journey-to-the-west-outline"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from entity_graph import GraphWorldViewGenerator, default_graph  # noqa: E402
+from generate_chapter import MAIN_CHARACTERS, ChapterGenerator  # noqa: E402
+from generate_worldview import SNIPPET_CATEGORIES  # noqa: E402
+from outline_store import OVERVIEW_STAGES, TOTAL_CHAPTERS, get_outline_store  # noqa: E402
+from render_chapter import render_design  # noqa: E402
+
+DEFAULT_WORKERS = 4
+MAIN_CHARACTER_NAMES = frozenset(character["name"] for character in MAIN_CHARACTERS)
+
+# 世界观片段类别的中文名（用于 book.md）
+CATEGORY_LABELS = {
+    "monster": "妖怪", "artifact": "法宝", "geography": "地理", "realm": "三界",
+    "deity": "神仙", "cultivation": "修炼", "entity": "图谱",
+}
+
+# 图谱关系字段的中文名（用于 book.md）
+RELATION_LABELS = {
+    "regions": "所在", "holds": "持有", "origin": "来历", "located_in": "位于", "subdued_by": "被收服于",
+    "holds_of": "持有者", "origin_of": "由此而来", "located_in_of": "境内", "subdued_by_of": "收服",
+}
+
+
+class _ChapterPlan:
+    """单回的生成计划：大纲记录、提到的实体与主角约束（构建时在主线程预先算好）"""
+
+    __slots__ = ("outline", "stage", "entities", "constraints")
+
+    def __init__(self, outline, stage: Optional[int], entities: Tuple[str, ...], constraints):
+        self.outline = outline
+        self.stage = stage
+        self.entities = entities
+        self.constraints = constraints
+
+
+class BookBuilder:
+    """整书设计包构建器
+
+    大纲、实体图谱、约束与目录反查表都在构造时加载完毕，工作线程只读共享数据；
+    每回使用由（种子, 回数）决定的独立随机数流，输出与线程数、完成顺序无关。
+    """
+
+    def __init__(self, seed: int = 0, generated_at: Optional[str] = None):
+        self.seed = seed
+        self.generated_at = generated_at or datetime.now().isoformat()
+        self.store = get_outline_store()
+        self.graph = default_graph()
+        self.worldview = GraphWorldViewGenerator(rng=random.Random(seed), graph=self.graph)
+        template = ChapterGenerator(clock=self._clock)
+        constraints: Dict[Tuple[str, ...], object] = {}
+        self.plans: Dict[int, _ChapterPlan] = {}
+        for chapter in range(1, TOTAL_CHAPTERS + 1):
+            outline = self.store.lookup(chapter)
+            entities = tuple(self.graph.mentions(f"{outline.title}\n{outline.summary}"))
+            pilgrims = tuple(name for name in entities if name in MAIN_CHARACTER_NAMES)
+            if pilgrims and pilgrims not in constraints:
+                constraints[pilgrims] = template.constrain(main_character=pilgrims)
+            self.plans[chapter] = _ChapterPlan(outline, self.store.stage_index(chapter), entities,
+                                               constraints.get(pilgrims))
+
+    def _clock(self) -> str:
+        return self.generated_at
+
+    def chapter_rng(self, chapter: int) -> random.Random:
+        """第 chapter 回的独立随机数流"""
+        return random.Random(f"{self.seed}:book:{chapter}")
+
+    def build_chapter(self, chapter: int) -> Dict:
+        """生成一回的完整记录：大纲、章节设计与世界观片段"""
+        plan = self.plans[chapter]
+        outline = plan.outline
+        rng = self.chapter_rng(chapter)
+        generator = ChapterGenerator(rng=rng, clock=self._clock)
+        if plan.constraints is not None:
+            design = generator.generate_constrained_design(plan.constraints)
+        else:
+            design = generator.generate_complete_chapter_design()
+        design["metadata"]["chapter_number"] = chapter
+        design["metadata"]["design_id"] = f"book_{self.seed}_{chapter:03d}"
+        design["chapter_title"] = outline.title
+
+        worldview = []
+        for name in plan.entities:
+            category, snippet = self.worldview.snippet_for(name)
+            worldview.append({"entity": name, "kind": self.graph.kind(name), "category": category,
+                              "snippet": snippet})
+        if not worldview:
+            # 回目与概要未提到任何已知实体时，按本回的随机数流补一个片段
+            category = rng.choice(SNIPPET_CATEGORIES)
+            snippet = GraphWorldViewGenerator(rng=rng, graph=self.graph).generate_worldview_snippet(category)
+            worldview.append({"entity": None, "kind": None, "category": category, "snippet": snippet})
+
+        return {
+            "chapter": chapter,
+            "title": outline.title,
+            "summary": outline.summary,
+            "stage": OVERVIEW_STAGES[plan.stage]["name"] if plan.stage is not None else None,
+            "design": design,
+            "worldview": worldview,
+        }
+
+    def iter_chapters(self, chapters: List[int], workers: int = DEFAULT_WORKERS) -> Iterator[Dict]:
+        """并行生成各回并按回目顺序产出"""
+        if workers <= 1:
+            for chapter in chapters:
+                yield self.build_chapter(chapter)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(self.build_chapter, chapters)
+
+
+def render_chapter_markdown(record: Dict) -> str:
+    """一回的 Markdown：回目与概要、章节设计、世界观片段"""
+    design_markdown = render_design(record["design"], "markdown")
+    body = design_markdown.split("\n", 1)[1]
+    parts = [f"## 第{record['chapter']}回 {record['title']}\n\n> {record['summary']}\n", body, "\n### 世界观\n\n"]
+    for item in record["worldview"]:
+        label = CATEGORY_LABELS.get(item["category"], item["category"])
+        snippet = item["snippet"]
+        if item["category"] == "entity":
+            relations = "；".join(f"{RELATION_LABELS.get(key, key)}：{'、'.join(value)}"
+                                 for key, value in snippet.items() if isinstance(value, list) and value)
+            parts.append(f"- **{item['entity']}**（{label}）：{relations or '暂无关系记录'}\n")
+        else:
+            detail = snippet.get("story") or snippet.get("description") or ""
+            parts.append(f"- **{item['entity'] or snippet.get('name') or snippet.get('place') or ''}**"
+                         f"（{label}）：{detail}\n")
+    return "".join(parts) + "\n"
+
+
+def write_bundle(builder: BookBuilder, output: Path, chapters: List[int],
+                 workers: int = DEFAULT_WORKERS) -> Dict:
+    """按回目顺序流式写出设计包，返回清单"""
+    chapters_dir = output / "chapters"
+    chapters_dir.mkdir(parents=True, exist_ok=True)
+    snippets = 0
+    current_stage = None
+    with open(output / "book.jsonl", "w", encoding="utf-8") as jsonl, \
+            open(output / "book.md", "w", encoding="utf-8") as markdown:
+        markdown.write("# 《西游记》创作设计\n\n")
+        for record in builder.iter_chapters(chapters, workers):
+            line = json.dumps(record, ensure_ascii=False)
+            jsonl.write(line + "\n")
+            (chapters_dir / f"{record['chapter']:03d}.json").write_text(
+                json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+            if record["stage"] != current_stage:
+                current_stage = record["stage"]
+                markdown.write(f"# {current_stage or '其他回目'}\n\n")
+            markdown.write(render_chapter_markdown(record))
+            snippets += len(record["worldview"])
+
+    manifest = {
+        "seed": builder.seed,
+        "generated_at": builder.generated_at,
+        "chapters": len(chapters),
+        "range": [chapters[0], chapters[-1]] if chapters else [],
+        "worldview_snippets": snippets,
+        "stages": [dict(stage) for stage in OVERVIEW_STAGES],
+        "files": {"jsonl": "book.jsonl", "markdown": "book.md", "chapters": "chapters/"},
+    }
+    (output / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+def parse_chapter_range(value: str) -> List[int]:
+    """解析回目范围，如 1-100、13-22、59"""
+    start, sep, end = value.partition("-")
+    try:
+        first, last = int(start), int(end) if sep else int(start)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"回目范围格式应为 起-止：{value}") from None
+    if not 1 <= first <= last <= TOTAL_CHAPTERS:
+        raise argparse.ArgumentTypeError(f"回目范围应在 1-{TOTAL_CHAPTERS} 之间：{value}")
+    return list(range(first, last + 1))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="为100回生成章节设计与对应的世界观片段，写入一个设计包目录")
+    parser.add_argument("-o", "--output", default="book", help="设计包目录（默认 book）")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="随机种子（默认0）")
+    parser.add_argument("-j", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"工作线程数（默认{DEFAULT_WORKERS}，不影响输出）")
+    parser.add_argument("-r", "--range", dest="chapters", type=parse_chapter_range,
+                        default=list(range(1, TOTAL_CHAPTERS + 1)), help="回目范围（默认 1-100）")
+    parser.add_argument("--generated-at", help="固定写入设计的生成时间；与 --seed 同用时输出逐字节可复现")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    builder = BookBuilder(seed=args.seed, generated_at=args.generated_at)
+    loaded = time.perf_counter()
+    try:
+        manifest = write_bundle(builder, Path(args.output), args.chapters, args.workers)
+    except OSError as e:
+        sys.exit(str(e))
+    end = time.perf_counter()
+    print(f"已生成 {manifest['chapters']} 回设计与 {manifest['worldview_snippets']} 个世界观片段到 {args.output}/，"
+          f"加载 {loaded - start:.2f} s，生成与写出 {end - loaded:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》本地生成服务
+常驻进程同时监听 HTTP 端口与 Unix 套接字，提供大纲、章节设计与世界观生成；
+并发请求按类型合并为小批次交给执行器运行，并统计各接口的延迟分位数
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world", "journey-to-the-west-outline"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import TEMPLATE_NAMES, ChapterGenerator  # noqa: E402
+from generate_outline import generate_chapter_summary, generate_overview  # noqa: E402
+from generate_worldview import SNIPPET_CATEGORIES, WorldViewGenerator  # noqa: E402
+from outline_store import get_outline_store  # noqa: E402
+from result_cache import DEFAULT_MAXSIZE, DEFAULT_TTL, ResultCache, make_key  # noqa: E402
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 64
+MAX_COUNT = 1000
+LATENCY_WINDOW = 10000
+# 请求体上限（字节）；请求参数只有寥寥几项，超过即拒绝，避免按客户端声明的长度无限读取
+MAX_BODY_BYTES = 64 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(ValueError):
+    """请求参数错误，对应 HTTP 400"""
+
+    status = 400
+
+
+class PayloadTooLargeError(RequestError):
+    """请求体超过 MAX_BODY_BYTES，对应 HTTP 413"""
+
+    status = 413
+
+
+def _error_body(message: str) -> bytes:
+    """错误响应体"""
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# 生成逻辑：在执行器线程中按批运行
+# ---------------------------------------------------------------------------
+
+def _body_params(body: bytes) -> Dict[str, str]:
+    """解析 JSON 请求体，必须是对象，取值统一转为字符串"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise RequestError("请求体不是合法的JSON") from None
+    if not isinstance(payload, dict):
+        raise RequestError("请求体必须是JSON对象")
+    return {key: str(value) for key, value in payload.items()}
+
+
+def _content_length(headers: Dict[str, str]) -> int:
+    """读取 Content-Length 请求头"""
+    value = headers.get("content-length") or "0"
+    try:
+        length = int(value)
+    except ValueError:
+        raise RequestError("Content-Length 必须是非负整数") from None
+    if length < 0:
+        raise RequestError("Content-Length 必须是非负整数")
+    if length > MAX_BODY_BYTES:
+        raise PayloadTooLargeError(f"请求体不能超过 {MAX_BODY_BYTES} 字节")
+    return length
+
+
+def _int_param(params: Dict[str, str], name: str, default: Optional[int] = None,
+               low: Optional[int] = None, high: Optional[int] = None) -> Optional[int]:
+    """读取整数参数并校验范围"""
+    value = params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RequestError(f"参数 {name} 必须是整数") from None
+    if (low is not None and number < low) or (high is not None and number > high):
+        raise RequestError(f"参数 {name} 超出范围 {low}-{high}")
+    return number
+
+
+class GenerationService:
+    """持有常驻生成器，将一批请求参数转为 JSON 响应体
+
+    结果可复现的请求（带 seed 与 generated_at 的章节设计、带 seed 的世界观、按回目或整体结构查询的大纲）
+    的响应体写入结果缓存，缓存键取解析后的参数值，重复请求不再重新生成。
+    """
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache
+        self.chapter_generator = ChapterGenerator()
+        self.worldview_generator = WorldViewGenerator()
+        # 启动时预先加载大纲索引，首个请求无需解析 Markdown
+        get_outline_store()
+
+    def chapter(self, params: Dict[str, str]):
+        """章节设计：template、seed、count；generated_at 固定写入设计的生成时间（默认取当前时间）"""
+        template = params.get("template") or None
+        if template is not None and template not in TEMPLATE_NAMES:
+            raise RequestError(f"未知模板：{template}")
+        count = _int_param(params, "count", 1, 1, MAX_COUNT)
+        seed = _int_param(params, "seed")
+        generated_at = params.get("generated_at") or None
+        if seed is None and generated_at is None:
+            generator = self.chapter_generator
+        else:
+            generator = ChapterGenerator(seed=seed, clock=(lambda: generated_at) if generated_at else None)
+        designs = [generator.generate_complete_chapter_design(template) for _ in range(count)]
+        return designs[0] if "count" not in params else designs
+
+    def worldview(self, params: Dict[str, str]):
+        """世界观：category 为片段类别，full=1 时生成完整世界观；支持 seed、count"""
+        category = params.get("category") or None
+        if category is not None and category not in SNIPPET_CATEGORIES:
+            raise RequestError(f"未知类别：{category}")
+        count = _int_param(params, "count", 1, 1, MAX_COUNT)
+        seed = _int_param(params, "seed")
+        generator = (self.worldview_generator if seed is None
+                     else WorldViewGenerator(rng=random.Random(seed)))
+        if params.get("full") in ("1", "true"):
+            make = generator.generate_full_worldview
+        else:
+            make = lambda: generator.generate_worldview_snippet(category)
+        results = [make() for _ in range(count)]
+        return results[0] if "count" not in params else results
+
+    def outline(self, params: Dict[str, str]):
+        """大纲：chapter 指定回目，overview=1 返回整体结构，否则随机一回；支持 seed"""
+        if params.get("overview") in ("1", "true"):
+            return generate_overview()
+        chapter = _int_param(params, "chapter", None, 1, 100)
+        seed = _int_param(params, "seed")
+        return generate_chapter_summary(chapter, rng=random.Random(seed) if seed is not None else None)
+
+    def cache_key(self, kind: str, params: Dict[str, str]):
+        """可复现请求的缓存键，其余请求返回 None
+
+        键由解析后的参数值构成：空的 seed、chapter 视为未指定，overview=0 视为随机一回；
+        章节设计含生成时间，只有同时指定 seed 与 generated_at 时才可复现。
+        """
+        if self.cache is None:
+            return None
+        try:
+            seed = _int_param(params, "seed")
+            # 是否指定 count 决定返回单份还是列表
+            count = _int_param(params, "count", 1, 1, MAX_COUNT) if "count" in params else None
+            if kind == "chapter":
+                generated_at = params.get("generated_at") or None
+                if seed is None or generated_at is None:
+                    return None
+                return make_key(kind, seed, params.get("template") or None, count=count,
+                                generated_at=generated_at)
+            if kind == "worldview":
+                if seed is None:
+                    return None
+                return make_key(kind, seed, None, category=params.get("category") or None,
+                                full=params.get("full") in ("1", "true"), count=count)
+            if params.get("overview") in ("1", "true"):
+                return make_key(kind, None, None, overview=True)
+            chapter = _int_param(params, "chapter", None, 1, 100)
+        except RequestError:
+            # 参数错误由处理函数返回 400，不经过缓存
+            return None
+        if chapter is not None:
+            # 按回目查询时结果与 seed 无关
+            return make_key(kind, None, None, chapter=chapter)
+        return make_key(kind, seed, None) if seed is not None else None
+
+    def run_batch(self, kind: str, batch: List[Dict[str, str]]) -> List[Tuple[int, bytes]]:
+        """运行同一类型的一批请求，返回每个请求的（状态码, 响应体）"""
+        handler = getattr(self, kind)
+        dumps = json.dumps
+        responses = []
+        for params in batch:
+            key = self.cache_key(kind, params)
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    responses.append((200, cached))
+                    continue
+            try:
+                body = dumps(handler(params), ensure_ascii=False).encode("utf-8")
+                if key is not None:
+                    self.cache.put(key, body)
+                responses.append((200, body))
+            except RequestError as exc:
+                responses.append((400, _error_body(str(exc))))
+            except Exception as exc:  # 单个请求出错不影响同批次其他请求
+                responses.append((500, _error_body(repr(exc))))
+        return responses
+
+
+# ---------------------------------------------------------------------------
+# 请求合并与延迟统计
+# ---------------------------------------------------------------------------
+
+class MicroBatcher:
+    """将同一类型的并发请求合并为小批次，一次提交给执行器"""
+
+    def __init__(self, run_batch: Callable[[List], List], executor: Optional[Executor],
+                 max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = 0.0):
+        self.run_batch = run_batch
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.batches = 0
+        self.requests = 0
+
+    async def submit(self, params: Dict[str, str]):
+        """提交一个请求并等待其结果"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((params, future))
+        return await future
+
+    async def run(self):
+        """收集循环：取到第一个请求后，合并此刻已排队（或 max_delay 内到达）的请求"""
+        loop = asyncio.get_running_loop()
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            if self.max_delay:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                requests = [params for params, _ in batch]
+                if self.executor is None:
+                    results = self.run_batch(requests)
+                else:
+                    results = await loop.run_in_executor(self.executor, self.run_batch, requests)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class LatencyStats:
+    """按接口记录最近若干次请求的服务端延迟"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+
+    def record(self, route: str, seconds: float):
+        """记录一次请求的耗时"""
+        samples = self.samples.get(route)
+        if samples is None:
+            samples = self.samples[route] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self.counts[route] = self.counts.get(route, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """各接口的请求数与 p50/p90/p99/max 延迟（毫秒）"""
+        report = {}
+        for route, samples in self.samples.items():
+            ordered = sorted(samples)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+            report[route] = {
+                "count": self.counts[route],
+                "window": len(ordered),
+                "p50_ms": round(pick(0.50), 4),
+                "p90_ms": round(pick(0.90), 4),
+                "p99_ms": round(pick(0.99), 4),
+                "max_ms": round(ordered[-1] * 1000, 4),
+            }
+        return report
+
+
+# ---------------------------------------------------------------------------
+# HTTP 处理
+# ---------------------------------------------------------------------------
+
+class GenerationServer:
+    """HTTP/1.1 服务：TCP 与 Unix 套接字共用同一处理逻辑，支持长连接"""
+
+    ROUTES = ("chapter", "worldview", "outline")
+
+    def __init__(self, service: GenerationService, executor: Optional[Executor],
+                 max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = 0.0):
+        self.service = service
+        self.batchers = {
+            kind: MicroBatcher(lambda batch, kind=kind: service.run_batch(kind, batch),
+                               executor, max_batch, max_delay)
+            for kind in self.ROUTES
+        }
+        self.latency = LatencyStats()
+        self.started = time.time()
+
+    def stats(self) -> Dict:
+        """服务状态与延迟分位数"""
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "latency": self.latency.snapshot(),
+            "cache": self.service.cache.snapshot() if self.service.cache is not None else None,
+            "batches": {
+                kind: {"batches": batcher.batches, "requests": batcher.requests,
+                       "mean_batch": round(batcher.requests / batcher.batches, 2) if batcher.batches else 0}
+                for kind, batcher in self.batchers.items()
+            },
+        }
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[str, int, bytes]:
+        """路由一个请求，返回（接口名, 状态码, 响应体）"""
+        url = urlsplit(target)
+        route = url.path.strip("/")
+        if method not in ("GET", "POST"):
+            return route, 405, b'{"error": "method not allowed"}'
+        params = dict(parse_qsl(url.query))
+        if body:
+            try:
+                params.update(_body_params(body))
+            except RequestError as exc:
+                return route, 400, _error_body(str(exc))
+        if route in self.batchers:
+            status, response = await self.batchers[route].submit(params)
+            return route, status, response
+        if route == "stats":
+            return route, 200, json.dumps(self.stats(), ensure_ascii=False).encode("utf-8")
+        if route == "health":
+            return route, 200, b'{"status": "ok"}'
+        return "other", 404, b'{"error": "not found"}'
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, response: bytes, keep_alive: bool):
+        """写出一个 JSON 响应"""
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(response)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+            + response
+        )
+        await writer.drain()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接上的若干个请求"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    # 请求头超过流缓冲上限，无法定位请求边界，回复错误后关闭连接
+                    await self._respond(writer, 431, _error_body("请求头过大"), False)
+                    break
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    break
+                # 未经百分号编码的中文参数按 UTF-8 还原
+                target = target.encode("latin-1").decode("utf-8", "replace")
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version != "HTTP/1.0")
+                try:
+                    length = _content_length(headers)
+                except RequestError as exc:
+                    # 请求体长度未知或过大，不读取请求体，回复错误后关闭连接
+                    route, status, response = "other", exc.status, _error_body(str(exc))
+                    keep_alive = False
+                else:
+                    try:
+                        body = await reader.readexactly(length) if length else b""
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break  # 客户端在请求体发完之前断开
+                    route, status, response = await self.dispatch(method, target, body)
+                await self._respond(writer, status, response, keep_alive)
+                self.latency.record(route, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host: Optional[str], port: Optional[int], unix_path: Optional[str]):
+        """启动监听并常驻运行"""
+        tasks = [asyncio.create_task(batcher.run()) for batcher in self.batchers.values()]
+        servers = []
+        if port is not None:
+            servers.append(await asyncio.start_server(self.handle_connection, host, port))
+            print(f"HTTP 监听：http://{host}:{port}/", file=sys.stderr)
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            servers.append(await asyncio.start_unix_server(self.handle_connection, unix_path))
+            print(f"Unix 套接字：{unix_path}", file=sys.stderr)
+        # SIGINT/SIGTERM 时停止监听、取消收集任务并删除套接字文件
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            for server in servers:
+                server.close()
+            for task in tasks:
+                task.cancel()
+            if unix_path and os.path.exists(unix_path):
+                os.unlink(unix_path)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》本地生成服务（HTTP 与 Unix 套接字）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"HTTP 监听地址（默认{DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"HTTP 端口（默认{DEFAULT_PORT}）")
+    parser.add_argument("--no-http", action="store_true", help="不监听 HTTP 端口，只使用 Unix 套接字")
+    parser.add_argument("--unix", help="Unix 套接字路径，如 /tmp/xiyou.sock")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help=f"单个批次最多合并的请求数（默认{DEFAULT_MAX_BATCH}）")
+    parser.add_argument("--batch-delay-us", type=int, default=0,
+                        help="收到首个请求后等待更多请求的微秒数（默认0，只合并已排队的请求）")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAXSIZE,
+                        help=f"结果缓存容量（默认{DEFAULT_MAXSIZE}，0 表示不缓存）")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help=f"缓存条目存活秒数（默认{DEFAULT_TTL:g}）")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="执行生成任务的线程数（默认1；0 表示直接在事件循环中运行，单客户端延迟最低）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    if args.no_http and not args.unix:
+        sys.exit("--no-http 时必须指定 --unix")
+    executor = (ThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="generate")
+                if args.threads > 0 else None)
+    cache = ResultCache(args.cache_size, args.cache_ttl) if args.cache_size > 0 else None
+    server = GenerationServer(GenerationService(cache), executor, args.max_batch,
+                              args.batch_delay_us / 1e6)
+    # 目录、大纲索引等常驻对象移入永久代，此后的垃圾回收不再反复扫描它们，降低尾延迟
+    gc.collect()
+    gc.freeze()
+    try:
+        asyncio.run(server.serve(args.host, None if args.no_http else args.port, args.unix))
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》图片资产清单
+通过 mmap 只读取 PNG/JPEG 文件头获取尺寸，不解码像素；清单按修改时间增量更新，
+并一次性校验 100 回组图与各 Markdown 中引用的图片是否缺失或扩展名不符
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = REPO_ROOT / ".cache"
+DEFAULT_MANIFEST_PATH = CACHE_DIR / "image_manifest.json"
+
+# 纳入清单的图片目录：仓库根目录的组图与人物四视角图，以及人物技能中的形象图
+IMAGE_ROOTS = (
+    REPO_ROOT / "images",
+    REPO_ROOT / ".codebuddy" / "skills" / "journey-to-the-west-character" / "references" / "characters",
+)
+IMAGE_SUFFIXES = {".png": "png", ".jpg": "jpeg", ".jpeg": "jpeg"}
+
+# 引用图片的仓库根目录文档
+LINKING_DOCUMENTS = ("README.md", "取经主角.md", "西游记100回.md")
+TOTAL_CHAPTERS = 100
+
+MANIFEST_VERSION = 1
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# 携带图像尺寸的 JPEG 帧起始标记（SOF0-SOF15，排除 DHT/JPG/DAC）
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_IMAGE_LINK = re.compile(r"!\[[^\]]*\]\(([^)\s]+)")
+_CHAPTER_IMAGE = re.compile(r"^images/100/(\d+)\.(\w+)$")
+
+
+def read_image_header(buffer) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """从文件内容的开头解析（格式, 宽, 高），无法识别时返回 (None, None, None)"""
+    if buffer[:8] == _PNG_SIGNATURE and buffer[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", buffer[16:24])
+        return "png", width, height
+    if buffer[:2] == b"\xff\xd8":
+        # 逐段跳过 JPEG 标记，直到遇到帧起始段
+        offset, size = 2, len(buffer)
+        while offset + 4 <= size:
+            if buffer[offset] != 0xFF:
+                break
+            marker = buffer[offset + 1]
+            if marker == 0xFF:
+                offset += 1
+                continue
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                offset += 2
+                continue
+            (length,) = struct.unpack(">H", buffer[offset + 2:offset + 4])
+            if marker in _JPEG_SOF_MARKERS and offset + 9 <= size:
+                height, width = struct.unpack(">HH", buffer[offset + 5:offset + 9])
+                return "jpeg", width, height
+            offset += 2 + length
+        return "jpeg", None, None
+    return None, None, None
+
+
+def inspect_image(path: Path) -> Dict:
+    """映射文件并读取头部与内容哈希，不解码像素"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return {"format": None, "width": None, "height": None, "blake2b": hashlib.blake2b().hexdigest()}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            image_format, width, height = read_image_header(mapped)
+            digest = hashlib.blake2b(mapped, digest_size=16).hexdigest()
+    return {"format": image_format, "width": width, "height": height, "blake2b": digest}
+
+
+def iter_image_files(roots=IMAGE_ROOTS):
+    """遍历清单目录下的全部图片文件"""
+    for root in roots:
+        if not root.is_dir():
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                if Path(filename).suffix.lower() in IMAGE_SUFFIXES:
+                    yield Path(dirpath) / filename
+
+
+class ImageManifest:
+    """图片清单：相对路径→尺寸、大小、哈希等元数据"""
+
+    def __init__(self, path: Path = DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self.stats = {"reused": 0, "inspected": 0, "removed": 0}
+
+    def load(self):
+        """读取已有清单，不存在或版本不符时为空"""
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return
+        if payload.get("version") == MANIFEST_VERSION:
+            self.entries = payload.get("images", {})
+
+    def save(self):
+        """原子地写入清单"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": MANIFEST_VERSION, "images": self.entries},
+                       ensure_ascii=False, indent=1, sort_keys=True),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.path)
+
+    def update(self, force: bool = False) -> bool:
+        """按修改时间与大小增量更新，返回清单是否发生变化"""
+        self.stats = dict.fromkeys(self.stats, 0)
+        entries: Dict[str, Dict] = {}
+        for path in iter_image_files():
+            key = path.relative_to(REPO_ROOT).as_posix()
+            stat = path.stat()
+            entry = self.entries.get(key)
+            if (not force and entry and entry["mtime_ns"] == stat.st_mtime_ns
+                    and entry["size"] == stat.st_size):
+                entries[key] = entry
+                self.stats["reused"] += 1
+                continue
+            entry = inspect_image(path)
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                         suffix_format=IMAGE_SUFFIXES[path.suffix.lower()])
+            entries[key] = entry
+            self.stats["inspected"] += 1
+        self.stats["removed"] = len(set(self.entries) - set(entries))
+        changed = bool(self.stats["inspected"] or self.stats["removed"])
+        self.entries = entries
+        return changed
+
+
+def check_references(manifest: ImageManifest) -> Dict[str, List]:
+    """一次遍历校验图片引用与文件内容，返回各类问题清单"""
+    entries = manifest.entries
+    by_stem: Dict[str, List[str]] = {}
+    for key in entries:
+        by_stem.setdefault(key.rsplit(".", 1)[0], []).append(key)
+
+    report: Dict[str, List] = {
+        "missing_links": [],          # 文档引用的图片不存在
+        "extension_mismatch": [],     # 引用的扩展名不对，但同名其他扩展名文件存在
+        "content_mismatch": [],       # 文件内容格式与扩展名不符
+        "unreadable": [],             # 无法识别的图片头
+        "chapters_without_image": [], # 100 回中没有任何图片文件的回目
+    }
+    for document in LINKING_DOCUMENTS:
+        doc_path = REPO_ROOT / document
+        if not doc_path.is_file():
+            continue
+        for line_number, line in enumerate(doc_path.read_text(encoding="utf-8").splitlines(), 1):
+            for target in _IMAGE_LINK.findall(line):
+                if "://" in target:
+                    continue
+                if target in entries:
+                    continue
+                alternatives = by_stem.get(target.rsplit(".", 1)[0], [])
+                problem = {"document": document, "line": line_number, "target": target}
+                if alternatives:
+                    problem["found"] = alternatives
+                    report["extension_mismatch"].append(problem)
+                else:
+                    report["missing_links"].append(problem)
+
+    for key, entry in sorted(entries.items()):
+        if entry["format"] is None or entry["width"] is None:
+            report["unreadable"].append(key)
+        elif entry["format"] != entry["suffix_format"]:
+            report["content_mismatch"].append({"path": key, "format": entry["format"]})
+
+    chapters_with_image = set()
+    for key in entries:
+        match = _CHAPTER_IMAGE.match(key)
+        if match:
+            chapters_with_image.add(int(match.group(1)))
+    report["chapters_without_image"] = [
+        chapter for chapter in range(1, TOTAL_CHAPTERS + 1) if chapter not in chapters_with_image
+    ]
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="构建并校验《西游记》图片资产清单")
+    parser.add_argument("--force", action="store_true", help="忽略已有清单，重新读取全部图片")
+    parser.add_argument("--manifest", default=str(DEFAULT_MANIFEST_PATH), help="清单文件路径")
+    parser.add_argument("--json", action="store_true", help="以JSON输出校验报告")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    manifest = ImageManifest(Path(args.manifest))
+    if not args.force:
+        manifest.load()
+    if manifest.update(force=args.force):
+        manifest.save()
+    report = check_references(manifest)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 1 if any(report[key] for key in report if key != "chapters_without_image") else 0
+
+    total_bytes = sum(entry["size"] for entry in manifest.entries.values())
+    print(f"图片清单：{len(manifest.entries)} 个文件，共 {total_bytes / 1024 / 1024:.1f} MB，用时 {elapsed_ms:.1f} ms")
+    print("复用 {reused}，重新读取 {inspected}，移除 {removed}".format(**manifest.stats))
+    missing_by_document: Dict[str, List[str]] = {}
+    for problem in report["missing_links"]:
+        missing_by_document.setdefault(problem["document"], []).append(problem["target"])
+    for document, targets in missing_by_document.items():
+        print(f"缺失：{document} 中 {len(targets)} 处引用的图片不存在：{', '.join(targets)}")
+    for problem in report["extension_mismatch"]:
+        print(f"扩展名不符：{problem['document']}:{problem['line']} 引用 {problem['target']}，"
+              f"实际为 {', '.join(problem['found'])}")
+    for problem in report["content_mismatch"]:
+        print(f"内容与扩展名不符：{problem['path']} 实际为 {problem['format']}")
+    for path in report["unreadable"]:
+        print(f"无法识别图片头：{path}")
+    missing = report["chapters_without_image"]
+    print(f"100回组图：{TOTAL_CHAPTERS - len(missing)} 回有图，{len(missing)} 回缺图")
+    return 1 if any(report[key] for key in report if key != "chapters_without_image") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》生成器插桩
+按需为章节生成器的各子生成器与世界观生成器的各类别记录调用次数、耗时与内存块增量，
+统计结果可导出为 JSON 快照或 Prometheus 文本格式。插桩只替换单个实例上的方法，
+未插桩的生成器与原来完全相同，没有任何额外开销
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import ChapterGenerator  # noqa: E402
+from generate_worldview import WorldViewGenerator  # noqa: E402
+
+# 章节生成器：方法名 → 阶段名（complete 为整份设计，其余为其中的子生成器）
+CHAPTER_STAGES = {
+    "generate_complete_chapter_design": "complete",
+    "generate_chapter_title": "chapter_title",
+    "generate_structure_plan": "structure_plan",
+    "_generate_stage_content": "stage_content",
+    "_generate_key_elements": "key_elements",
+    "generate_character_performance": "character_performance",
+    "generate_scene_description": "scene",
+    "generate_conflict_scene": "conflict",
+    "generate_artistic_features": "artistic_features",
+    "generate_thematic_connections": "thematic_connections",
+    "generate_adaptation_suggestions": "adaptation_suggestions",
+}
+
+# 世界观生成器：方法名 → 类别名（与 generate_worldview_snippet 的 category 一致）
+WORLDVIEW_STAGES = {
+    "generate_full_worldview": "full_worldview",
+    "generate_worldview_snippet": "snippet",
+    "generate_realm_description": "realm",
+    "generate_deity_profile": "deity",
+    "generate_monster_story": "monster",
+    "generate_artifact_info": "artifact",
+    "generate_cultivation_path": "cultivation",
+    "generate_geography_feature": "geography",
+}
+
+_INSTRUMENTED = "_instrumented_methods"
+
+
+class StageStats:
+    """单个阶段的累计统计
+
+    blocks 为调用前后 sys.getallocatedblocks() 的差值之和，即调用结束时仍存活的
+    新分配内存块数（返回的结果对象计入其中），不是分配动作的总次数。
+    嵌套阶段的耗时包含在外层阶段之内。
+    """
+
+    __slots__ = ("calls", "total_ns", "max_ns", "blocks")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.blocks = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_s": round(self.total_ns / 1e9, 6),
+            "mean_us": round(self.total_ns / self.calls / 1e3, 3) if self.calls else 0.0,
+            "max_us": round(self.max_ns / 1e3, 3),
+            "blocks": self.blocks,
+            "blocks_per_call": round(self.blocks / self.calls, 2) if self.calls else 0.0,
+        }
+
+
+class Instrumentation:
+    """插桩统计收集器，按（生成器, 阶段）汇总"""
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], StageStats] = {}
+        self._lock = threading.Lock()
+
+    def stage(self, generator: str, stage: str) -> StageStats:
+        """取得（必要时创建）某阶段的统计对象"""
+        key = (generator, stage)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StageStats()
+            return stats
+
+    def wrap(self, generator: str, stage: str, method: Callable) -> Callable:
+        """返回记录统计的包装函数"""
+        stats = self.stage(generator, stage)
+        perf_counter_ns = time.perf_counter_ns
+        allocated_blocks = sys.getallocatedblocks
+
+        def timed(*args, **kwargs):
+            blocks = allocated_blocks()
+            start = perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                stats.calls += 1
+                stats.total_ns += elapsed
+                if elapsed > stats.max_ns:
+                    stats.max_ns = elapsed
+                stats.blocks += allocated_blocks() - blocks
+
+        timed.__wrapped__ = method
+        timed.__doc__ = method.__doc__
+        return timed
+
+    def reset(self):
+        """清空全部统计"""
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """JSON 快照：{生成器: {阶段: 统计}}"""
+        result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        with self._lock:
+            items = sorted(self._stats.items())
+        for (generator, stage), stats in items:
+            result.setdefault(generator, {})[stage] = stats.as_dict()
+        return result
+
+    def to_prometheus(self, prefix: str = "xiyou_generator") -> str:
+        """Prometheus 文本格式（计数器类型）"""
+        with self._lock:
+            items = sorted(self._stats.items())
+        metrics = (
+            ("calls_total", "生成阶段调用次数", lambda s: s.calls),
+            ("seconds_total", "生成阶段累计耗时（秒）", lambda s: s.total_ns / 1e9),
+            ("allocated_blocks_total", "生成阶段调用结束时仍存活的新分配内存块数", lambda s: s.blocks),
+        )
+        lines = []
+        for suffix, help_text, value in metrics:
+            name = f"{prefix}_stage_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (generator, stage), stats in items:
+                lines.append(f'{name}{{generator="{generator}",stage="{stage}"}} {_format_sample(value(stats))}')
+        return "\n".join(lines) + "\n"
+
+
+def _format_sample(value) -> str:
+    """Prometheus 样本值：整数原样输出，浮点数取可往返的最短表示（不截断有效数字）"""
+    return f"{value:d}" if isinstance(value, int) else repr(float(value))
+
+
+def _instrument(target: Any, label: str, stages: Dict[str, str], collector: Instrumentation):
+    """在实例上以包装函数覆盖各阶段方法（类本身不受影响）"""
+    if getattr(target, _INSTRUMENTED, None):
+        raise ValueError("该生成器已插桩")
+    for method_name, stage in stages.items():
+        setattr(target, method_name, collector.wrap(label, stage, getattr(target, method_name)))
+    setattr(target, _INSTRUMENTED, tuple(stages))
+
+
+def _rebind_snippets(generator: WorldViewGenerator):
+    """片段分派表保存的是绑定方法，插桩或恢复后需按当前属性重建"""
+    generator._snippet_generators = {
+        category: getattr(generator, method_name)
+        for method_name, category in WORLDVIEW_STAGES.items()
+        if category in generator._snippet_generators
+    }
+
+
+def instrument_chapter(generator: ChapterGenerator, collector: Instrumentation,
+                       label: str = "chapter") -> ChapterGenerator:
+    """为章节生成器实例插桩
+
+    指定 seed 的调用会在新实例上生成，只记录到 complete 阶段，不细分子生成器。
+    """
+    _instrument(generator, label, CHAPTER_STAGES, collector)
+    return generator
+
+
+def instrument_worldview(generator: WorldViewGenerator, collector: Instrumentation,
+                         label: str = "worldview") -> WorldViewGenerator:
+    """为世界观生成器实例插桩，并重建片段分派表使其指向包装后的方法"""
+    _instrument(generator, label, WORLDVIEW_STAGES, collector)
+    _rebind_snippets(generator)
+    return generator
+
+
+def uninstrument(generator: Any):
+    """移除实例上的包装函数，恢复为类上的原方法"""
+    for method_name in getattr(generator, _INSTRUMENTED, ()):
+        delattr(generator, method_name)
+    if hasattr(generator, _INSTRUMENTED):
+        delattr(generator, _INSTRUMENTED)
+        if isinstance(generator, WorldViewGenerator):
+            _rebind_snippets(generator)
+
+
+@contextmanager
+def instrumented(generator: Any, collector: Optional[Instrumentation] = None) -> Iterator[Instrumentation]:
+    """在 with 块内为生成器插桩，退出时自动恢复"""
+    collector = collector if collector is not None else Instrumentation()
+    if isinstance(generator, WorldViewGenerator):
+        instrument_worldview(generator, collector)
+    elif isinstance(generator, ChapterGenerator):
+        instrument_chapter(generator, collector)
+    else:
+        raise TypeError(f"不支持的生成器类型：{type(generator).__name__}")
+    try:
+        yield collector
+    finally:
+        uninstrument(generator)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="插桩运行生成器并输出各阶段统计")
+    parser.add_argument("kind", choices=("chapter", "worldview", "snippet"), help="生成内容类型")
+    parser.add_argument("-n", "--count", type=int, default=10000, help="生成数量（默认10000）")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    parser.add_argument("-f", "--format", choices=("json", "prometheus"), default="json", help="统计输出格式")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    collector = Instrumentation()
+    if args.kind == "chapter":
+        generator = instrument_chapter(ChapterGenerator(seed=args.seed), collector)
+        make = generator.generate_complete_chapter_design
+    else:
+        generator = instrument_worldview(WorldViewGenerator(seed=args.seed), collector)
+        make = generator.generate_full_worldview if args.kind == "worldview" else generator.generate_worldview_snippet
+
+    start = time.perf_counter()
+    for _ in range(args.count):
+        make()
+    elapsed = time.perf_counter() - start
+
+    try:
+        if args.format == "json":
+            print(json.dumps(collector.snapshot(), ensure_ascii=False, indent=2))
+        else:
+            sys.stdout.write(collector.to_prometheus())
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    print(f"已生成 {args.count} 份，用时 {elapsed:.2f} s（含插桩开销）", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
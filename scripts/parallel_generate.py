@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》多进程批量生成脚本
+将章节设计、世界观、大纲摘要的批量生成分发到进程池，结果按序合并输出
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world", "journey-to-the-west-outline"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import TEMPLATE_NAMES, ChapterGenerator  # noqa: E402
+from generate_outline import generate_chapter_summary  # noqa: E402
+from generate_worldview import SNIPPET_CATEGORIES, WorldViewGenerator  # noqa: E402
+
+KINDS = ("chapter", "worldview", "snippet", "outline")
+DEFAULT_CHUNK_SIZE = 256
+
+
+def chunk_rng(seed: int, kind: str, chunk_index: int) -> random.Random:
+    """为指定任务块创建独立的随机数流
+
+    随机数流只由（种子、类型、块编号）决定，与工作进程数量无关，
+    因此同一种子在1核或32核上得到完全相同的结果。
+    """
+    return random.Random(f"{seed}:{kind}:{chunk_index}")
+
+
+def generate_chunk(kind: str, seed: int, chunk_index: int, count: int,
+                   options: Optional[Dict] = None, serialize: bool = False) -> List:
+    """生成一个任务块；serialize为真时在工作进程内直接序列化为JSON行"""
+    options = options or {}
+    rng = chunk_rng(seed, kind, chunk_index)
+
+    if kind == "chapter":
+        generated_at = options.get("generated_at")
+        clock = (lambda: generated_at) if generated_at is not None else None
+        generator = ChapterGenerator(rng=rng, clock=clock)
+        template_name = options.get("template_name")
+        make = lambda: generator.generate_complete_chapter_design(template_name)
+    elif kind == "worldview":
+        make = WorldViewGenerator(rng=rng).generate_full_worldview
+    elif kind == "snippet":
+        generator = WorldViewGenerator(rng=rng)
+        category = options.get("category")
+        make = lambda: generator.generate_worldview_snippet(category)
+    elif kind == "outline":
+        make = lambda: generate_chapter_summary(rng=rng)
+    else:
+        raise ValueError(f"未知生成类型：{kind}")
+
+    if serialize:
+        return [json.dumps(make(), ensure_ascii=False) for _ in range(count)]
+    return [make() for _ in range(count)]
+
+
+def _chunk_plan(count: int, chunk_size: int) -> Iterator[tuple]:
+    """按固定块大小切分批次，产出（块编号, 块内数量）"""
+    for chunk_index, start in enumerate(range(0, count, chunk_size)):
+        yield chunk_index, min(chunk_size, count - start)
+
+
+def iter_parallel(kind: str, count: int, seed: int, workers: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, options: Optional[Dict] = None,
+                  serialize: bool = False) -> Iterator:
+    """并行生成一批结果并按序逐个产出
+
+    批次按固定大小切块，每块使用独立种子的随机数流；最多同时保留
+    2×workers 个未完成的块，因此内存占用与批次大小无关。
+    """
+    if kind not in KINDS:
+        raise ValueError(f"未知生成类型：{kind}")
+    if chunk_size <= 0:
+        raise ValueError("块大小必须为正数")
+    options = dict(options or {})
+    if kind == "chapter":
+        # 整批共用同一生成时间戳，保证输出只由种子决定
+        options.setdefault("generated_at", datetime.now().isoformat())
+    workers = workers or os.cpu_count() or 1
+
+    plan = _chunk_plan(count, chunk_size)
+    if workers == 1:
+        for chunk_index, size in plan:
+            yield from generate_chunk(kind, seed, chunk_index, size, options, serialize)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk_index, size in plan:
+            pending.append(executor.submit(generate_chunk, kind, seed, chunk_index,
+                                           size, options, serialize))
+            if len(pending) >= workers * 2:
+                yield from pending.pop(0).result()
+        for future in pending:
+            yield from future.result()
+
+
+def write_parallel_jsonl(stream: TextIO, kind: str, count: int, seed: int,
+                         workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         options: Optional[Dict] = None) -> int:
+    """并行生成并按序写入JSONL，返回写出的行数"""
+    write = stream.write
+    written = 0
+    for line in iter_parallel(kind, count, seed, workers, chunk_size, options, serialize=True):
+        write(line + "\n")
+        written += 1
+    return written
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》多进程批量生成工具")
+    parser.add_argument("kind", choices=KINDS,
+                        help="生成类型：chapter 章节设计 / worldview 完整世界观 / snippet 世界观片段 / outline 章节摘要")
+    parser.add_argument("-n", "--count", type=int, required=True, help="生成数量")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="批次随机种子（默认0）")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="工作进程数（默认CPU核数）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"每个任务块的数量（默认{DEFAULT_CHUNK_SIZE}，改变它会改变输出）")
+    parser.add_argument("-t", "--template", choices=TEMPLATE_NAMES, help="章节模板名称（仅chapter）")
+    parser.add_argument("-c", "--category", choices=SNIPPET_CATEGORIES, help="世界观片段类别（仅snippet）")
+    parser.add_argument("--generated-at", help="章节设计的生成时间戳（默认取批次开始时间）")
+    parser.add_argument("-o", "--output", default="-", help="JSONL输出文件（默认标准输出）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    options = {"template_name": args.template, "category": args.category}
+    if args.generated_at:
+        options["generated_at"] = args.generated_at
+
+    def run(stream):
+        return write_parallel_jsonl(stream, args.kind, args.count, args.seed,
+                                    args.workers, args.chunk_size, options)
+
+    try:
+        if args.output == "-":
+            written = run(sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                written = run(f)
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    print(f"已生成 {written} 条结果", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》技能参考资料编译缓存
+将各技能 references/ 与 assets/ 下的 Markdown 解析为结构化记录并写入二进制缓存，
+加载时按文件修改时间与内容哈希校验，只有变动过的文件才会重新解析
+"""
+
+import argparse
+import gc
+import hashlib
+import os
+import pickle
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+CACHE_DIR = REPO_ROOT / ".cache"
+DEFAULT_CACHE_PATH = CACHE_DIR / "reference_cache.pickle"
+
+# 缓存格式版本，解析规则变化时递增以使旧缓存失效
+CACHE_VERSION = 1
+SOURCE_KINDS = ("references", "assets")
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*+]|\d+\.)\s+(.+?)\s*$")
+_FIELD = re.compile(r"^\*\*(.+?)\*\*[：:]\s*(.+)$")
+
+
+def iter_source_files(skills_dir: Path = SKILLS_DIR) -> Iterator[Tuple[str, str, Path]]:
+    """遍历所有技能的参考资料文件，产出（技能名, 类型, 路径）"""
+    for skill_dir in sorted(p for p in skills_dir.iterdir() if p.is_dir()):
+        for kind in SOURCE_KINDS:
+            root = skill_dir / kind
+            if root.is_dir():
+                for path in sorted(root.rglob("*.md")):
+                    yield skill_dir.name, kind, path
+
+
+def parse_markdown(text: str) -> Tuple[str, List[Dict]]:
+    """将 Markdown 文本解析为（标题, 章节列表）
+
+    每个章节记录标题层级路径、起止行号（从1开始，含标题行）、正文、
+    列表项以及“**键**：值”形式的字段；代码块内的内容不作为标题处理。
+    """
+    lines = text.splitlines()
+    sections: List[Dict] = []
+    stack: List[Tuple[int, str]] = []
+    current = {"heading": "", "level": 0, "path": [], "start_line": 1, "lines": []}
+    in_code = False
+    title = ""
+
+    def close(section: Dict, end_line: int):
+        body = "\n".join(section.pop("lines")).strip()
+        if section["level"] == 0 and not body:
+            return
+        items, fields = [], {}
+        for line in body.splitlines():
+            item = _LIST_ITEM.match(line)
+            if item:
+                items.append(item.group(1))
+                field = _FIELD.match(item.group(1))
+                if field:
+                    fields.setdefault(field.group(1).strip(), field.group(2).strip())
+        section.update(end_line=end_line, text=body, items=items, fields=fields)
+        sections.append(section)
+
+    for number, line in enumerate(lines, 1):
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        heading = None if in_code else _HEADING.match(line)
+        if heading is None:
+            current["lines"].append(line)
+            continue
+        close(current, number - 1)
+        level, name = len(heading.group(1)), heading.group(2)
+        if level == 1 and not title:
+            title = name
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, name))
+        current = {"heading": name, "level": level, "path": [n for _, n in stack],
+                   "start_line": number, "lines": []}
+    close(current, len(lines))
+    return title, sections
+
+
+def parse_reference_file(skill: str, kind: str, path: Path, data: bytes) -> Dict:
+    """解析单个参考资料文件为结构化记录"""
+    title, sections = parse_markdown(data.decode("utf-8"))
+    return {
+        "path": path.relative_to(REPO_ROOT).as_posix(),
+        "skill": skill,
+        "kind": kind,
+        "category": path.parent.name,
+        "name": path.stem,
+        "title": title or path.stem,
+        "sections": sections,
+    }
+
+
+class ReferenceCache:
+    """参考资料编译缓存"""
+
+    def __init__(self, cache_path: Path = DEFAULT_CACHE_PATH, skills_dir: Path = SKILLS_DIR):
+        self.cache_path = Path(cache_path)
+        self.skills_dir = Path(skills_dir)
+        self.stats = {"reused": 0, "rehashed": 0, "parsed": 0, "removed": 0}
+        # 最近一次加载得到的 相对路径→内容哈希，供增量索引判断文件是否变化
+        self.digests: Dict[str, str] = {}
+
+    def _read_cache(self) -> Dict[str, Dict]:
+        """读取缓存文件，版本不符或损坏时视为空缓存"""
+        # 反序列化大量小容器时暂停循环垃圾回收，可明显缩短加载时间
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.cache_path, "rb") as f:
+                payload = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return {}
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+            return {}
+        return payload.get("entries", {})
+
+    def _write_cache(self, entries: Dict[str, Dict]):
+        """原子地写入缓存文件"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "entries": entries}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)
+
+    def load(self, force: bool = False) -> Dict[str, Dict]:
+        """加载全部参考资料记录，返回 相对路径→记录
+
+        修改时间与大小未变的文件直接复用缓存；修改时间变化但内容哈希相同的
+        文件只更新元数据；其余文件重新解析。有变动时写回缓存。
+        """
+        self.stats = dict.fromkeys(self.stats, 0)
+        cached = {} if force else self._read_cache()
+        entries: Dict[str, Dict] = {}
+        changed = force
+
+        for skill, kind, path in iter_source_files(self.skills_dir):
+            key = path.relative_to(REPO_ROOT).as_posix()
+            stat = path.stat()
+            entry = cached.get(key)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                entries[key] = entry
+                self.stats["reused"] += 1
+                continue
+
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            changed = True
+            if entry and entry["sha256"] == digest:
+                record = entry["record"]
+                self.stats["rehashed"] += 1
+            else:
+                record = parse_reference_file(skill, kind, path, data)
+                self.stats["parsed"] += 1
+            entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                            "sha256": digest, "record": record}
+
+        self.stats["removed"] = len(set(cached) - set(entries))
+        if changed or self.stats["removed"]:
+            self._write_cache(entries)
+        self.digests = {key: entry["sha256"] for key, entry in entries.items()}
+        return {key: entry["record"] for key, entry in entries.items()}
+
+
+def parse_all_references(skills_dir: Path = SKILLS_DIR) -> Dict[str, Dict]:
+    """不使用缓存，直接解析全部参考资料"""
+    return {
+        path.relative_to(REPO_ROOT).as_posix(): parse_reference_file(skill, kind, path, path.read_bytes())
+        for skill, kind, path in iter_source_files(skills_dir)
+    }
+
+
+@lru_cache(maxsize=None)
+def load_references() -> Dict[str, Dict]:
+    """获取进程内共享的参考资料记录（首次调用时经由缓存加载）"""
+    return ReferenceCache().load()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="编译《西游记》技能参考资料缓存")
+    parser.add_argument("--force", action="store_true", help="忽略现有缓存，全部重新解析")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE_PATH), help="缓存文件路径")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    cache = ReferenceCache(Path(args.cache))
+    start = time.perf_counter()
+    records = cache.load(force=args.force)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    sections = sum(len(record["sections"]) for record in records.values())
+    print(f"参考资料：{len(records)} 个文件，{sections} 个章节，用时 {elapsed_ms:.1f} ms")
+    print("复用 {reused}，仅重算哈希 {rehashed}，重新解析 {parsed}，移除 {removed}".format(**cache.stats))
+    print(f"缓存文件：{cache.cache_path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》生成结果缓存
+以（生成器, 种子, 模板, 选项）为键缓存带种子的生成结果，按最近最少使用（LRU）与
+存活时间（TTL）淘汰，并统计命中、未命中与淘汰次数
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world", "journey-to-the-west-outline"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import ChapterGenerator  # noqa: E402
+from generate_outline import generate_chapter_summary  # noqa: E402
+from generate_worldview import WorldViewGenerator  # noqa: E402
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 600.0
+
+_MISSING = object()
+
+
+class ResultCache:
+    """线程安全的 LRU + TTL 缓存
+
+    ttl 为 None 时条目不过期；timer 可注入，便于在测量或回放时控制时间。
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: Optional[float] = DEFAULT_TTL,
+                 timer: Callable[[], float] = time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize 必须为正数")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """取出未过期的条目并标记为最近使用"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at >= self.timer():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """写入条目，超出容量时淘汰最久未使用的条目"""
+        expires_at = self.timer() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """命中时直接返回，否则调用 factory 生成并写入缓存"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def purge_expired(self) -> int:
+        """主动清理已过期条目，返回清理数量"""
+        now = self.timer()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at < now]
+            for key in expired:
+                del self._entries[key]
+            self.stats["expirations"] += len(expired)
+        return len(expired)
+
+    def clear(self):
+        """清空缓存（保留统计）"""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """缓存统计：容量、条目数、命中率与各项计数"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "size": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            **self.stats,
+        }
+
+
+def make_key(generator: str, seed: int, template: Optional[str] = None, **options) -> Tuple:
+    """构造缓存键：选项按名称排序，值为 None 的选项忽略"""
+    return (generator, seed, template,
+            tuple(sorted((name, value) for name, value in options.items() if value is not None)))
+
+
+class CachedGenerators:
+    """带种子生成结果的记忆化包装
+
+    相同参数只生成一次；未指定种子的请求每次结果不同，直接生成而不经过缓存。
+    章节设计带有生成时间，只有传入固定的 clock 时才缓存，否则缓存会把旧的时间当作可复现结果返回。
+    返回的对象为缓存共享，调用方不应修改。
+    """
+
+    def __init__(self, cache: Optional[ResultCache] = None,
+                 clock: Optional[Callable[[], str]] = None):
+        self.cache = cache if cache is not None else ResultCache()
+        self.clock = clock
+        self._chapter = ChapterGenerator(clock=clock)
+        self._worldview = WorldViewGenerator()
+
+    def chapter_design(self, seed: Optional[int] = None, template: Optional[str] = None) -> Dict:
+        """章节设计"""
+        if seed is None or self.clock is None:
+            return self._chapter.generate_complete_chapter_design(template, seed=seed)
+        return self.cache.get_or_create(
+            make_key("chapter", seed, template, generated_at=self.clock()),
+            lambda: self._chapter.generate_complete_chapter_design(template, seed=seed),
+        )
+
+    def worldview(self, seed: Optional[int] = None, category: Optional[str] = None,
+                  full: bool = False) -> Dict:
+        """世界观片段或完整世界观"""
+        if full:
+            make = lambda: self._worldview.generate_full_worldview(seed=seed)
+        else:
+            make = lambda: self._worldview.generate_worldview_snippet(category, seed=seed)
+        if seed is None:
+            return make()
+        return self.cache.get_or_create(make_key("worldview", seed, None, category=category, full=full), make)
+
+    def chapter_summary(self, seed: Optional[int] = None, chapter: Optional[int] = None) -> Dict:
+        """章节摘要（指定回目时结果固定，同样可以缓存）"""
+        make = lambda: generate_chapter_summary(chapter, seed=seed)
+        if seed is None and chapter is None:
+            return make()
+        return self.cache.get_or_create(make_key("outline", seed, None, chapter=chapter), make)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="演示生成结果缓存：按种子重复请求并输出命中统计")
+    parser.add_argument("-n", "--requests", type=int, default=100000, help="模拟请求数（默认100000）")
+    parser.add_argument("--distinct", type=int, default=2000, help="请求中不同种子的数量（默认2000）")
+    parser.add_argument("--maxsize", type=int, default=DEFAULT_MAXSIZE, help="缓存容量")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="条目存活秒数（默认600）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数：以固定种子分布模拟工具的重复请求"""
+    args = parse_args(argv)
+    generated_at = datetime.now().isoformat()
+    cached = CachedGenerators(ResultCache(args.maxsize, args.ttl), clock=lambda: generated_at)
+    picker = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        cached.chapter_design(seed=picker.randrange(args.distinct))
+    elapsed = time.perf_counter() - start
+    print(json.dumps(cached.cache.snapshot(), ensure_ascii=False, indent=2))
+    print(f"{args.requests} 次请求用时 {elapsed * 1000:.1f} ms，"
+          f"平均 {elapsed / args.requests * 1e6:.2f} µs/次", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》技能参考资料全文检索
+以汉字二元组（bigram）为词项建立章节级倒排索引，按 BM25 排序，
+索引持久化到 .cache/ 并随参考资料变化增量更新
+"""
+
+import argparse
+import heapq
+import math
+import os
+import pickle
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from reference_cache import CACHE_DIR, ReferenceCache
+
+DEFAULT_INDEX_PATH = CACHE_DIR / "search_index.pickle"
+
+# 索引格式版本，分词或存储结构变化时递增
+INDEX_VERSION = 2
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 连续汉字串按二元组切分，拉丁字母与数字按整词切分
+_TOKEN_RUN = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[A-Za-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """将文本切分为检索词项：汉字串取相邻二元组（单字串保留单字），其余取小写整词"""
+    tokens: List[str] = []
+    for run in _TOKEN_RUN.findall(text):
+        if run.isascii():
+            tokens.append(run.lower())
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def run_tails(text: str) -> List[str]:
+    """各汉字串（两字及以上）的末字；这些字不是任何二元组的首字，单字查询时需另行计入"""
+    return [run[-1] for run in _TOKEN_RUN.findall(text) if len(run) > 1 and not run.isascii()]
+
+
+class SearchHit(NamedTuple):
+    """检索结果：指向具体文件与章节的位置"""
+    score: float
+    path: str
+    heading_path: Tuple[str, ...]
+    start_line: int
+    end_line: int
+    section_index: int
+
+
+class ReferenceIndex:
+    """章节级倒排索引
+
+    每个文档对应参考资料中的一个章节；postings 为 词项→{文档编号: 词频}，
+    同时保存每个文档的词频表，以便文件变化时精确删除其旧倒排项。
+    tail_postings 为 汉字→{文档编号: 以该字结尾的汉字串数}，单字查询时与以该字开头的二元组合并，
+    每处出现恰好计一次。
+    """
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}                 # 相对路径 → 内容哈希
+        self.file_docs: Dict[str, List[int]] = {}       # 相对路径 → 文档编号
+        self.docs: Dict[int, Tuple] = {}                # 文档编号 → (路径, 标题路径, 起行, 止行, 章节下标, 长度)
+        self.doc_terms: Dict[int, Dict[str, int]] = {}  # 文档编号 → 词频表
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_tails: Dict[int, Dict[str, int]] = {}  # 文档编号 → 汉字串末字计数
+        self.tail_postings: Dict[str, Dict[int, int]] = {}
+        self.total_length = 0
+        self.next_id = 0
+        # 单字查询用的 汉字→以其开头的二元组 映射，按需构建，不持久化
+        self._char_bigrams: Optional[Dict[str, List[str]]] = None
+
+    # ------------------------------------------------------------------
+    # 增量维护
+    # ------------------------------------------------------------------
+
+    def remove_file(self, path: str):
+        """删除一个文件的全部文档与倒排项"""
+        self._char_bigrams = None
+        for doc_id in self.file_docs.pop(path, ()):
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self.postings[term]
+            for char in self.doc_tails.pop(doc_id, ()):
+                postings = self.tail_postings[char]
+                del postings[doc_id]
+                if not postings:
+                    del self.tail_postings[char]
+            self.total_length -= self.docs.pop(doc_id)[5]
+        self.files.pop(path, None)
+
+    def add_file(self, path: str, digest: str, record: Dict):
+        """为一个文件的每个章节建立文档与倒排项"""
+        self._char_bigrams = None
+        doc_ids = []
+        for section_index, section in enumerate(record["sections"]):
+            text = " ".join(section["path"]) + "\n" + section["text"]
+            terms = Counter(tokenize(text))
+            if not terms:
+                continue
+            doc_id = self.next_id
+            self.next_id += 1
+            length = sum(terms.values())
+            self.docs[doc_id] = (path, tuple(section["path"]), section["start_line"],
+                                 section["end_line"], section_index, length)
+            self.doc_terms[doc_id] = dict(terms)
+            for term, tf in terms.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            tails = Counter(run_tails(text))
+            if tails:
+                self.doc_tails[doc_id] = dict(tails)
+                for char, count in tails.items():
+                    self.tail_postings.setdefault(char, {})[doc_id] = count
+            self.total_length += length
+            doc_ids.append(doc_id)
+        self.file_docs[path] = doc_ids
+        self.files[path] = digest
+
+    def sync(self, records: Dict[str, Dict], digests: Dict[str, str]) -> Dict[str, int]:
+        """按内容哈希与参考资料同步，只重建新增、变化或删除的文件"""
+        stats = {"added": 0, "updated": 0, "removed": 0}
+        for path in [p for p in self.files if p not in records]:
+            self.remove_file(path)
+            stats["removed"] += 1
+        for path, record in records.items():
+            digest = digests[path]
+            old_digest = self.files.get(path)
+            if old_digest == digest:
+                continue
+            if old_digest is not None:
+                self.remove_file(path)
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            self.add_file(path, digest, record)
+        return stats
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def term_postings(self, term: str) -> Optional[Dict[int, int]]:
+        """返回词项的倒排表；单个汉字合并以它开头的二元组与以它结尾的汉字串（即该字的每处出现）"""
+        if len(term) != 1 or term.isascii():
+            return self.postings.get(term)
+        if self._char_bigrams is None:
+            char_bigrams: Dict[str, List[str]] = {}
+            for candidate in self.postings:
+                if len(candidate) == 2 and not candidate.isascii():
+                    char_bigrams.setdefault(candidate[0], []).append(candidate)
+            self._char_bigrams = char_bigrams
+        merged = Counter(self.postings.get(term, {}))
+        for bigram in self._char_bigrams.get(term, ()):
+            merged.update(self.postings[bigram])
+        merged.update(self.tail_postings.get(term, {}))
+        return merged or None
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """按 BM25 对章节排序，返回前 limit 条结果"""
+        doc_count = len(self.docs)
+        if not doc_count:
+            return []
+        avg_length = self.total_length / doc_count
+        docs = self.docs
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.term_postings(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * docs[doc_id][5] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            SearchHit(score, *docs[doc_id][:5])
+            for doc_id, score in ranked
+        ]
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_INDEX_PATH) -> "ReferenceIndex":
+        """读取持久化索引，不存在或版本不符时返回空索引"""
+        index = cls()
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return index
+        if isinstance(payload, dict) and payload.get("version") == INDEX_VERSION:
+            index.__dict__.update(payload["state"])
+        return index
+
+    def save(self, path: Path = DEFAULT_INDEX_PATH):
+        """原子地写入持久化索引"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            state = {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+            pickle.dump({"version": INDEX_VERSION, "state": state}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
+def open_index(index_path: Path = DEFAULT_INDEX_PATH, rebuild: bool = False) -> Tuple[ReferenceIndex, Dict, Dict]:
+    """加载参考资料与索引并增量同步，返回（索引, 参考资料记录, 同步统计）"""
+    cache = ReferenceCache()
+    records = cache.load()
+    index = ReferenceIndex() if rebuild else ReferenceIndex.load(index_path)
+    stats = index.sync(records, cache.digests)
+    if rebuild or any(stats.values()):
+        index.save(index_path)
+    return index, records, stats
+
+
+def make_snippet(text: str, query: str, width: int = 60) -> str:
+    """截取正文中首个命中词项附近的片段"""
+    for term in tokenize(query):
+        position = text.find(term)
+        if position >= 0:
+            start = max(0, position - width // 3)
+            return text[start:start + width].replace("\n", " ")
+    return text[:width].replace("\n", " ")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="检索《西游记》技能参考资料")
+    parser.add_argument("query", nargs="+", help="检索词，如 金箍棒 或 西牛贺洲 妖怪")
+    parser.add_argument("-k", "--limit", type=int, default=10, help="返回结果数量（默认10）")
+    parser.add_argument("--rebuild", action="store_true", help="丢弃现有索引并完整重建")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="索引文件路径")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    query = " ".join(args.query)
+    index, records, stats = open_index(Path(args.index), args.rebuild)
+
+    start = time.perf_counter()
+    hits = index.search(query, args.limit)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for rank, hit in enumerate(hits, 1):
+        section = records[hit.path]["sections"][hit.section_index]
+        print(f"{rank:>2}. [{hit.score:.2f}] {hit.path}:{hit.start_line}-{hit.end_line}")
+        print(f"    {' > '.join(hit.heading_path)}")
+        print(f"    {make_snippet(section['text'], query)}")
+    print(f"\n{len(hits)} 条结果，检索用时 {elapsed_ms:.3f} ms"
+          f"（索引 {len(index.docs)} 个章节；新增 {stats['added']}，更新 {stats['updated']}，删除 {stats['removed']}）",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》生成结果的 SQLite 存储
+把章节设计与世界观片段写入规范化的 SQLite 表：主表保存可查询的标量字段与完整 JSON，
+场景、冲突、配角拆为子表；按批在单个事务内 executemany 写入，开启 WAL 以便写入时并发查询。
+记录编号在写事务内分配，多个进程同时写入同一数据库也不会冲突，
+模板、主角、冲突类型与回目编号建有索引，可在百万级记录中交互式查询
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import TEMPLATE_NAMES, ChapterGenerator  # noqa: E402
+from generate_worldview import SNIPPET_CATEGORIES, WorldViewGenerator  # noqa: E402
+
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    id INTEGER PRIMARY KEY,
+    design_id TEXT NOT NULL,
+    generated_at TEXT,
+    template TEXT NOT NULL,
+    chapter_number INTEGER NOT NULL,
+    chapter_title TEXT NOT NULL,
+    main_character TEXT NOT NULL,
+    emotion TEXT,
+    key_action TEXT,
+    growth TEXT,
+    relationship_change TEXT,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS design_scenes (
+    design INTEGER NOT NULL REFERENCES designs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    location TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (design, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS design_conflicts (
+    design INTEGER NOT NULL REFERENCES designs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    description TEXT NOT NULL,
+    intensity TEXT NOT NULL,
+    resolution_method TEXT NOT NULL,
+    theme_connection TEXT NOT NULL,
+    PRIMARY KEY (design, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS design_supporting (
+    design INTEGER NOT NULL REFERENCES designs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (design, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snippets (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT,
+    body TEXT NOT NULL
+);
+"""
+
+# 索引在批量导入时可先删除、导入完成后重建（见 DesignStore.bulk）
+INDEXES = {
+    "idx_designs_template": "designs(template)",
+    "idx_designs_main_character": "designs(main_character)",
+    "idx_designs_chapter_number": "designs(chapter_number)",
+    "idx_conflicts_type": "design_conflicts(type, design)",
+    "idx_scenes_location": "design_scenes(location, design)",
+    "idx_supporting_name": "design_supporting(name, design)",
+    "idx_snippets_category": "snippets(category, name)",
+}
+
+# 世界观片段的类别由其第一个键区分，名称取自对应字段
+SNIPPET_KINDS: Mapping[str, Tuple[str, str]] = {
+    "realm": ("realm", "location"),
+    "system": ("deity", "rank"),
+    "origin": ("monster", "name"),
+    "category": ("artifact", "name"),
+    "path": ("cultivation", "end"),
+    "region": ("geography", "place"),
+}
+
+# 导入章节设计时每条记录必须具备的字段（a.b 表示嵌套字段）
+DESIGN_REQUIRED_FIELDS = ("metadata.design_id", "metadata.template_used", "metadata.chapter_number",
+                          "chapter_title", "main_character")
+
+# query 支持的条件：条件名 → SQL 片段
+DESIGN_FILTERS: Mapping[str, str] = {
+    "template": "d.template = ?",
+    "main_character": "d.main_character = ?",
+    "chapter_number": "d.chapter_number = ?",
+    "emotion": "d.emotion = ?",
+    "conflict_type": "EXISTS (SELECT 1 FROM design_conflicts c WHERE c.design = d.id AND c.type = ?)",
+    "conflict_intensity": "EXISTS (SELECT 1 FROM design_conflicts c WHERE c.design = d.id AND c.intensity = ?)",
+    "scene_location": "EXISTS (SELECT 1 FROM design_scenes s WHERE s.design = d.id AND s.location = ?)",
+    "supporting": "EXISTS (SELECT 1 FROM design_supporting p WHERE p.design = d.id AND p.name = ?)",
+}
+
+# count 支持的分组字段
+GROUP_FIELDS: Mapping[str, Tuple[str, str]] = {
+    "template": ("designs", "template"),
+    "main_character": ("designs", "main_character"),
+    "chapter_number": ("designs", "chapter_number"),
+    "emotion": ("designs", "emotion"),
+    "conflict_type": ("design_conflicts", "type"),
+    "conflict_intensity": ("design_conflicts", "intensity"),
+    "scene_location": ("design_scenes", "location"),
+    "supporting": ("design_supporting", "name"),
+    "snippet_category": ("snippets", "category"),
+}
+
+
+def snippet_kind(snippet: Mapping) -> Tuple[str, Optional[str]]:
+    """世界观片段的（类别, 名称）"""
+    for key in snippet:
+        kind = SNIPPET_KINDS.get(key)
+        if kind is not None:
+            return kind[0], snippet.get(kind[1])
+        break
+    raise ValueError(f"无法识别的世界观片段：{list(snippet)}")
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class DesignStore:
+    """章节设计与世界观片段的 SQLite 存储"""
+
+    def __init__(self, path, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = str(path)
+        self.batch_size = batch_size
+        # 事务由 _transaction 显式管理
+        self.connection = sqlite3.connect(self.path, isolation_level=None, timeout=30.0)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        with self._transaction():
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version not in (0, SCHEMA_VERSION):
+                raise ValueError(f"数据库结构版本 {version} 与当前版本 {SCHEMA_VERSION} 不一致：{self.path}")
+            # executescript 会先提交当前事务，这里逐条执行以保持建表在同一事务内
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    self.connection.execute(statement)
+            self.create_indexes()
+            self.connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def __enter__(self) -> "DesignStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+    def create_indexes(self):
+        for name, target in INDEXES.items():
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+
+    def drop_indexes(self):
+        for name in INDEXES:
+            self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+
+    # ---- 写入 ----
+
+    def _next_id(self, table: str) -> int:
+        """在写事务内读取下一个可用编号（BEGIN IMMEDIATE 已持有写锁，其他进程无法同时分配）"""
+        return self.connection.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+    def _write_designs(self, designs: Sequence[Mapping]) -> List[int]:
+        first = self._next_id("designs")
+        ids = list(range(first, first + len(designs)))
+        rows, scenes, conflicts, supporting = [], [], [], []
+        dumps = json.dumps
+        for design_id, design in zip(ids, designs):
+            metadata = design["metadata"]
+            performance = design.get("character_performance") or {}
+            rows.append((
+                design_id, metadata["design_id"], metadata.get("generated_at"), metadata["template_used"],
+                metadata["chapter_number"], design["chapter_title"], design["main_character"],
+                performance.get("emotion"), performance.get("key_action"), performance.get("growth"),
+                performance.get("relationship_change"),
+                dumps(design, ensure_ascii=False, separators=(",", ":")),
+            ))
+            scenes.extend((design_id, i, s["type"], s["location"], s["mood"])
+                          for i, s in enumerate(design.get("scenes", ())))
+            conflicts.extend((design_id, i, c["type"], c["description"], c["intensity"],
+                              c["resolution_method"], c["theme_connection"])
+                             for i, c in enumerate(design.get("conflicts", ())))
+            supporting.extend((design_id, i, name) for i, name in enumerate(design.get("supporting_characters", ())))
+        execute = self.connection.executemany
+        execute("INSERT INTO designs VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        execute("INSERT INTO design_scenes VALUES (?,?,?,?,?)", scenes)
+        execute("INSERT INTO design_conflicts VALUES (?,?,?,?,?,?,?)", conflicts)
+        execute("INSERT INTO design_supporting VALUES (?,?,?)", supporting)
+        return ids
+
+    def _write_snippets(self, snippets: Sequence[Mapping]) -> List[int]:
+        first = self._next_id("snippets")
+        ids = list(range(first, first + len(snippets)))
+        rows = []
+        for snippet_id, snippet in zip(ids, snippets):
+            category, name = snippet_kind(snippet)
+            rows.append((snippet_id, category, name,
+                         json.dumps(snippet, ensure_ascii=False, separators=(",", ":"))))
+        self.connection.executemany("INSERT INTO snippets VALUES (?,?,?,?)", rows)
+        return ids
+
+    def add_designs(self, designs: Iterable[Mapping]) -> int:
+        """按批写入章节设计（每批一个事务），返回写入数量"""
+        written = 0
+        for batch in _batches(designs, self.batch_size):
+            with self._transaction():
+                written += len(self._write_designs(batch))
+        return written
+
+    def add_design(self, design: Mapping) -> int:
+        """写入单份设计并返回其编号"""
+        with self._transaction():
+            return self._write_designs([design])[0]
+
+    def add_snippets(self, snippets: Iterable[Mapping]) -> int:
+        """按批写入世界观片段，返回写入数量"""
+        written = 0
+        for batch in _batches(snippets, self.batch_size):
+            with self._transaction():
+                written += len(self._write_snippets(batch))
+        return written
+
+    def bulk(self) -> "_BulkLoad":
+        """大批量导入：导入期间删除索引并放宽同步，结束后重建索引"""
+        return _BulkLoad(self)
+
+    # ---- 查询 ----
+
+    def design(self, design_id: int) -> Optional[Dict]:
+        row = self.connection.execute("SELECT body FROM designs WHERE id = ?", (design_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _where(self, filters: Mapping[str, Any]) -> Tuple[str, List[Any]]:
+        unknown = [name for name in filters if name not in DESIGN_FILTERS]
+        if unknown:
+            raise ValueError(f"未知查询条件：{'、'.join(unknown)}（可用：{'、'.join(DESIGN_FILTERS)}）")
+        clauses = [DESIGN_FILTERS[name] for name, value in filters.items() if value is not None]
+        params = [value for value in filters.values() if value is not None]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: Optional[int] = 10, offset: int = 0, **filters: Any) -> Iterator[Tuple[int, Dict]]:
+        """按条件查询设计，产出（编号, 设计）；条件之间为“且”"""
+        where, params = self._where(filters)
+        sql = f"SELECT d.id, d.body FROM designs d{where} ORDER BY d.id LIMIT ? OFFSET ?"
+        for design_id, body in self.connection.execute(sql, [*params, -1 if limit is None else limit, offset]):
+            yield design_id, json.loads(body)
+
+    def count(self, **filters: Any) -> int:
+        """满足条件的设计数量"""
+        where, params = self._where(filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM designs d{where}", params).fetchone()[0]
+
+    def group_counts(self, field: str) -> List[Tuple[Any, int]]:
+        """按字段分组计数（按数量从多到少）"""
+        if field not in GROUP_FIELDS:
+            raise ValueError(f"未知分组字段：{field}（可用：{'、'.join(GROUP_FIELDS)}）")
+        table, column = GROUP_FIELDS[field]
+        return self.connection.execute(
+            f"SELECT {column}, COUNT(*) AS n FROM {table} GROUP BY {column} ORDER BY n DESC, {column}"
+        ).fetchall()
+
+    def snippets(self, category: Optional[str] = None, name: Optional[str] = None,
+                 limit: Optional[int] = 10) -> Iterator[Tuple[int, Dict]]:
+        """按类别与名称查询世界观片段"""
+        clauses, params = [], []
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        sql = f"SELECT id, body FROM snippets{where} ORDER BY id LIMIT ?"
+        for snippet_id, body in self.connection.execute(sql, [*params, -1 if limit is None else limit]):
+            yield snippet_id, json.loads(body)
+
+    def stats(self) -> Dict[str, int]:
+        tables = ("designs", "design_scenes", "design_conflicts", "design_supporting", "snippets")
+        return {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in tables}
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE … COMMIT；出错时回滚"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+class _BulkLoad:
+    def __init__(self, store: DesignStore):
+        self.store = store
+
+    def __enter__(self) -> DesignStore:
+        connection = self.store.connection
+        connection.execute("PRAGMA synchronous=OFF")
+        with self.store._transaction():
+            self.store.drop_indexes()
+        return self.store
+
+    def __exit__(self, *exc):
+        connection = self.store.connection
+        with self.store._transaction():
+            self.store.create_indexes()
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("ANALYZE")
+
+
+def _missing_field(record: Mapping, required: Iterable[str]) -> Optional[str]:
+    """返回记录中第一个缺少的必需字段"""
+    for path in required:
+        value = record
+        for part in path.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return path
+            value = value[part]
+    return None
+
+
+def iter_json_files(paths: Iterable[str], required: Iterable[str] = ()) -> Iterator[Dict]:
+    """读取 JSON 文件中的记录：支持单个对象、数组、JSONL 以及连续排列的多个对象（generate_chapter.py -f json 的输出）
+
+    每条记录须为 JSON 对象且具备 required 中的字段，否则抛出 ValueError，指明文件与记录序号（从 0 起）。
+    """
+    decoder = json.JSONDecoder()
+    required = tuple(required)
+    for path in paths:
+        text = Path(path).read_text(encoding="utf-8")
+        position = 0
+        index = 0
+        while True:
+            while position < len(text) and text[position].isspace():
+                position += 1
+            if position >= len(text):
+                break
+            data, position = decoder.raw_decode(text, position)
+            for record in data if isinstance(data, list) else (data,):
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path} 第 {index} 条记录不是 JSON 对象")
+                missing = _missing_field(record, required)
+                if missing is not None:
+                    raise ValueError(f"{path} 第 {index} 条记录缺少字段 {missing}")
+                index += 1
+                yield record
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="把章节设计与世界观片段写入 SQLite 并查询")
+    parser.add_argument("--db", default="designs.sqlite", help="数据库文件路径（默认 designs.sqlite）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write = commands.add_parser("write", help="生成并写入数据库")
+    write.add_argument("kind", choices=("chapter", "snippet"), help="生成内容类型")
+    write.add_argument("-n", "--count", type=int, default=10000, help="生成数量（默认10000）")
+    write.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    write.add_argument("-t", "--template", choices=TEMPLATE_NAMES, help="章节模板（仅 chapter）")
+    write.add_argument("-c", "--category", choices=SNIPPET_CATEGORIES, help="片段类别（仅 snippet）")
+    write.add_argument("--generated-at", help="固定章节设计的生成时间")
+    write.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE, help="每个事务写入的记录数")
+    write.add_argument("--bulk", action="store_true", help="导入期间暂时删除索引，结束后重建（大批量时更快）")
+
+    load = commands.add_parser("import", help="导入已有的 JSON/JSONL 文件（如 chapter_design_*.json）")
+    load.add_argument("paths", nargs="+", help="文件路径")
+    load.add_argument("--snippets", action="store_true", help="文件内容为世界观片段")
+
+    query = commands.add_parser("query", help="按条件查询章节设计，输出 JSONL")
+    for name in DESIGN_FILTERS:
+        query.add_argument(f"--{name.replace('_', '-')}", dest=name,
+                           type=int if name == "chapter_number" else str)
+    query.add_argument("-n", "--limit", type=int, default=10, help="输出条数（默认10，0 表示不限）")
+    query.add_argument("--count-only", action="store_true", help="只输出数量")
+
+    count = commands.add_parser("count", help="按字段分组计数")
+    count.add_argument("field", choices=tuple(GROUP_FIELDS), help="分组字段")
+
+    commands.add_parser("stats", help="各表记录数")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    try:
+        store = DesignStore(args.db, batch_size=getattr(args, "batch", DEFAULT_BATCH_SIZE))
+    except (sqlite3.Error, ValueError) as e:
+        sys.exit(str(e))
+    with store:
+        try:
+            if args.command == "write":
+                if args.kind == "chapter":
+                    clock = (lambda: args.generated_at) if args.generated_at else None
+                    generator = ChapterGenerator(seed=args.seed, clock=clock)
+                    records = generator.iter_chapter_designs(args.count, args.template)
+                    add = store.add_designs
+                else:
+                    worldview = WorldViewGenerator(seed=args.seed)
+                    records = (worldview.generate_worldview_snippet(args.category) for _ in range(args.count))
+                    add = store.add_snippets
+                if args.bulk:
+                    with store.bulk():
+                        written = add(records)
+                else:
+                    written = add(records)
+                print(f"已写入 {written} 条记录到 {args.db}，用时 {time.perf_counter() - start:.2f} s",
+                      file=sys.stderr)
+            elif args.command == "import":
+                records = iter_json_files(args.paths, () if args.snippets else DESIGN_REQUIRED_FIELDS)
+                written = store.add_snippets(records) if args.snippets else store.add_designs(records)
+                print(f"已导入 {written} 条记录到 {args.db}", file=sys.stderr)
+            elif args.command == "query":
+                filters = {name: getattr(args, name) for name in DESIGN_FILTERS}
+                if args.count_only:
+                    print(store.count(**filters))
+                else:
+                    for design_id, design in store.query(limit=args.limit or None, **filters):
+                        print(json.dumps({"id": design_id, **design}, ensure_ascii=False))
+                print(f"查询用时 {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+            elif args.command == "count":
+                for value, n in store.group_counts(args.field):
+                    print(f"{value}\t{n}")
+            else:
+                print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+        except BrokenPipeError:
+            sys.stderr.close()
+        except (OSError, KeyError, ValueError, sqlite3.Error) as e:
+            sys.exit(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
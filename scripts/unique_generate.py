@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》去重批量生成脚本
+对每份结果的内容字段计算指纹，只输出未出现过的设计；已见集合可选精确集合或布隆过滤器，
+组合空间耗尽或长时间只产生重复时干净地停止
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TextIO
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+from generate_chapter import FINGERPRINT_FIELDS, TEMPLATE_NAMES, ChapterGenerator  # noqa: E402
+from generate_worldview import SNIPPET_CATEGORIES, WorldViewGenerator  # noqa: E402
+
+KINDS = ("chapter", "worldview", "snippet")
+
+# 连续重复次数的下限；空间较小时按 20 倍空间放宽，避免收集最后几个组合时误判停滞
+MIN_MAX_MISSES = 10000
+
+
+def fingerprint(record: Dict, fields: Optional[Sequence[str]] = None) -> bytes:
+    """对记录中指定字段的规范化 JSON 计算 128 位指纹"""
+    if fields is not None:
+        record = {field: record[field] for field in fields}
+    canonical = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).digest()
+
+
+class SeenSet:
+    """精确的已见集合：只保存指纹前 64 位整数，不保留设计本身"""
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, digest: bytes) -> bool:
+        """加入指纹，返回是否为新指纹"""
+        key = int.from_bytes(digest[:8], "little")
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    @property
+    def nbytes(self) -> int:
+        """近似内存占用（集合本身加每个整数对象）"""
+        return sys.getsizeof(self._seen) + len(self._seen) * 32
+
+
+class BloomFilter:
+    """布隆过滤器：内存固定，可能把少量新设计误判为重复，但不会放过真正的重复"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, digest: bytes) -> bool:
+        """加入指纹，返回是否（可能）为新指纹"""
+        # 由指纹的两个 64 位半段线性组合出 k 个位置（Kirsch-Mitzenmacher）
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        bits, size = self.bits, self.size
+        new = False
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """位数组占用的字节数"""
+        return len(self.bits)
+
+
+class UniqueGenerator:
+    """在任意生成函数外包一层指纹去重"""
+
+    def __init__(self, make: Callable[[], Dict], space: int,
+                 fields: Optional[Sequence[str]] = None, seen=None,
+                 max_misses: Optional[int] = None):
+        self.make = make
+        self.space = space
+        self.fields = fields
+        self.seen = seen if seen is not None else SeenSet()
+        self.max_misses = max_misses if max_misses is not None else max(MIN_MAX_MISSES, 20 * min(space, 10 ** 9))
+        self.stats = {"emitted": 0, "duplicates": 0, "stop_reason": None}
+
+    def iter(self, count: int) -> Iterator[Dict]:
+        """最多产出 count 份互不相同的结果
+
+        停止原因记录在 stats["stop_reason"]：count（达到数量）、exhausted（组合空间耗尽）、
+        stalled（连续 max_misses 次都是重复）。
+        """
+        stats = self.stats
+        add = self.seen.add
+        misses = 0
+        while stats["emitted"] < count:
+            if len(self.seen) >= self.space:
+                stats["stop_reason"] = "exhausted"
+                return
+            record = self.make()
+            if add(fingerprint(record, self.fields)):
+                misses = 0
+                stats["emitted"] += 1
+                yield record
+            else:
+                misses += 1
+                stats["duplicates"] += 1
+                if misses >= self.max_misses:
+                    stats["stop_reason"] = "stalled"
+                    return
+        stats["stop_reason"] = "count"
+
+
+def combination_space(kind: str, fields: Optional[Sequence[str]] = None,
+                      category: Optional[str] = None, template_name: Optional[str] = None) -> int:
+    """指定类型与指纹字段（章节可限定模板）下不同结果的数量"""
+    if kind == "chapter":
+        space = ChapterGenerator().combination_space(template_name)
+        return math.prod(space[field] for field in (fields or FINGERPRINT_FIELDS))
+    worldview_space = WorldViewGenerator().combination_space()
+    if kind == "worldview":
+        space = worldview_space["full_worldview"]
+        return math.prod(space[field] for field in (fields or tuple(k for k in space if k != "total")))
+    snippets = worldview_space["snippets"]
+    return snippets[category] if category else sum(snippets.values())
+
+
+def make_factory(kind: str, rng: random.Random, template_name: Optional[str] = None,
+                 category: Optional[str] = None) -> Callable[[], Dict]:
+    """构建生成单份结果的无参函数"""
+    if kind == "chapter":
+        generator = ChapterGenerator(rng=rng)
+        return lambda: generator.generate_complete_chapter_design(template_name)
+    generator = WorldViewGenerator(rng=rng)
+    if kind == "worldview":
+        return generator.generate_full_worldview
+    return lambda: generator.generate_worldview_snippet(category)
+
+
+def write_unique_jsonl(unique: UniqueGenerator, stream: TextIO, count: int) -> int:
+    """流式写出去重后的结果，返回写出的数量"""
+    dumps = json.dumps
+    write = stream.write
+    written = 0
+    for record in unique.iter(count):
+        write(dumps(record, ensure_ascii=False) + "\n")
+        written += 1
+    return written
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="《西游记》去重批量生成工具")
+    parser.add_argument("kind", choices=KINDS, help="生成类型")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="最多生成的不同结果数量")
+    parser.add_argument("-s", "--seed", type=int, help="随机种子（默认不固定）")
+    parser.add_argument("--fields",
+                        help="参与指纹的字段，逗号分隔（默认全部内容字段），如 chapter_title,main_character")
+    parser.add_argument("-t", "--template", choices=TEMPLATE_NAMES, help="章节模板名称（仅 chapter）")
+    parser.add_argument("-c", "--category", choices=SNIPPET_CATEGORIES, help="片段类别（仅 snippet）")
+    parser.add_argument("--bloom", action="store_true", help="使用布隆过滤器代替精确集合，内存固定")
+    parser.add_argument("--error-rate", type=float, default=1e-6, help="布隆过滤器误判率（默认1e-6）")
+    parser.add_argument("--max-misses", type=int, help="连续重复多少次后停止（默认按组合空间估算）")
+    parser.add_argument("--space", action="store_true", help="只输出组合空间统计，不生成")
+    parser.add_argument("-o", "--output", default="-", help="JSONL输出文件路径（默认 - 表示标准输出）")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    fields = args.fields.split(",") if args.fields else None
+    if fields and args.kind == "snippet":
+        sys.exit("snippet 类型不支持 --fields")
+    try:
+        space = combination_space(args.kind, fields, args.category, args.template)
+    except KeyError as exc:
+        sys.exit(f"未知字段：{exc.args[0]}")
+
+    if args.space:
+        if args.kind == "chapter":
+            report = ChapterGenerator().combination_space(args.template)
+        else:
+            report = WorldViewGenerator().combination_space()
+        report["selected"] = space
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    capacity = min(args.count, space)
+    seen = BloomFilter(capacity, args.error_rate) if args.bloom else SeenSet()
+    make = make_factory(args.kind, random.Random(args.seed), args.template, args.category)
+    unique = UniqueGenerator(make, space, fields, seen, args.max_misses)
+
+    try:
+        if args.output == "-":
+            written = write_unique_jsonl(unique, sys.stdout, args.count)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                written = write_unique_jsonl(unique, f, args.count)
+    except BrokenPipeError:
+        sys.stderr.close()
+        return
+    reasons = {"count": "达到目标数量", "exhausted": "组合空间已耗尽", "stalled": "连续只产生重复"}
+    print(f"已生成 {written} 份不同结果（组合空间 {space:.4g}，跳过重复 {unique.stats['duplicates']}，"
+          f"{reasons[unique.stats['stop_reason']]}；已见集合约 {seen.nbytes / 1024:.0f} KB）",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+《西游记》加权抽样引擎
+为章节生成器与世界观生成器的各目录候选池预先建立别名表（alias method），每次抽取 O(1)、
+只消耗一个随机数；权重可由配置覆盖，更新配置时只重建权重发生变化的表。
+WeightedRandom 是 random.Random 的子类，作为 rng 传给生成器即可，未设置权重的候选池
+仍走原来的均匀抽样，不设置任何权重时输出与 random.Random 逐项一致
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SKILLS_DIR = REPO_ROOT / ".codebuddy" / "skills"
+
+for _skill in ("journey-to-the-west-chapter", "journey-to-the-west-world"):
+    _scripts_dir = str(SKILLS_DIR / _skill / "scripts")
+    if _scripts_dir not in sys.path:
+        sys.path.insert(0, _scripts_dir)
+
+import generate_chapter as chapter  # noqa: E402
+import generate_worldview as world  # noqa: E402
+
+Key = Callable[[Any], str]
+
+
+def _field(name: str) -> Key:
+    return lambda item: item[name]
+
+
+def _identity(item: Any) -> str:
+    return item
+
+
+class AliasTable:
+    """Vose 别名表：prob[i] 为第 i 格保留自身的概率，否则取 alias[i]"""
+
+    __slots__ = ("seq", "n", "prob", "alias")
+
+    def __init__(self, seq: Sequence, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("权重之和必须为正数")
+        scaled = [w * n / total for w in weights]
+        prob = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+        # 剩余格因浮点误差略偏离 1，视为恰好为 1
+        self.seq = seq
+        self.n = n
+        self.prob = prob
+        self.alias = alias
+
+    def index(self, random_value: float) -> int:
+        """由 [0, 1) 中的一个随机数得到抽中的下标"""
+        scaled = random_value * self.n
+        i = int(scaled)
+        return i if scaled - i < self.prob[i] else self.alias[i]
+
+
+class PoolSpec:
+    """一个可配置权重的候选池：若干个目录序列，配置中的键由 key 从条目取得
+
+    sample_size 为生成器一次从单个序列中不放回抽取的最多条目数（只做有放回抽取的池为 1），
+    每个序列中正权重的条目不得少于此数。
+    """
+
+    __slots__ = ("name", "sequences", "key", "description", "sample_size")
+
+    def __init__(self, name: str, sequences: Iterable[Sequence], key: Key = _identity, description: str = "",
+                 sample_size: int = 1):
+        self.name = name
+        self.sequences = tuple(sequences)
+        self.key = key
+        self.description = description
+        self.sample_size = sample_size
+
+    def keys(self) -> List[str]:
+        """池中出现过的全部键（去重，保持顺序）"""
+        return list(dict.fromkeys(self.key(item) for seq in self.sequences for item in seq))
+
+
+def default_pools() -> Dict[str, PoolSpec]:
+    """两个生成器的全部目录候选池（均为模块级只读序列，按对象身份识别）"""
+    specs = [
+        PoolSpec("chapter.template", [chapter.TEMPLATE_NAMES], description="结构模板"),
+        PoolSpec("chapter.main_character", [chapter.MAIN_CHARACTERS], _field("name"), "主要人物"),
+        PoolSpec("chapter.title_first", [chapter.TITLE_FIRST_LINES], description="章回标题上联"),
+        PoolSpec("chapter.title_second",
+                 [chapter.TITLE_SECOND_LINES, *chapter.TITLE_SECOND_LINES_EXCLUDING.values()],
+                 description="章回标题下联"),
+        PoolSpec("chapter.emotion", [chapter.EMOTIONS], description="主要情感"),
+        PoolSpec("chapter.key_action", [chapter.KEY_ACTIONS], description="关键行为"),
+        PoolSpec("chapter.growth", [chapter.GROWTH_STATES], description="成长状态"),
+        PoolSpec("chapter.relationship_change", [chapter.RELATIONSHIP_CHANGES], description="关系变化"),
+        PoolSpec("chapter.scene_type", [chapter.SCENES], _field("type"), "场景类型"),
+        PoolSpec("chapter.scene_location", [scene["examples"] for scene in chapter.SCENES], description="场景地点"),
+        PoolSpec("chapter.scene_mood", [scene["mood"] for scene in chapter.SCENES], description="场景氛围"),
+        PoolSpec("chapter.conflict_type", [chapter.CONFLICTS], _field("type"), "冲突类型"),
+        PoolSpec("chapter.conflict_description", [c["examples"] for c in chapter.CONFLICTS], description="冲突描述"),
+        PoolSpec("chapter.conflict_resolution", [c["resolution"] for c in chapter.CONFLICTS],
+                 description="冲突解决方法"),
+        PoolSpec("chapter.conflict_intensity", [chapter.CONFLICT_INTENSITIES], description="冲突强度"),
+        PoolSpec("chapter.conflict_theme", [chapter.CONFLICT_THEMES], description="冲突主题关联"),
+        PoolSpec("chapter.stage_content", [*chapter.STAGE_CONTENT.values(), chapter.DEFAULT_STAGE_CONTENT],
+                 description="阶段内容"),
+        PoolSpec("chapter.key_element", [chapter.KEY_ELEMENTS], description="关键元素（不放回抽取）",
+                 sample_size=6),
+        PoolSpec("chapter.artistic_feature", [chapter.ARTISTIC_FEATURES], _field("type"), "艺术特色（不放回抽取）",
+                 sample_size=4),
+        PoolSpec("chapter.technique", [f["techniques"] for f in chapter.ARTISTIC_FEATURES],
+                 description="艺术手法（不放回抽取）", sample_size=3),
+        PoolSpec("chapter.theme", [chapter.THEMES], _field("name"), "主题（不放回抽取）", sample_size=4),
+        PoolSpec("chapter.adaptation", [chapter.ADAPTATIONS], _field("medium"), "改编方向（不放回抽取）",
+                 sample_size=4),
+        PoolSpec("world.snippet_category", [world.SNIPPET_CATEGORIES], description="世界观片段类别"),
+        PoolSpec("world.realm", [world.REALM_KEYS], description="三界"),
+        PoolSpec("world.realm_location", list(world.REALMS.values()), description="三界场所"),
+        PoolSpec("world.deity_system", [world.DEITY_SYSTEMS], description="神仙体系"),
+        PoolSpec("world.deity_rank", list(world.DEITIES.values()), description="神仙品阶"),
+        PoolSpec("world.monster_origin", [world.MONSTER_ORIGINS], description="妖怪来历"),
+        PoolSpec("world.monster", list(world.MONSTERS.values()), description="妖怪"),
+        PoolSpec("world.artifact_category", [world.ARTIFACT_CATEGORIES], description="法宝类型"),
+        PoolSpec("world.artifact", list(world.ARTIFACTS.values()), description="法宝"),
+        PoolSpec("world.cultivation_difficulty", [world.CULTIVATION_DIFFICULTIES], description="修炼难度"),
+        PoolSpec("world.geography_region", [world.GEOGRAPHY_REGIONS], description="地理分区"),
+        PoolSpec("world.geography_place", list(world.GEOGRAPHY.values()), description="地理地点"),
+    ]
+    return {spec.name: spec for spec in specs}
+
+
+class WeightTables:
+    """各候选池的权重覆盖与别名表，可被多个 WeightedRandom 共享
+
+    表按目录序列的对象身份登记；权重全部相同的序列不建表，抽样时回落为均匀抽样。
+    """
+
+    def __init__(self, pools: Optional[Mapping[str, PoolSpec]] = None,
+                 overrides: Optional[Mapping[str, Mapping[str, float]]] = None):
+        self.pools: Dict[str, PoolSpec] = dict(pools) if pools is not None else default_pools()
+        self.overrides: Dict[str, Dict[str, float]] = {}
+        self.tables: Dict[int, AliasTable] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+        if overrides:
+            self.update(overrides)
+
+    def register(self, spec: PoolSpec):
+        """登记新的候选池（如人物名册），已有同名池时先撤下其旧表"""
+        with self._lock:
+            old = self.pools.get(spec.name)
+            if old is not None:
+                for seq in old.sequences:
+                    self.tables.pop(id(seq), None)
+            if spec.name in self.overrides:
+                _check_positive(spec, self.overrides[spec.name])
+            self.pools[spec.name] = spec
+            if spec.name in self.overrides:
+                self._rebuild(spec, self.overrides[spec.name])
+
+    def _validate(self, name: str, weights: Mapping[str, float]) -> Dict[str, float]:
+        spec = self.pools.get(name)
+        if spec is None:
+            raise ValueError(f"未知候选池：{name}")
+        known = set(spec.keys())
+        unknown = [key for key in weights if key not in known]
+        if unknown:
+            raise ValueError(f"候选池 {name} 中没有：{'、'.join(unknown)}")
+        result = {}
+        for key, weight in weights.items():
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                raise ValueError(f"权重必须为非负数：{name}.{key}={weight!r}")
+            result[key] = float(weight)
+        _check_positive(spec, result)
+        return result
+
+    def _rebuild(self, spec: PoolSpec, weights: Mapping[str, float]):
+        for seq in spec.sequences:
+            vector = [weights.get(spec.key(item), 1.0) for item in seq]
+            if len(set(vector)) <= 1:
+                self.tables.pop(id(seq), None)
+            else:
+                self.tables[id(seq)] = AliasTable(seq, vector)
+
+    def update(self, config: Mapping[str, Mapping[str, float]], replace: bool = False) -> List[str]:
+        """应用权重配置，返回实际重建了别名表的候选池
+
+        replace 为真时配置中未出现的候选池恢复为均匀权重（用于整体重新加载配置文件）。
+        """
+        validated = {name: self._validate(name, weights) for name, weights in config.items()}
+        with self._lock:
+            target = dict(validated) if replace else {**self.overrides, **validated}
+            changed = [name for name in set(target) | set(self.overrides)
+                       if target.get(name, {}) != self.overrides.get(name, {})]
+            for name in sorted(changed):
+                self._rebuild(self.pools[name], target.get(name, {}))
+                if target.get(name):
+                    self.overrides[name] = target[name]
+                else:
+                    self.overrides.pop(name, None)
+            if changed:
+                self.version += 1
+        return sorted(changed)
+
+    def load(self, path: Path, replace: bool = True) -> List[str]:
+        """从 JSON 文件读取权重配置：{"候选池": {"条目": 权重}}"""
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict) or not all(isinstance(v, dict) for v in config.values()):
+            raise ValueError("权重配置应为 {候选池: {条目: 权重}} 形式的 JSON 对象")
+        return self.update(config, replace=replace)
+
+    def table_for(self, seq: Sequence) -> Optional[AliasTable]:
+        table = self.tables.get(id(seq))
+        return table if table is not None and table.seq is seq else None
+
+
+def _check_positive(spec: PoolSpec, weights: Mapping[str, float]):
+    """每个序列中正权重的条目数须不少于生成器一次从中抽取的数量，否则生成到一半才会报错"""
+    for seq in spec.sequences:
+        positive = sum(1 for item in seq if weights.get(spec.key(item), 1.0) > 0)
+        needed = min(spec.sample_size, len(seq))
+        if positive < needed:
+            if positive == 0:
+                raise ValueError(f"候选池 {spec.name} 中有序列的权重全部为 0")
+            raise ValueError(f"候选池 {spec.name} 中有序列只有 {positive} 个正权重条目，"
+                             f"生成器一次最多不放回抽取 {needed} 个")
+
+
+class WeightedRandom(random.Random):
+    """按 WeightTables 对已登记的候选池做加权抽样的随机数生成器
+
+    choice 为加权有放回抽取；sample 为加权不放回的逐个抽取（每次在剩余条目中按权重抽一个）。
+    """
+
+    def __init__(self, x: Any = None, tables: Optional[WeightTables] = None):
+        self.weight_tables = tables if tables is not None else WeightTables()
+        super().__init__(x)
+
+    def fork(self, seed: Any) -> "WeightedRandom":
+        """以 seed 派生独立的随机数流，共用同一组权重表（生成器的 seed 参数经由此方法派生）"""
+        return type(self)(seed, self.weight_tables)
+
+    def choice(self, seq):
+        table = self.weight_tables.tables.get(id(seq))
+        if table is None or table.seq is not seq:
+            return super().choice(seq)
+        return seq[table.index(self.random())]
+
+    def sample(self, population, k, *, counts=None):
+        table = self.weight_tables.table_for(population) if counts is None else None
+        if table is None:
+            return super().sample(population, k, counts=counts)
+        n = len(population)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        picked: Dict[int, None] = {}
+        # 先用别名表抽取、遇到重复重抽；重抽过多（权重高度集中）时改为在剩余条目中按权重直接抽取
+        attempts = 0
+        while len(picked) < k and attempts < 4 * k + 8:
+            picked[table.index(self.random())] = None
+            attempts += 1
+        if len(picked) < k:
+            weights = _weights_from_table(table)
+            while len(picked) < k:
+                remaining = [i for i in range(n) if i not in picked and weights[i] > 0]
+                if not remaining:
+                    raise ValueError("正权重的条目数少于抽取数量")
+                total = sum(weights[i] for i in remaining)
+                target = self.random() * total
+                for i in remaining:
+                    target -= weights[i]
+                    if target < 0:
+                        break
+                picked[i] = None
+        return [population[i] for i in picked]
+
+
+def _weights_from_table(table: AliasTable) -> List[float]:
+    """由别名表还原各条目的相对概率"""
+    weights = [0.0] * table.n
+    for i in range(table.n):
+        weights[i] += table.prob[i]
+        weights[table.alias[i]] += 1.0 - table.prob[i]
+    return weights
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="加权抽样引擎：查看候选池，或按权重配置生成并统计分布")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pools = sub.add_parser("pools", help="列出可配置的候选池及其条目")
+    pools.add_argument("name", nargs="?", help="只显示某一候选池")
+    run = sub.add_parser("sample", help="按权重配置生成并统计某字段的分布")
+    run.add_argument("kind", choices=("chapter", "worldview", "snippet"), help="生成内容类型")
+    run.add_argument("field", help="统计的字段，如 main_character、conflicts[].intensity、category")
+    run.add_argument("-c", "--config", help="权重配置 JSON 文件")
+    run.add_argument("-w", "--weight", action="append", default=[], metavar="候选池.条目=权重",
+                     help="单项权重覆盖，可重复，如 chapter.main_character.孙悟空=3")
+    run.add_argument("-n", "--count", type=int, default=10000, help="生成数量（默认10000）")
+    run.add_argument("-s", "--seed", type=int, help="随机种子")
+    return parser.parse_args(argv)
+
+
+def parse_weight_items(items: List[str], pools: Mapping[str, PoolSpec]) -> Dict[str, Dict[str, float]]:
+    """把 候选池.条目=权重 列表整理为权重配置；候选池名本身含点号，按已登记的池名匹配"""
+    config: Dict[str, Dict[str, float]] = {}
+    for item in items:
+        target, sep, value = item.partition("=")
+        pool = next((name for name in sorted(pools, key=len, reverse=True) if target.startswith(name + ".")), None)
+        if not sep or pool is None:
+            raise ValueError(f"权重格式应为 候选池.条目=权重：{item}")
+        try:
+            config.setdefault(pool, {})[target[len(pool) + 1:]] = float(value)
+        except ValueError:
+            raise ValueError(f"权重不是数字：{item}") from None
+    return config
+
+
+def _field_values(record: Any, path: str) -> List[Any]:
+    """按 a.b、a[].b 形式的路径取出字段值"""
+    values = [record]
+    for part in path.split("."):
+        expand = part.endswith("[]")
+        name = part[:-2] if expand else part
+        next_values = []
+        for value in values:
+            value = value.get(name) if isinstance(value, dict) else None
+            if expand and isinstance(value, list):
+                next_values.extend(value)
+            elif value is not None:
+                next_values.append(value)
+        values = next_values
+    return values
+
+
+def main(argv: Optional[List[str]] = None):
+    """主函数"""
+    args = parse_args(argv)
+    tables = WeightTables()
+    if args.command == "pools":
+        specs = [tables.pools[args.name]] if args.name in tables.pools else list(tables.pools.values())
+        if args.name and args.name not in tables.pools:
+            print(f"未知候选池：{args.name}", file=sys.stderr)
+            return 1
+        for spec in specs:
+            print(f"{spec.name}（{spec.description}）：{'、'.join(spec.keys())}")
+        return 0
+
+    try:
+        if args.config:
+            tables.load(Path(args.config))
+        tables.update(parse_weight_items(args.weight, tables.pools))
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    rng = WeightedRandom(args.seed, tables)
+    if args.kind == "chapter":
+        make = chapter.ChapterGenerator(rng=rng).generate_complete_chapter_design
+    else:
+        generator = world.WorldViewGenerator(rng=rng)
+        make = generator.generate_full_worldview if args.kind == "worldview" else generator.generate_worldview_snippet
+    counts: Counter = Counter()
+    for _ in range(args.count):
+        counts.update(json.dumps(v, ensure_ascii=False) if isinstance(v, (dict, list)) else v
+                      for v in _field_values(make(), args.field))
+    total = sum(counts.values()) or 1
+    try:
+        for value, count in counts.most_common():
+            print(f"{value}\t{count}\t{count / total * 100:.2f}%")
+    except BrokenPipeError:
+        sys.stderr.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
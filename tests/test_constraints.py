@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+条件约束的回归测试：约束抽样的每份设计都应满足条件，无法同时满足的条件在构造时报错，
+不加条件时场景、冲突数量仍与 generate_complete_chapter_design 一样均匀分布
+"""
+
+import random
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / ".codebuddy" / "skills" / "journey-to-the-west-chapter" / "scripts"))
+
+from constraints import CONFLICT_COUNTS, SCENE_COUNTS, ChapterConstraints  # noqa: E402
+from generate_chapter import ChapterGenerator  # noqa: E402
+
+DRAWS = 3000
+
+
+class ConstrainedDesignTest(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = ChapterGenerator(seed=7, clock=lambda: "2024-01-01T00:00:00")
+
+    def test_every_draw_matches(self):
+        for conditions in (
+            {"main_character": "猪八戒", "conflict_type": "人与自我", "conflict_intensity": "激烈"},
+            {"scene_type": "神魔世界", "scene_mood": ["阴森", "诡异"], "scene_location": "妖洞"},
+            {"template": ["经典四段式", "人性考验式"], "conflict_description": ["降妖除魔", "神仙考验"]},
+        ):
+            constraints = self.generator.constrain(**conditions)
+            for _ in range(200):
+                design = self.generator.generate_constrained_design(constraints)
+                self.assertTrue(constraints.matches(design), conditions)
+
+    def test_unsatisfiable(self):
+        # “降妖除魔”属于人与神魔，不可能同时是人与自我的冲突
+        with self.assertRaises(ValueError):
+            ChapterConstraints(conflict_type="人与自我", conflict_description="降妖除魔")
+        with self.assertRaises(ValueError):
+            ChapterConstraints(main_character="哪吒")
+        with self.assertRaises(ValueError):
+            ChapterConstraints(unknown_field="x")
+
+    def test_unconstrained_counts_are_uniform(self):
+        constraints = ChapterConstraints()
+        rng = random.Random(11)
+        scenes = Counter(len(constraints.draw_scenes(rng)) for _ in range(DRAWS))
+        conflicts = Counter(len(constraints.draw_conflicts(rng)) for _ in range(DRAWS))
+        for counts, expected in ((scenes, SCENE_COUNTS), (conflicts, CONFLICT_COUNTS)):
+            self.assertEqual(set(counts), set(expected))
+            for k in expected:
+                self.assertAlmostEqual(counts[k] / DRAWS, 1 / len(expected), delta=0.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
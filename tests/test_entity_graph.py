@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+实体图谱命令行的回归测试：held-in 列出的持有者应与选出法宝的（地点, 类型）范围一致
+"""
+
+import contextlib
+import io
+import json
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / ".codebuddy" / "skills" / "journey-to-the-west-world" / "scripts"))
+
+from entity_graph import default_graph, main  # noqa: E402
+
+
+def run(*argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        main(list(argv))
+    return json.loads(out.getvalue())
+
+
+class HeldInTest(unittest.TestCase):
+
+    def test_holders_within_place_and_kind(self):
+        graph = default_graph()
+        for place, kind in (("西牛贺洲", "monster"), ("西牛贺洲", "all")):
+            members = graph.within(place, None if kind == "all" else kind)
+            result = run("held-in", place, "-k", kind)
+            self.assertTrue(result, (place, kind))
+            for artifact, holders in result.items():
+                self.assertTrue(holders, artifact)
+                self.assertTrue(set(holders) <= members, (artifact, holders))
+
+    def test_outside_holders_excluded(self):
+        result = run("held-in", "西牛贺洲")
+        self.assertNotIn("观音菩萨", result["玉净瓶"])
+        self.assertNotIn("太上老君", result["金刚琢"])
+
+
+if __name__ == "__main__":
+    unittest.main()
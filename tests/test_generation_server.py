@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+本地生成服务的回归测试：格式错误的请求应得到 400 JSON 响应而不是断开连接，
+过大的请求被拒绝，半截请求只关闭连接而不抛出异常；只有结果可复现的请求才进入结果缓存
+"""
+
+import asyncio
+import json
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from generation_server import MAX_BODY_BYTES, GenerationServer, GenerationService  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+
+
+async def exchange(port: int, raw: bytes):
+    """发送一个原始请求，返回（状态码, 响应体）"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    body = await reader.readexactly(length)
+    writer.close()
+    return int(lines[0].split(" ")[1]), json.loads(body)
+
+
+class MalformedRequestTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # 记录连接处理协程中未捕获的异常
+        self.errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: self.errors.append(context))
+        self.server = GenerationServer(GenerationService(), executor=None)
+        self.tasks = [asyncio.create_task(batcher.run()) for batcher in self.server.batchers.values()]
+        self.listener = await asyncio.start_server(self.server.handle_connection, "127.0.0.1", 0)
+        self.port = self.listener.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        await self.listener.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        self.assertEqual(self.errors, [])
+
+    async def post(self, body: bytes, length: str = None):
+        length = str(len(body)) if length is None else length
+        raw = (f"POST /chapter HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n\r\n"
+               .encode("latin-1") + body)
+        return await exchange(self.port, raw)
+
+    async def test_non_object_body(self):
+        for body in (b"[1]", b'"x"', b"3"):
+            status, payload = await self.post(body)
+            self.assertEqual(status, 400)
+            self.assertIn("error", payload)
+
+    async def test_invalid_content_length(self):
+        for length in ("abc", "-1"):
+            status, payload = await self.post(b"", length)
+            self.assertEqual(status, 400)
+            self.assertIn("Content-Length", payload["error"])
+
+    async def test_body_too_large(self):
+        status, payload = await self.post(b"", str(MAX_BODY_BYTES + 1))
+        self.assertEqual(status, 413)
+        self.assertIn("error", payload)
+
+    async def test_headers_too_large(self):
+        raw = b"GET /chapter HTTP/1.1\r\nX-Padding: " + b"a" * (128 * 1024)
+        status, payload = await exchange(self.port, raw)
+        self.assertEqual(status, 431)
+        self.assertIn("error", payload)
+
+    async def test_truncated_body(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(b"POST /chapter HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}")
+        await writer.drain()
+        writer.write_eof()
+        # 服务端不回复，直接关闭连接
+        self.assertEqual(await reader.read(), b"")
+        writer.close()
+
+    async def test_object_body(self):
+        status, payload = await self.post(json.dumps({"seed": 1}).encode("utf-8"))
+        self.assertEqual(status, 200)
+        self.assertIn("chapter_title", payload)
+
+
+class CacheKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = GenerationService(ResultCache())
+
+    def test_not_reproducible(self):
+        for kind, params in (
+            ("chapter", {"seed": ""}),
+            ("chapter", {"seed": "1"}),  # 未固定生成时间
+            ("worldview", {"seed": ""}),
+            ("outline", {"overview": "0"}),
+            ("outline", {"chapter": ""}),
+            ("outline", {"chapter": "abc"}),
+        ):
+            self.assertIsNone(self.service.cache_key(kind, params), (kind, params))
+
+    def test_normalized_values(self):
+        key = self.service.cache_key
+        self.assertEqual(key("outline", {"chapter": "7"}), key("outline", {"chapter": "07", "seed": "3"}))
+        self.assertEqual(key("outline", {"overview": "1"}), key("outline", {"overview": "true", "chapter": "5"}))
+        self.assertIsNotNone(key("worldview", {"seed": "5"}))
+        self.assertNotEqual(key("worldview", {"seed": "5"}), key("worldview", {"seed": "5", "count": "1"}))
+
+    def test_seeded_chapter_is_function_of_inputs(self):
+        params = {"seed": "42", "generated_at": "2024-01-01T00:00:00"}
+        key = self.service.cache_key("chapter", params)
+        self.assertIsNotNone(key)
+        first = self.service.run_batch("chapter", [params])[0]
+        self.service.cache.clear()
+        second = self.service.run_batch("chapter", [params])[0]
+        self.assertEqual(first, second)
+        self.assertEqual(json.loads(first[1])["metadata"]["generated_at"], params["generated_at"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+参考资料检索的回归测试：单字查询应计入汉字串中每一处出现，包括串末的字
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from search_references import ReferenceIndex  # noqa: E402
+
+
+def make_index(*texts):
+    """每段正文作为单独一个文件的一个章节"""
+    index = ReferenceIndex()
+    for number, text in enumerate(texts):
+        section = {"path": ["资料"], "text": text, "start_line": 1, "end_line": 1}
+        index.add_file(f"doc{number}.md", str(number), {"sections": [section]})
+    return index
+
+
+class SingleCharacterQueryTest(unittest.TestCase):
+
+    def test_character_at_end_of_run(self):
+        index = make_index("他手持金箍棒。", "棒子很长", "与此无关")
+        self.assertEqual(dict(index.term_postings("棒")), {0: 1, 1: 1})
+        self.assertEqual({hit.path for hit in index.search("棒")}, {"doc0.md", "doc1.md"})
+
+    def test_each_position_counted_once(self):
+        index = make_index("棒棒糖", "金箍棒棒", "棒", "一棒一棒")
+        self.assertEqual(dict(index.term_postings("棒")), {0: 2, 1: 2, 2: 1, 3: 2})
+
+    def test_removed_file_leaves_no_postings(self):
+        index = make_index("他手持金箍棒。")
+        index.remove_file("doc0.md")
+        self.assertIsNone(index.term_postings("棒"))
+        self.assertEqual(index.tail_postings, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
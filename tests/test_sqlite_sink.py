@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 存储的回归测试：各查询条件与直接在内存中过滤原始设计的结果一致
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from sqlite_sink import ChapterGenerator, DesignStore  # noqa: E402
+
+
+class QueryFilterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = DesignStore(Path(self.directory.name) / "designs.db")
+        generator = ChapterGenerator(seed=4, clock=lambda: "2024-01-01T00:00:00")
+        self.designs = [generator.generate_complete_chapter_design() for _ in range(300)]
+        self.store.add_designs(self.designs)
+        # 目录数据中的元组读回为列表
+        self.designs = [json.loads(json.dumps(design)) for design in self.designs]
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def expected(self, predicate):
+        return [(i, design) for i, design in enumerate(self.designs, 1) if predicate(design)]
+
+    def test_filters(self):
+        sample = self.designs[0]
+        conflict = sample["conflicts"][0]
+        cases = (
+            ({"template": sample["metadata"]["template_used"]},
+             lambda d: d["metadata"]["template_used"] == sample["metadata"]["template_used"]),
+            ({"main_character": "孙悟空", "emotion": sample["character_performance"]["emotion"]},
+             lambda d: d["main_character"] == "孙悟空"
+             and d["character_performance"]["emotion"] == sample["character_performance"]["emotion"]),
+            ({"conflict_type": conflict["type"], "conflict_intensity": conflict["intensity"]},
+             lambda d: any(c["type"] == conflict["type"] for c in d["conflicts"])
+             and any(c["intensity"] == conflict["intensity"] for c in d["conflicts"])),
+            ({"scene_location": sample["scenes"][0]["location"]},
+             lambda d: any(s["location"] == sample["scenes"][0]["location"] for s in d["scenes"])),
+            ({"chapter_number": sample["metadata"]["chapter_number"], "template": None},
+             lambda d: d["metadata"]["chapter_number"] == sample["metadata"]["chapter_number"]),
+        )
+        for filters, predicate in cases:
+            expected = self.expected(predicate)
+            self.assertTrue(expected, filters)
+            self.assertEqual(list(self.store.query(limit=None, **filters)), expected, filters)
+            self.assertEqual(self.store.count(**filters), len(expected), filters)
+
+    def test_limit_offset(self):
+        rows = list(self.store.query(limit=5, offset=10))
+        self.assertEqual([design_id for design_id, _ in rows], list(range(11, 16)))
+
+    def test_unknown_filter(self):
+        with self.assertRaises(ValueError):
+            self.store.count(colour="红")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+加权抽样引擎的回归测试：权重高度集中时不放回抽取改走逐个按权重抽取的路径，
+正权重条目少于一次抽取数量的配置在加载时即被拒绝；生成器按 seed 派生的随机数流沿用同一组权重表
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+from weighted_random import PoolSpec, WeightedRandom, WeightTables, chapter, world  # noqa: E402
+from lazy_design import LazyChapterGenerator  # noqa: E402
+
+
+class WeightedSampleTest(unittest.TestCase):
+
+    def test_concentrated_weights_fall_back(self):
+        # 一个条目几乎占满全部权重，别名表重抽多次仍凑不齐 k 个，必须走逐个抽取
+        weights = {key: 1e-6 for key in chapter.KEY_ELEMENTS}
+        weights["人物对话"] = 1e6
+        tables = WeightTables(overrides={"chapter.key_element": weights})
+        rng = WeightedRandom(3, tables)
+        for _ in range(50):
+            picked = rng.sample(chapter.KEY_ELEMENTS, 6)
+            self.assertEqual(len(set(picked)), 6)
+            self.assertIn("人物对话", picked)
+
+    def test_zero_weight_items_never_sampled(self):
+        weights = {key: 0 for key in chapter.KEY_ELEMENTS[6:]}
+        tables = WeightTables(overrides={"chapter.key_element": weights})
+        rng = WeightedRandom(5, tables)
+        for _ in range(50):
+            self.assertEqual(set(rng.sample(chapter.KEY_ELEMENTS, 6)), set(chapter.KEY_ELEMENTS[:6]))
+
+    def test_too_few_positive_weights(self):
+        tables = WeightTables()
+        with self.assertRaises(ValueError):
+            tables.update({"chapter.key_element": {key: 0 for key in chapter.KEY_ELEMENTS[5:]}})
+        with self.assertRaises(ValueError):
+            tables.update({"chapter.emotion": {key: 0 for key in chapter.EMOTIONS}})
+        self.assertEqual(tables.overrides, {})
+
+    def test_register_checks_existing_override(self):
+        tables = WeightTables(overrides={"chapter.main_character": {"孙悟空": 0}})
+        with self.assertRaises(ValueError):
+            tables.register(PoolSpec("chapter.main_character", [[{"name": "孙悟空"}]],
+                                     lambda item: item["name"]))
+
+
+class ForkedStreamTest(unittest.TestCase):
+    """只允许抽到一个取值的权重下，各种 seed 路径的结果都应落在该取值上"""
+
+    def setUp(self):
+        others = [c["name"] for c in chapter.MAIN_CHARACTERS if c["name"] != "沙僧"]
+        self.tables = WeightTables(overrides={
+            "chapter.main_character": {name: 0 for name in others},
+            "chapter.title_first": {line: 0 for line in chapter.TITLE_FIRST_LINES[1:]},
+            "world.snippet_category": {category: 0 for category in world.SNIPPET_CATEGORIES if category != "deity"},
+        })
+        self.rng = WeightedRandom(1, self.tables)
+
+    def test_chapter_seed(self):
+        generator = chapter.ChapterGenerator(rng=self.rng)
+        for seed in range(20):
+            self.assertEqual(generator.generate_complete_chapter_design(seed=seed)["main_character"], "沙僧")
+        # 约束对象自带收窄后的候选池，这里检查仍由生成器抽取的章回标题
+        constraints = generator.constrain(conflict_type="人与自我")
+        for seed in range(20):
+            title = generator.generate_constrained_design(constraints, seed=seed)["chapter_title"]
+            self.assertTrue(title.startswith(chapter.TITLE_FIRST_LINES[0]))
+
+    def test_lazy_design(self):
+        generator = LazyChapterGenerator(rng=self.rng)
+        for seed in range(20):
+            self.assertEqual(generator.lazy_design(seed=seed)["main_character"], "沙僧")
+
+    def test_worldview_seed(self):
+        generator = world.WorldViewGenerator(rng=self.rng)
+        for seed in range(20):
+            self.assertIn("system", generator.generate_worldview_snippet(seed=seed))
+
+    def test_seed_result_unchanged_without_weights(self):
+        plain = chapter.ChapterGenerator(clock=lambda: "2024-01-01T00:00:00")
+        weighted = chapter.ChapterGenerator(rng=WeightedRandom(0), clock=lambda: "2024-01-01T00:00:00")
+        self.assertEqual(plain.generate_complete_chapter_design(seed=3),
+                         weighted.generate_complete_chapter_design(seed=3))
+
+
+if __name__ == "__main__":
+    unittest.main()